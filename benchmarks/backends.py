@@ -0,0 +1,22 @@
+"""Общие функции скриптов сравнения бэкендов инференса (quantization_benchmark.py, onnx_parity.py)"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from algorithms import classifier  # noqa: E402
+from algorithms.rules import apply_rules  # noqa: E402
+
+
+def run_backend(backend, texts):
+    """Возвращает предсказания (после правил согласования) и время инференса в секундах"""
+    models = classifier.load_models(backend)
+    # Прогрев: первые батчи включают выделение памяти и инициализацию ядер
+    classifier.infer_texts(texts[:classifier.MAX_BATCH_SIZE], models)
+
+    start = time.perf_counter()
+    tone, hate = classifier.infer_texts(texts, models)
+    seconds = time.perf_counter() - start
+    tone, hate = apply_rules(tone, hate)
+    return tone, hate, seconds
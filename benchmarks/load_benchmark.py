@@ -0,0 +1,87 @@
+"""Время загрузки модели и пиковая память процесса для разных форматов чекпоинта.
+
+Запуск из корня проекта (после python src/cli.py convert-safetensors):
+    python benchmarks/load_benchmark.py --repeat 3
+
+Каждый вариант загружается в отдельном процессе:
+  legacy      - from_pretrained(rubert-base-cased) + torch.load(.pth) (исходный способ)
+  pth-mmap    - модель по конфигу + torch.load(.pth, mmap=True), load_state_dict(assign=True)
+  safetensors - самодостаточный .safetensors через mmap (algorithms/safetensors_io.py)
+Для измерения холодного запуска сбросьте кэш страниц ОС перед каждым прогоном
+(Linux: sync; echo 3 | sudo tee /proc/sys/vm/drop_caches).
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC_DIR)
+
+VARIANTS = ("legacy", "pth-mmap", "safetensors")
+
+
+def load_variant(variant, path, num_labels):
+    """Загружает модель указанным способом и возвращает время загрузки в секундах"""
+    started = time.perf_counter()
+    import torch
+    from transformers import AutoConfig, AutoModelForSequenceClassification
+
+    from algorithms.classifier import MODEL_CHECKPOINT
+    from algorithms.safetensors_io import empty_parameters, load_safetensors_model, safetensors_path
+
+    if variant == "legacy":
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_CHECKPOINT, num_labels=num_labels)
+        model.load_state_dict(torch.load(path, map_location="cpu"))
+    elif variant == "pth-mmap":
+        config = AutoConfig.from_pretrained(MODEL_CHECKPOINT, num_labels=num_labels)
+        with empty_parameters():
+            model = AutoModelForSequenceClassification.from_config(config)
+        model.load_state_dict(torch.load(path, map_location="cpu", mmap=True), assign=True)
+    else:
+        model = load_safetensors_model(safetensors_path(path))
+
+    model.eval()
+    return time.perf_counter() - started
+
+
+def main():
+    from algorithms.classifier import MODEL_TONE_PATH, TONE_MAPPING
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=MODEL_TONE_PATH, help="Чекпоинт .pth (рядом - .safetensors)")
+    parser.add_argument("--num-labels", type=int, default=len(TONE_MAPPING))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.variant:
+        # Дочерний процесс: один замер
+        seconds = load_variant(args.variant, args.path, args.num_labels)
+        # ru_maxrss в Linux - в килобайтах
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(json.dumps({"seconds": seconds, "peak_mb": peak_mb}))
+        return
+
+    print(f"Чекпоинт: {args.path}")
+    print(f"{'Вариант':12} {'загрузка, с':>12} {'пик памяти, MB':>15}")
+    for variant in VARIANTS:
+        runs = []
+        for _ in range(args.repeat):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--variant", variant,
+                 "--path", args.path, "--num-labels", str(args.num_labels)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            runs.append(json.loads(output.strip().splitlines()[-1]))
+
+        seconds = min(run["seconds"] for run in runs)
+        peak_mb = min(run["peak_mb"] for run in runs)
+        print(f"{variant:12} {seconds:12.2f} {peak_mb:15.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Проверка совпадения меток ONNX Runtime с PyTorch на выборке комментариев.
+
+Запуск из корня проекта (после python src/cli.py export-onnx):
+    python benchmarks/onnx_parity.py comments.csv --rows 2000 --min-agreement 0.99
+
+Завершается с кодом 1, если доля совпадающих меток тональности или категории
+ниже --min-agreement. Текст берется из колонки sentence.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from algorithms import classifier  # noqa: E402
+from backends import run_backend  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV с колонкой sentence")
+    parser.add_argument("--rows", type=int, default=2000, help="Сколько строк взять из файла")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--min-agreement", type=float, default=0.99,
+                        help="Минимальная допустимая доля совпадающих меток")
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input, encoding=args.encoding, nrows=args.rows).dropna(subset=["sentence"])
+    texts = df["sentence"].astype(str).tolist()
+
+    torch_tone, torch_hate, torch_seconds = run_backend("torch", texts)
+    onnx_tone, onnx_hate, onnx_seconds = run_backend("onnx", texts)
+
+    tone_agreement = float(np.mean(onnx_tone == torch_tone))
+    hate_agreement = float(np.mean(onnx_hate == torch_hate))
+
+    print(f"Строк: {len(texts)}, устройство PyTorch: {classifier.backend_device('torch')}")
+    print(f"PyTorch:      {len(texts) / torch_seconds:10.1f} записей/с")
+    print(f"ONNX Runtime: {len(texts) / onnx_seconds:10.1f} записей/с (x{torch_seconds / onnx_seconds:.2f})")
+    print(f"Совпадение меток: тональность {tone_agreement:.4f}, категория {hate_agreement:.4f}")
+
+    if min(tone_agreement, hate_agreement) < args.min_agreement:
+        mismatched = np.flatnonzero((onnx_tone != torch_tone) | (onnx_hate != torch_hate))
+        print(f"Расхождение выше допустимого ({args.min_agreement}). Примеры строк: {mismatched[:10].tolist()}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Масштабирование пула процессов инференса на CPU (algorithms/pool.py).
+
+Запуск из корня проекта:
+    python benchmarks/pool_scaling_benchmark.py comments.csv --workers 1 2 4 8
+
+Для каждого количества воркеров выводит время запуска пула (загрузка моделей),
+скорость классификации и проверяет, что метки совпадают с инференсом в одном процессе.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from algorithms import classifier  # noqa: E402
+from algorithms.pool import InferencePool  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV с колонкой sentence")
+    parser.add_argument("--rows", type=int, default=5000, help="Сколько строк взять из файла")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--backend", choices=classifier.INFERENCE_BACKENDS, default=classifier.INFERENCE_BACKEND)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.input, encoding=args.encoding, nrows=args.rows).dropna(subset=["sentence"])
+    texts = df["sentence"].astype(str).tolist()
+
+    # Базовая линия: один процесс со всеми потоками torch
+    classifier.DEVICE = torch.device("cpu")
+    classifier.USE_AMP = False
+    models = classifier.load_models(args.backend)
+    models.infer_texts(texts[:classifier.MAX_BATCH_SIZE])
+    start = time.perf_counter()
+    expected_tone, expected_class = models.infer_texts(texts)
+    baseline_seconds = time.perf_counter() - start
+
+    print(f"Строк: {len(texts)}, ядер: {os.cpu_count()}, бэкенд: {args.backend}")
+    print(f"{'Процессов':>9} {'потоков':>8} {'запуск, с':>10} {'записей/с':>10} {'ускорение':>10} {'метки':>6}")
+    print(f"{'-':>9} {torch.get_num_threads():8} {'-':>10} {len(texts) / baseline_seconds:10.1f} {1:9.2f}x {'-':>6}")
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        with InferencePool(workers, args.backend) as pool:
+            pool.warm_up()
+            startup_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            tone, hate = pool.infer_texts(texts)
+            seconds = time.perf_counter() - start
+
+        same = np.array_equal(tone, expected_tone) and np.array_equal(hate, expected_class)
+        print(f"{workers:9} {pool.threads_per_worker:8} {startup_seconds:10.1f} {len(texts) / seconds:10.1f} "
+              f"{baseline_seconds / seconds:9.2f}x {'ok' if same else 'РАЗН':>6}")
+
+
+if __name__ == "__main__":
+    main()
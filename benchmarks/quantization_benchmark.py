@@ -0,0 +1,60 @@
+"""Сравнение бэкендов инференса torch (fp32) и int8 на отложенной выборке.
+
+Запуск из корня проекта:
+    python benchmarks/quantization_benchmark.py holdout.csv --rows 2000
+
+CSV должен содержать колонку sentence. Если есть колонки с эталонной разметкой
+(--tone-column, --hate-column, значения 0..2 и 0..5 как в TONE_MAPPING/HATE_MAPPING),
+дополнительно считается точность каждого бэкенда.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from algorithms import classifier  # noqa: E402
+from backends import run_backend  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV с колонкой sentence")
+    parser.add_argument("--rows", type=int, default=2000, help="Сколько строк взять из файла")
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--tone-column", default="tone", help="Колонка с эталонной тональностью (если есть)")
+    parser.add_argument("--hate-column", default="hate", help="Колонка с эталонной категорией (если есть)")
+    parser.add_argument("--threads", type=int, default=None, help="torch.set_num_threads для обоих бэкендов")
+    args = parser.parse_args()
+
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    df = pd.read_csv(args.input, encoding=args.encoding, nrows=args.rows).dropna(subset=["sentence"])
+    texts = df["sentence"].astype(str).tolist()
+
+    results = {backend: run_backend(backend, texts) for backend in ("torch", "int8")}
+    fp32_tone, fp32_hate, fp32_seconds = results["torch"]
+
+    print(f"Строк: {len(texts)}, потоков torch: {torch.get_num_threads()}, "
+          f"устройство fp32: {classifier.backend_device('torch')}")
+    print(f"{'Бэкенд':8} {'записей/с':>10} {'ускорение':>10} {'тон = fp32':>11} {'категория = fp32':>17}")
+    for backend, (tone, hate, seconds) in results.items():
+        print(f"{backend:8} {len(texts) / seconds:10.1f} {fp32_seconds / seconds:9.2f}x "
+              f"{np.mean(tone == fp32_tone):11.4f} {np.mean(hate == fp32_hate):17.4f}")
+
+    for column, index, name in ((args.tone_column, 0, "тональность"), (args.hate_column, 1, "категория")):
+        if column not in df.columns:
+            continue
+        expected = df[column].to_numpy()
+        accuracy = ", ".join(f"{backend} {np.mean(result[index] == expected):.4f}"
+                             for backend, result in results.items())
+        print(f"Точность ({name}): {accuracy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Сравнение построчного цикла согласования предсказаний с векторизованными правилами.
+
+Запуск из корня проекта:
+    python benchmarks/rules_benchmark.py --rows 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from algorithms.rules import apply_rules  # noqa: E402
+
+
+def loop_rules(df_tone):
+    """Исходная реализация из predict(): построчный обход через df.loc"""
+    for i in range(len(df_tone)):
+        if df_tone.loc[i, "tone_prediction"] in [1, 2]:
+            df_tone.loc[i, "class_prediction"] = 0
+        elif df_tone.loc[i, "tone_prediction"] == 0 and df_tone.loc[i, "class_prediction"] == 0:
+            df_tone.loc[i, "class_prediction"] = 5
+    return df_tone
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    tone = rng.integers(0, 3, size=args.rows)
+    hate = rng.integers(0, 6, size=args.rows)
+
+    df_tone = pd.DataFrame({"tone_prediction": tone, "class_prediction": hate})
+    start = time.perf_counter()
+    expected = loop_rules(df_tone)["class_prediction"].to_numpy()
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, actual = apply_rules(tone, hate)
+    vector_seconds = time.perf_counter() - start
+
+    if not np.array_equal(expected, actual):
+        raise SystemExit("Результаты векторизованных правил расходятся с циклом")
+
+    print(f"Строк: {args.rows}")
+    print(f"Цикл df.loc:             {loop_seconds * 1000:10.1f} мс")
+    print(f"Векторизованные правила: {vector_seconds * 1000:10.1f} мс")
+    print(f"Ускорение: x{loop_seconds / vector_seconds:.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Количество токенов и время обработки исходных и очищенных (clean_texts) текстов.
+
+Запуск из корня проекта:
+    python benchmarks/text_cleaning_benchmark.py comments.csv --rows 20000 --infer
+Без файла используется синтетический корпус в стиле комментариев YouTube и Telegram.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from algorithms.classifier import MAX_LENGTH, load_models, load_tokenization_stage  # noqa: E402
+from algorithms.preprocessing import clean_texts  # noqa: E402
+from ingestion import read_chunks  # noqa: E402
+
+WORDS = ("видео", "канал", "автор", "спасибо", "класс", "ужас", "смотрю", "каждый", "день",
+         "лучший", "обзор", "зачем", "это", "снимать", "просто", "огонь", "позор", "согласен")
+EMOJI = "😂🔥👍❤️🤡😡🙏🎉"
+
+
+def synthetic_corpus(rows, seed):
+    """Комментарии с HTML textDisplay, ссылками, упоминаниями, повторами символов и эмодзи"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(rows):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(4, 30))]
+        if rng.random() < 0.3:
+            words[rng.randrange(len(words))] += rng.choice("оа!") * rng.randint(4, 12)
+        if rng.random() < 0.3:
+            seconds = rng.randint(10, 3600)
+            words.insert(0, f'<a href="https://www.youtube.com/watch?v=dQw4w9WgXcQ&amp;t={seconds}">'
+                            f'{seconds // 60}:{seconds % 60:02d}</a>')
+        if rng.random() < 0.2:
+            words.append(f"https://t.me/channel_{rng.randint(1, 999)}/{rng.randint(1, 99999)}")
+        if rng.random() < 0.2:
+            words.insert(0, f"@user_{rng.randint(1, 9999)},")
+        if rng.random() < 0.3:
+            words.append("".join(rng.choice(EMOJI) for _ in range(rng.randint(3, 20))))
+        text = " ".join(words)
+        if rng.random() < 0.3:
+            text = text.replace(" ", "<br>", 2).replace("это", "&quot;это&quot;")
+        texts.append(text)
+    return texts
+
+
+def measure(label, texts, stage, models, baseline=None):
+    start = time.perf_counter()
+    input_ids = stage.encode(texts)
+    tokenize_seconds = time.perf_counter() - start
+    lengths = np.array([len(ids) for ids in input_ids])
+
+    infer_seconds = None
+    if models is not None:
+        start = time.perf_counter()
+        models.infer_texts(texts)
+        infer_seconds = time.perf_counter() - start
+
+    tokens = int(lengths.sum())
+    change = f"{tokens / baseline['tokens'] - 1:+.1%}" if baseline else ""
+    print(f"{label:10} {tokens:10} {change:>8} {lengths.mean():8.1f} {np.mean(lengths >= MAX_LENGTH):9.2%} "
+          f"{tokenize_seconds * 1000:12.1f}" + (f" {infer_seconds:12.2f}" if infer_seconds is not None else ""))
+    return {"tokens": tokens, "infer": infer_seconds}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", help="Файл с колонкой текста (CSV, XLSX, JSONL, Parquet)")
+    parser.add_argument("--column", default="sentence")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--infer", action="store_true", help="Измерить и время инференса моделей")
+    args = parser.parse_args()
+
+    if args.input:
+        chunk = next(read_chunks(args.input, args.rows, column=args.column))
+        texts = chunk["sentence"].dropna().astype(str).tolist()
+    else:
+        texts = synthetic_corpus(args.rows, args.seed)
+
+    start = time.perf_counter()
+    cleaned = clean_texts(texts)
+    clean_seconds = time.perf_counter() - start
+
+    stage = load_tokenization_stage()
+    models = load_models() if args.infer else None
+
+    print(f"Строк: {len(texts)}, очистка: {clean_seconds * 1000:.1f} мс "
+          f"({len(texts) / clean_seconds:.0f} текстов/с)")
+    print(f"{'Тексты':10} {'токенов':>10} {'':>8} {'среднее':>8} {'обрезано':>9} {'токенизация':>12}"
+          + (f" {'инференс, с':>12}" if models is not None else ""))
+    baseline = measure("исходные", texts, stage, models)
+    result = measure("очищенные", cleaned, stage, models, baseline)
+    if models is not None:
+        print(f"Инференс с учетом очистки: x{baseline['infer'] / (result['infer'] + clean_seconds):.2f}")
+
+
+if __name__ == "__main__":
+    main()
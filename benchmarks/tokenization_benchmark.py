@@ -0,0 +1,51 @@
+"""Сравнение токенизации: вызов HF-токенизатора на всем списке и этап TokenizationStage.
+
+Запуск из корня проекта:
+    python benchmarks/tokenization_benchmark.py comments.csv --rows 20000
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from algorithms.classifier import MAX_LENGTH, load_tokenizer  # noqa: E402
+from algorithms.tokenization import TokenizationStage  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", help="CSV с колонкой sentence")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args()
+
+    texts = (pd.read_csv(args.input, encoding=args.encoding, nrows=args.rows)["sentence"]
+             .dropna().astype(str).tolist())
+    tokenizer = load_tokenizer()
+
+    start = time.perf_counter()
+    expected = tokenizer(texts, padding=False, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+    baseline = time.perf_counter() - start
+
+    print(f"Строк: {len(texts)}, быстрый токенизатор: {tokenizer.is_fast}")
+    print(f"{'Вариант':28} {'время, мс':>10} {'ускорение':>10}")
+    print(f"{'HF tokenizer(texts)':28} {baseline * 1000:10.1f} {1:9.2f}x")
+
+    for threads in args.threads:
+        stage = TokenizationStage(tokenizer, max_length=MAX_LENGTH, num_threads=threads)
+        for label in (f"stage, {threads} потоков", f"stage, {threads} потоков, кэш"):
+            start = time.perf_counter()
+            input_ids = stage(texts)
+            seconds = time.perf_counter() - start
+            if [ids.tolist() for ids in input_ids] != expected:
+                raise SystemExit("Результаты TokenizationStage расходятся с HF-токенизатором")
+            print(f"{label:28} {seconds * 1000:10.1f} {baseline / seconds:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
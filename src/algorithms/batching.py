@@ -0,0 +1,49 @@
+from typing import Dict, List, Sequence
+
+import numpy as np
+import torch
+
+
+def make_length_batches(lengths: Sequence[int], token_budget: int, max_batch_size: int) -> List[np.ndarray]:
+    """Группирует индексы текстов в батчи по длине.
+
+    Тексты сортируются по убыванию длины, поэтому максимальная длина батча
+    равна длине его первого элемента. Батч закрывается, как только
+    число токенов с учетом паддинга (размер батча * максимальная длина)
+    превысит token_budget или размер батча достигнет max_batch_size.
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    if lengths.size == 0:
+        return []
+
+    # Стабильная сортировка по убыванию: длинные тексты идут первыми,
+    # чтобы нехватка памяти проявилась на первом же батче
+    order = np.argsort(-lengths, kind="stable")
+
+    batches = []
+    start = 0
+    while start < len(order):
+        batch_max_length = max(int(lengths[order[start]]), 1)
+        batch_size = max(1, min(max_batch_size, token_budget // batch_max_length))
+        batches.append(order[start:start + batch_size])
+        start += batch_size
+
+    return batches
+
+
+def collate_batch(input_ids: Sequence[Sequence[int]], indices: np.ndarray, pad_token_id: int) -> Dict[str, torch.Tensor]:
+    """Собирает батч, дополняя последовательности паддингом до максимальной длины внутри батча"""
+    sequences = [input_ids[i] for i in indices]
+    max_length = max(len(seq) for seq in sequences)
+
+    batch_input_ids = torch.full((len(sequences), max_length), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(sequences), max_length), dtype=torch.long)
+
+    for row, seq in enumerate(sequences):
+        batch_input_ids[row, :len(seq)] = torch.as_tensor(seq, dtype=torch.long)
+        attention_mask[row, :len(seq)] = 1
+
+    return {
+        'input_ids': batch_input_ids,
+        'attention_mask': attention_mask
+    }
@@ -0,0 +1,54 @@
+import hashlib
+import os
+from dataclasses import dataclass
+
+import pandas as pd
+
+
+@dataclass
+class CacheStats:
+    """Счетчики обращений к кэшу предсказаний за один запуск анализа"""
+    hits: int = 0
+    misses: int = 0
+    evicted: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+# Версия ключа кэша: входит в model_version, поэтому при изменении нормализации
+# записи, сохраненные со старыми ключами, перестают использоваться
+CACHE_KEY_VERSION = "2"
+
+
+def normalize_texts(texts) -> list:
+    """Нормализованные тексты: пробельные символы схлопнуты в один пробел.
+
+    Регистр сохраняется: модели чувствительны к регистру, и "ИДИОТ" с "идиот"
+    могут получить разные предсказания.
+    """
+    normalized = (pd.Series(texts, dtype=object).astype(str)
+                  .str.replace(r"\s+", " ", regex=True)
+                  .str.strip())
+    return normalized.tolist()
+
+
+def text_hashes(texts) -> list:
+    """Хэши нормализованных текстов (различия в пробельных символах не учитываются)"""
+    return [hashlib.sha1(text.encode("utf-8")).hexdigest() for text in normalize_texts(texts)]
+
+
+def model_version(*paths: str) -> str:
+    """Версия набора моделей: хэш путей, размеров и времени изменения файлов весов.
+
+    При замене любого файла модели версия меняется, и старые записи кэша перестают использоваться.
+    """
+    digest = hashlib.sha1(f"cache-key:{CACHE_KEY_VERSION}".encode("utf-8"))
+    for path in paths:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        if os.path.exists(path):
+            stat = os.stat(path)
+            digest.update(f"{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return digest.hexdigest()[:16]
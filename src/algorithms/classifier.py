@@ -0,0 +1,637 @@
+import gc
+import logging
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+import torch
+from torch.cuda.amp import autocast
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
+
+from algorithms.batching import make_length_batches, collate_batch
+from algorithms.cache import model_version, text_hashes
+from algorithms.dedup import Deduplicator
+from algorithms.multihead import MultiHeadClassifier, load_multihead_model
+from algorithms.onnx_backend import OnnxModel, onnx_path
+from algorithms.preprocessing import PREPROCESSING_VERSION, clean_texts
+from algorithms.quantization import load_quantized_model, quantize_model, quantized_path
+from algorithms.rules import RULES, apply_rules, no_hate_without_insult
+from algorithms.safetensors_io import empty_parameters, load_safetensors_model, safetensors_path
+from algorithms.tokenization import TokenizationStage
+from db.models import (
+    bulk_create_comments,
+    cache_predictions,
+    evict_prediction_cache,
+    get_cached_predictions,
+)
+
+# Ядро классификации без зависимости от Streamlit: используется и веб-интерфейсом
+# (algorithms/tone.py), и консольным запуском (cli.py)
+
+logger = logging.getLogger(__name__)
+
+MODEL_CHECKPOINT = "DeepPavlov/rubert-base-cased"
+# Получаем путь к корню проекта и строим путь к моделям
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(os.path.dirname(current_dir))  # Поднимаемся на два уровня вверх
+MODEL_TONE_PATH = os.path.join(project_root, "models", "model_tone.pth")
+MODEL_CLASS_PATH = os.path.join(project_root, "models", "model_class.pth")
+# Объединенный чекпоинт с общим энкодером (см. algorithms/multihead.py)
+MODEL_MULTIHEAD_PATH = os.path.join(project_root, "models", "model_multihead.pth")
+# Для каждого чекпоинта *.pth может лежать самодостаточный *.safetensors (cli.py convert-safetensors):
+# если он есть, модель загружается из него
+
+# Маппинг для тональностей
+TONE_MAPPING = {
+    0: "Оскорбление",
+    1: "Нейтральное",
+    2: "Позитивное"
+}
+
+# Маппинг для категорий ненависти
+HATE_MAPPING = {
+    0: "Отсутствие оскарбления",
+    1: "Ксенофобия",
+    2: "Гомофобия",
+    3: "Cексизм",
+    4: "Лукизм",
+    5: "Другое"
+}
+
+# Проверка доступности CUDA и настройка устройства
+if torch.cuda.is_available():
+    DEVICE = torch.device("cuda")
+    # Получаем информацию о GPU
+    GPU_NAME = torch.cuda.get_device_name(0)
+    GPU_MEMORY = torch.cuda.get_device_properties(0).total_memory / 1024**3  # в GB
+
+    # Оптимизация для GPU
+    torch.backends.cudnn.benchmark = True
+    torch.backends.cudnn.deterministic = False
+
+    # Настройка бюджета токенов на батч в зависимости от памяти GPU
+    if GPU_MEMORY >= 8:
+        TOKEN_BUDGET = 8192
+    elif GPU_MEMORY >= 4:
+        TOKEN_BUDGET = 4096
+    else:
+        TOKEN_BUDGET = 2048
+else:
+    DEVICE = torch.device("cpu")
+    GPU_NAME = None
+    GPU_MEMORY = 0.0
+    TOKEN_BUDGET = 2048
+
+# Максимальное количество текстов в батче (для коротких комментариев)
+MAX_BATCH_SIZE = 128
+# Максимальная длина текста в токенах
+MAX_LENGTH = 512
+# Размер окна потоковой обработки (строк)
+CHUNK_SIZE = 2048
+
+# Кэш предсказаний по хэшу нормализованного текста
+USE_PREDICTION_CACHE = True
+PREDICTION_CACHE_MAX_ENTRIES = 1_000_000
+
+# Очистка текстов перед токенизацией: разметка, ссылки, упоминания, повторы символов
+# и эмодзи (algorithms/preprocessing.py). В базу сохраняется исходный текст
+USE_TEXT_CLEANING = True
+
+# Схлопывание точных повторов в потоке (algorithms/dedup.py)
+USE_DEDUP = True
+# Схлопывание близких дубликатов (MinHash): похожие тексты могут различаться смыслом, поэтому выключено
+USE_NEAR_DEDUP = False
+
+# Включение mixed precision для ускорения
+USE_AMP = torch.cuda.is_available()
+
+# Каскад для отдельных моделей: классификатор ненависти запускается только на текстах,
+# которые модель тональности отнесла к оскорблениям (для остальных правило
+# no_hate_without_insult все равно обнуляет категорию). Многоголовая модель
+# считает обе головы за один проход энкодера, к ней каскад не применяется
+CASCADE_HATE_MODEL = True
+# Тональность «Оскорбление» - единственная, для которой нужна категория ненависти
+INSULT_TONE = 0
+
+# Бэкенд инференса:
+#   torch - исходные модели (fp16 на GPU, fp32 на CPU)
+#   int8  - динамическая INT8-квантизация Linear-слоев, только CPU
+#   onnx  - ONNX Runtime на CPU (модели экспортируются командой cli.py export-onnx)
+# Выбирается переменной окружения SAFE_WEB_SPACE_BACKEND, настройкой inference_backend
+# в secrets.toml (веб-интерфейс) или флагом --backend (cli.py)
+INFERENCE_BACKENDS = ("torch", "int8", "onnx")
+INFERENCE_BACKEND = os.environ.get("SAFE_WEB_SPACE_BACKEND", "torch")
+
+# Количество процессов инференса на CPU (см. algorithms/pool.py); 1 - инференс в текущем процессе.
+# Переменная окружения SAFE_WEB_SPACE_WORKERS, настройка inference_workers или флаг --workers
+INFERENCE_WORKERS = int(os.environ.get("SAFE_WEB_SPACE_WORKERS", "1"))
+
+
+@dataclass
+class ModelBundle:
+    """Загруженные токенизатор и модели.
+
+    Если есть объединенный чекпоинт, используется model_multihead,
+    иначе две отдельные модели model_tone и model_class.
+    Для бэкенда onnx вместо PyTorch-моделей хранятся OnnxModel с тем же интерфейсом вызова.
+    """
+    tokenizer: Any
+    model_tone: Optional[torch.nn.Module] = None
+    model_class: Optional[torch.nn.Module] = None
+    model_multihead: Optional[MultiHeadClassifier] = None
+    version: str = ""
+    device: torch.device = DEVICE
+    backend: str = "torch"
+
+    @property
+    def cascade(self) -> bool:
+        """Запускается ли классификатор ненависти только на оскорблениях (см. CASCADE_HATE_MODEL)"""
+        # Без правила no_hate_without_insult категории неоскорбительных текстов были бы значимы
+        return CASCADE_HATE_MODEL and self.model_multihead is None and no_hate_without_insult in RULES
+
+    def run_tone(self, batch_data):
+        """Логиты тональности для батча (первый этап каскада)"""
+        return self.model_tone(**batch_data).logits
+
+    def run_class(self, batch_data):
+        """Логиты категорий ненависти для батча (второй этап каскада)"""
+        return self.model_class(**batch_data).logits
+
+    def run(self, batch_data):
+        """Возвращает логиты тональности и категорий ненависти для батча"""
+        if self.model_multihead is not None:
+            return self.model_multihead(batch_data['input_ids'], batch_data['attention_mask'])
+
+        logits_tone = self.model_tone(**batch_data).logits
+        logits_class = self.model_class(**batch_data).logits
+        return logits_tone, logits_class
+
+    def infer_texts(self, texts, on_batch=None):
+        """См. infer_texts; тот же метод есть у InferencePool (algorithms/pool.py)"""
+        return infer_texts(texts, self, on_batch=on_batch)
+
+
+@lru_cache(maxsize=None)
+def load_tokenizer():
+    # Только быстрый (Rust) токенизатор: медленный Python-вариант в разы медленнее на больших загрузках
+    return AutoTokenizer.from_pretrained(MODEL_CHECKPOINT, use_fast=True)
+
+
+@lru_cache(maxsize=None)
+def load_tokenization_stage():
+    """Этап токенизации с LRU-кэшем id токенов (один на процесс)"""
+    return TokenizationStage(load_tokenizer(), max_length=MAX_LENGTH)
+
+
+def backend_device(backend):
+    """Устройство, на котором работает бэкенд (int8 и onnx - только CPU)"""
+    return torch.device("cpu") if backend in ("int8", "onnx") else DEVICE
+
+
+def _prepare_model(model, backend="torch"):
+    if backend == "int8":
+        return quantize_model(model)
+
+    model.to(DEVICE)
+
+    # Оптимизация для GPU
+    if DEVICE.type == "cuda":
+        model = model.half()  # Использование float16 для экономии памяти
+
+    model.eval()
+    return model
+
+
+def checkpoint_file(path):
+    """Файл, из которого будет загружен чекпоинт: safetensors-артефакт, если он есть, иначе .pth"""
+    return safetensors_path(path) if os.path.exists(safetensors_path(path)) else path
+
+
+def has_checkpoint(path):
+    return os.path.exists(checkpoint_file(path))
+
+
+def _load_sequence_classifier(path, num_labels, backend):
+    if backend == "int8" and os.path.exists(quantized_path(path)):
+        # Заранее квантизованный артефакт: fp32-веса не загружаются вовсе
+        config = AutoConfig.from_pretrained(MODEL_CHECKPOINT, num_labels=num_labels)
+        return load_quantized_model(AutoModelForSequenceClassification.from_config(config), quantized_path(path))
+
+    if os.path.exists(safetensors_path(path)):
+        # Конфиг хранится в самом файле, веса отображаются в память без копирования
+        return _prepare_model(load_safetensors_model(safetensors_path(path)), backend)
+
+    # Архитектура строится по конфигу: предобученные веса rubert-base-cased не нужны,
+    # все параметры приходят из fine-tuned чекпоинта (поэтому и не инициализируются)
+    config = AutoConfig.from_pretrained(MODEL_CHECKPOINT, num_labels=num_labels)
+    with empty_parameters():
+        model = AutoModelForSequenceClassification.from_config(config)
+    # Веса отображаются в память (mmap) и не копируются: на CPU процессы пула
+    # используют одни и те же страницы файла через кэш ОС
+    model.load_state_dict(torch.load(path, map_location="cpu", mmap=True), assign=True)
+    return _prepare_model(model, backend)
+
+
+@lru_cache(maxsize=None)
+def load_model_tone(backend="torch"):
+    return _load_sequence_classifier(MODEL_TONE_PATH, 3, backend)
+
+
+@lru_cache(maxsize=None)
+def load_model_class(backend="torch"):
+    return _load_sequence_classifier(MODEL_CLASS_PATH, 6, backend)
+
+
+@lru_cache(maxsize=None)
+def load_model_multihead(backend="torch"):
+    if backend == "int8" and os.path.exists(quantized_path(MODEL_MULTIHEAD_PATH)):
+        config = AutoConfig.from_pretrained(MODEL_CHECKPOINT)
+        return load_quantized_model(MultiHeadClassifier(config), quantized_path(MODEL_MULTIHEAD_PATH))
+
+    if os.path.exists(safetensors_path(MODEL_MULTIHEAD_PATH)):
+        return _prepare_model(load_safetensors_model(safetensors_path(MODEL_MULTIHEAD_PATH)), backend)
+
+    config = AutoConfig.from_pretrained(MODEL_CHECKPOINT)
+    return _prepare_model(load_multihead_model(MODEL_MULTIHEAD_PATH, config, backend_device(backend)), backend)
+
+
+def models_version(backend=None):
+    """Версия набора моделей бэкенда (ключ кэша предсказаний) без загрузки самих моделей"""
+    backend = backend or INFERENCE_BACKEND
+    if backend == "onnx":
+        multihead_path = onnx_path(MODEL_MULTIHEAD_PATH)
+        if os.path.exists(multihead_path):
+            return f"{model_version(multihead_path)}-onnx"
+        return f"{model_version(onnx_path(MODEL_TONE_PATH), onnx_path(MODEL_CLASS_PATH))}-onnx"
+
+    if has_checkpoint(MODEL_MULTIHEAD_PATH):
+        paths = [MODEL_MULTIHEAD_PATH]
+    else:
+        paths = [MODEL_TONE_PATH, MODEL_CLASS_PATH]
+
+    files = [checkpoint_file(path) for path in paths]
+    if backend == "int8":
+        # Квантизация немного меняет предсказания, поэтому кэш у бэкендов раздельный
+        return f"{model_version(*files, *[quantized_path(path) for path in paths])}-int8"
+    return model_version(*files)
+
+
+def prediction_version(models):
+    """Версия предсказаний (ключ кэша и model_version комментариев): версия моделей и правил очистки"""
+    if USE_TEXT_CLEANING:
+        return f"{models.version}-clean{PREPROCESSING_VERSION}"
+    return models.version
+
+
+@lru_cache(maxsize=None)
+def load_models(backend=None) -> ModelBundle:
+    """Загружает токенизатор и модели (один раз на процесс и бэкенд).
+
+    backend - один из INFERENCE_BACKENDS, по умолчанию INFERENCE_BACKEND.
+    """
+    backend = backend or INFERENCE_BACKEND
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Неизвестный бэкенд инференса: {backend}. Доступны: {', '.join(INFERENCE_BACKENDS)}")
+    if backend != "torch" and torch.cuda.is_available():
+        logger.warning(f"Бэкенд {backend} работает только на CPU, GPU использоваться не будет")
+
+    tokenizer = load_tokenizer()
+    if backend == "onnx":
+        return _load_onnx_models(tokenizer)
+
+    if has_checkpoint(MODEL_MULTIHEAD_PATH):
+        # Один проход энкодера на батч для обеих задач
+        return ModelBundle(
+            tokenizer=tokenizer,
+            model_multihead=load_model_multihead(backend),
+            version=models_version(backend),
+            device=backend_device(backend),
+            backend=backend
+        )
+
+    # Объединенного чекпоинта нет - используем две отдельные модели
+    return ModelBundle(
+        tokenizer=tokenizer,
+        model_tone=load_model_tone(backend),
+        model_class=load_model_class(backend),
+        version=models_version(backend),
+        device=backend_device(backend),
+        backend=backend
+    )
+
+
+def _load_onnx_models(tokenizer) -> ModelBundle:
+    """Загружает экспортированные ONNX-модели (многоголовую, если она есть)"""
+    multihead_path = onnx_path(MODEL_MULTIHEAD_PATH)
+    if os.path.exists(multihead_path):
+        return ModelBundle(
+            tokenizer=tokenizer,
+            model_multihead=OnnxModel(multihead_path, num_threads=torch.get_num_threads()),
+            version=models_version("onnx"),
+            device=torch.device("cpu"),
+            backend="onnx"
+        )
+
+    paths = [onnx_path(MODEL_TONE_PATH), onnx_path(MODEL_CLASS_PATH)]
+    missing = [path for path in paths if not os.path.exists(path)]
+    if missing:
+        raise FileNotFoundError(f"Не найдены ONNX-модели: {', '.join(missing)}. "
+                                f"Экспортируйте их командой: python src/cli.py export-onnx")
+
+    return ModelBundle(
+        tokenizer=tokenizer,
+        model_tone=OnnxModel(paths[0], num_threads=torch.get_num_threads()),
+        model_class=OnnxModel(paths[1], num_threads=torch.get_num_threads()),
+        version=models_version("onnx"),
+        device=torch.device("cpu"),
+        backend="onnx"
+    )
+
+
+def clear_gpu_memory():
+    """Очистка памяти GPU"""
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+        gc.collect()
+
+
+def iter_chunks(data, chunk_size=None):
+    """Разбивает DataFrame на окна фиксированного размера"""
+    chunk_size = chunk_size or CHUNK_SIZE
+    for start in range(0, len(data), chunk_size):
+        yield data.iloc[start:start + chunk_size]
+
+
+def _iter_batches(input_ids, positions, models):
+    """Группирует тексты positions в батчи близкой длины.
+
+    Возвращает пары (позиции текстов батча, батч на устройстве моделей).
+    """
+    # Группируем тексты близкой длины в батчи
+    batches = make_length_batches(
+        [len(input_ids[i]) for i in positions],
+        token_budget=TOKEN_BUDGET,
+        max_batch_size=MAX_BATCH_SIZE
+    )
+    on_gpu = models.device.type == "cuda"
+
+    for batch in batches:
+        indices = positions[batch]
+        # Создание батча
+        batch_data = collate_batch(input_ids, indices, models.tokenizer.pad_token_id)
+
+        # Перемещение данных на GPU
+        if on_gpu:
+            batch_data = {k: v.to(models.device, non_blocking=True) for k, v in batch_data.items()}
+
+        yield indices, batch_data
+
+        # Очистка памяти после каждого батча
+        if on_gpu:
+            torch.cuda.empty_cache()
+
+
+def infer_texts(texts, models, on_batch=None):
+    """Возвращает массивы предсказаний тональности и категорий ненависти (без правил согласования).
+
+    В режиме каскада (models.cascade) категория вычисляется только для оскорблений,
+    для остальных текстов она равна 0 - после правил согласования результат тот же.
+    on_batch вызывается после каждого батча с количеством текстов, обработанных полностью.
+    """
+    # Токенизация без паддинга: каждый батч дополняется только до своей максимальной длины.
+    # Уже встречавшиеся тексты берутся из кэша id токенов
+    input_ids = load_tokenization_stage()(texts)
+    positions = np.arange(len(texts))
+
+    # Предсказания записываются по исходным позициям строк, поэтому порядок сохраняется
+    predictions_tone = np.zeros(len(texts), dtype=np.int64)
+    predictions_class = np.zeros(len(texts), dtype=np.int64)
+
+    cascade = getattr(models, "cascade", False)
+
+    # Использование autocast для mixed precision
+    with torch.no_grad():
+        with autocast(enabled=USE_AMP and models.device.type == "cuda"):
+            if not cascade:
+                for indices, batch_data in _iter_batches(input_ids, positions, models):
+                    # Предсказание тональности и класса
+                    logits_tone, logits_class = models.run(batch_data)
+                    predictions_tone[indices] = torch.argmax(logits_tone, dim=-1).cpu().numpy()
+                    predictions_class[indices] = torch.argmax(logits_class, dim=-1).cpu().numpy()
+
+                    if on_batch is not None:
+                        on_batch(len(indices))
+                return predictions_tone, predictions_class
+
+            # Первый этап: тональность всех текстов
+            for indices, batch_data in _iter_batches(input_ids, positions, models):
+                tone = torch.argmax(models.run_tone(batch_data), dim=-1).cpu().numpy()
+                predictions_tone[indices] = tone
+
+                # Тексты без оскорбления обработаны полностью
+                if on_batch is not None:
+                    on_batch(int(np.count_nonzero(tone != INSULT_TONE)))
+
+            # Второй этап: категория только для оскорблений, батчи собираются заново
+            insults = np.flatnonzero(predictions_tone == INSULT_TONE)
+            for indices, batch_data in _iter_batches(input_ids, insults, models):
+                predictions_class[indices] = torch.argmax(models.run_class(batch_data), dim=-1).cpu().numpy()
+
+                if on_batch is not None:
+                    on_batch(len(indices))
+
+    return predictions_tone, predictions_class
+
+
+def predict_chunk(chunk, models, on_batch=None, cache_stats=None, dedup=None):
+    """Классифицирует одно окно данных и возвращает его копию с предсказаниями.
+
+    Тексты, найденные в кэше предсказаний, не токенизируются и не проходят через модели.
+    С dedup (algorithms/dedup.py) классифицируется один представитель каждого кластера
+    повторов, остальные тексты получают его метки, номер кластера - в колонке cluster_id.
+    on_batch вызывается после каждого батча с количеством обработанных строк.
+    """
+    # Удаляем пустые строки
+    df_tone = chunk.dropna(subset=['sentence'])
+    df_tone = df_tone[df_tone['sentence'].astype(str).str.strip() != ''].copy()
+
+    if df_tone.empty:
+        return df_tone
+
+    texts = df_tone["sentence"].astype(str).tolist()
+    predictions_tone = np.zeros(len(texts), dtype=np.int64)
+    predictions_class = np.zeros(len(texts), dtype=np.int64)
+    # Строки, которые нужно классифицировать (кэшем или моделями)
+    candidates = np.arange(len(texts))
+
+    if USE_PREDICTION_CACHE or dedup is not None:
+        hashes = text_hashes(texts)
+
+    if dedup is not None:
+        clusters = dedup.assign(texts, hashes)
+        cluster_ids, first_positions, inverse = np.unique(clusters, return_index=True, return_inverse=True)
+        # Кластеры, представитель которых классифицирован в предыдущих окнах
+        labeled = np.fromiter((cluster in dedup.labels for cluster in cluster_ids.tolist()),
+                              dtype=bool, count=len(cluster_ids))
+        for position, cluster in zip(first_positions[labeled], cluster_ids[labeled].tolist()):
+            predictions_tone[position], predictions_class[position] = dedup.labels[cluster]
+        candidates = first_positions[~labeled]
+
+        if on_batch is not None:
+            on_batch(len(texts) - len(candidates))
+
+    positions_to_infer = candidates
+
+    version = prediction_version(models)
+
+    if USE_PREDICTION_CACHE and len(candidates):
+        cached = get_cached_predictions([hashes[i] for i in candidates], version)
+
+        hit_mask = np.fromiter((hashes[i] in cached for i in candidates), dtype=bool, count=len(candidates))
+        for position in candidates[hit_mask]:
+            tone_id, hate_id = cached[hashes[position]]
+            predictions_tone[position] = tone_id - 1
+            predictions_class[position] = hate_id - 1
+        positions_to_infer = candidates[~hit_mask]
+
+        if cache_stats is not None:
+            cache_stats.hits += int(hit_mask.sum())
+            cache_stats.misses += len(positions_to_infer)
+        if on_batch is not None:
+            on_batch(int(hit_mask.sum()))
+
+    if len(positions_to_infer):
+        model_texts = [texts[i] for i in positions_to_infer]
+        if USE_TEXT_CLEANING:
+            model_texts = clean_texts(model_texts)
+        inferred_tone, inferred_class = models.infer_texts(model_texts, on_batch=on_batch)
+        predictions_tone[positions_to_infer] = inferred_tone
+        predictions_class[positions_to_infer] = inferred_class
+
+    # Изменение предсказаний класса на основе предсказаний тона
+    predictions_tone, predictions_class = apply_rules(predictions_tone, predictions_class)
+
+    if USE_PREDICTION_CACHE and len(positions_to_infer):
+        cache_predictions(
+            [(hashes[i], int(predictions_tone[i]) + 1, int(predictions_class[i]) + 1) for i in positions_to_infer],
+            version
+        )
+
+    if dedup is not None:
+        # Метки новых кластеров запоминаются для следующих окон, затем копируются всем строкам кластера
+        for position, cluster in zip(candidates, cluster_ids[~labeled].tolist()):
+            if cluster in dedup.keys:
+                dedup.labels[cluster] = (int(predictions_tone[position]), int(predictions_class[position]))
+        predictions_tone = predictions_tone[first_positions][inverse]
+        predictions_class = predictions_class[first_positions][inverse]
+        df_tone["cluster_id"] = clusters
+
+    # Сохранение предсказаний
+    df_tone["tone_prediction"] = predictions_tone
+    df_tone["class_prediction"] = predictions_class
+
+    # Добавляем колонки с наименованиями
+    df_tone["tone_name"] = df_tone["tone_prediction"].map(TONE_MAPPING)
+    df_tone["hate_name"] = df_tone["class_prediction"].map(HATE_MAPPING)
+
+    return df_tone
+
+
+def _optional_column(df, column):
+    """Значения колонки списком (None вместо пропусков) или список None, если колонки нет"""
+    if column not in df.columns:
+        return [None] * len(df)
+    return [None if pd.isna(value) else str(value) for value in df[column].tolist()]
+
+
+def save_predictions(df_tone, version=None, dedup=None):
+    """Сохраняет предсказания окна в базу данных и записывает id комментариев в колонку comment_id.
+
+    Необязательные колонки source и external_id (парсеры источников) сохраняются вместе с текстом;
+    повторно загруженные комментарии источника не дублируются. С dedup у каждого комментария
+    сохраняется cluster_hash - хэш текста представителя его кластера повторов.
+    """
+    hashes = text_hashes(df_tone["sentence"])
+    if dedup is not None and "cluster_id" in df_tone.columns:
+        cluster_hashes = [dedup.keys.get(cluster, text_hash)
+                          for cluster, text_hash in zip(df_tone["cluster_id"].tolist(), hashes)]
+    else:
+        cluster_hashes = [None] * len(hashes)
+
+    rows = [
+        {"text": text, "tone_id": tone + 1, "hate_id": hate + 1, "source": source,
+         "external_id": external_id, "model_version": version, "text_hash": text_hash,
+         "cluster_hash": cluster_hash}
+        for text, tone, hate, source, external_id, text_hash, cluster_hash in zip(
+            df_tone["sentence"].astype(str).tolist(),
+            df_tone["tone_prediction"].tolist(),
+            df_tone["class_prediction"].tolist(),
+            _optional_column(df_tone, "source"),
+            _optional_column(df_tone, "external_id"),
+            hashes,
+            cluster_hashes
+        )
+    ]
+    df_tone["comment_id"] = bulk_create_comments(rows)
+
+
+def predict_stream(chunks, models=None, total_rows=None, cache_stats=None,
+                   on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+                   on_warning: Optional[Callable[[str], None]] = None, persist=True, dedup=None):
+    """Потоковый анализ окнами фиксированного размера.
+
+    models - ModelBundle (load_models) или InferencePool (algorithms/pool.py).
+
+    Для каждого окна: токенизация -> инференс -> запись в БД -> yield результата.
+    В памяти одновременно находится только одно окно, поэтому потребление памяти
+    не зависит от размера входных данных. on_progress(processed, total_rows)
+    вызывается после каждого батча, в cache_stats (CacheStats) накапливаются
+    счетчики кэша предсказаний. При persist=False результаты не пишутся в БД.
+    dedup - Deduplicator для схлопывания повторов (по умолчанию создается при USE_DEDUP),
+    его stats содержит размеры кластеров для подсчета реальных объемов.
+    """
+    models = models or load_models()
+    if dedup is None and USE_DEDUP:
+        dedup = Deduplicator(near_duplicates=USE_NEAR_DEDUP)
+    on_warning = on_warning or logger.warning
+    processed = 0
+
+    def update_progress(rows):
+        nonlocal processed
+        processed += rows
+        if on_progress is not None:
+            on_progress(processed, total_rows)
+
+    for chunk in chunks:
+        # Проверяем наличие колонки sentence
+        if 'sentence' not in chunk.columns:
+            raise ValueError("В данных отсутствует колонка 'sentence'")
+
+        df_tone = predict_chunk(chunk, models, on_batch=update_progress, cache_stats=cache_stats,
+                                dedup=dedup)
+
+        # Пустые строки тоже учитываем в прогрессе
+        update_progress(len(chunk) - len(df_tone))
+
+        if df_tone.empty:
+            continue
+
+        if persist:
+            try:
+                save_predictions(df_tone, prediction_version(models), dedup)
+            except Exception as e:
+                on_warning(f"Предупреждение: не удалось сохранить в базу данных: {e}")
+
+        # Очистка памяти GPU
+        clear_gpu_memory()
+
+        yield df_tone
+
+    # Ограничиваем размер кэша предсказаний
+    if USE_PREDICTION_CACHE:
+        evicted = evict_prediction_cache(PREDICTION_CACHE_MAX_ENTRIES)
+        if cache_stats is not None:
+            cache_stats.evicted += evicted
@@ -0,0 +1,151 @@
+import zlib
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from algorithms.cache import normalize_texts
+
+# Схлопывание повторов перед инференсом: тексты потока объединяются в кластеры
+# (точные повторы после нормализации и, по выбору, близкие дубликаты по MinHash), модели
+# классифицируют один представитель кластера, а его метки копируются остальным.
+# Состояние хранится на весь поток, поэтому повторы из разных окон тоже схлопываются.
+# Близкие дубликаты по умолчанию не объединяются: тексты, похожие по символам, могут
+# различаться смыслом («видео ужасно» и «видео не ужасно»), и метка одного исказила бы другой.
+
+# Близкие дубликаты: MinHash по символьным 4-граммам нормализованного текста.
+# SimHash на коротких комментариях слишком груб: замена одной буквы меняет сигнатуру
+# почти так же сильно, как различие несвязанных текстов
+SHINGLE_SIZE = 4
+MINHASH_PERMUTATIONS = 64
+# LSH: сигнатура делится на полосы, кандидаты - тексты с хотя бы одной совпавшей полосой
+MINHASH_BANDS = 16
+# Минимальная оценка сходства Жаккара 4-грамм, при которой тексты считаются дубликатами
+NEAR_DUPLICATE_THRESHOLD = 0.7
+# Короткие тексты сравниваются только точно: замена одного слова меняет их смысл
+NEAR_DUPLICATE_MIN_LENGTH = 40
+# Сколько кластеров запоминается для поиска повторов в следующих текстах потока
+# (ограничивает память на очень больших потоках из уникальных текстов)
+MAX_INDEXED_CLUSTERS = 200_000
+
+# Хэш-функции (a * x + b) mod p: при x, a, b < p = 2^31 - 1 вычисления не переполняют uint64
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_rng = np.random.default_rng(20240901)
+_MINHASH_A = _rng.integers(1, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_MINHASH_B = _rng.integers(0, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+
+def minhash(text: str) -> np.ndarray:
+    """Сигнатура MinHash: доля совпавших позиций оценивает сходство Жаккара множеств 4-грамм"""
+    shingles = {text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    hashes = np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles),
+                         dtype=np.uint64, count=len(shingles)) % _MERSENNE_PRIME
+    permuted = (hashes[:, None] * _MINHASH_A + _MINHASH_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0).astype(np.uint32)
+
+
+@dataclass
+class DedupStats:
+    """Счетчики схлопывания повторов за один запуск анализа"""
+    rows: int = 0
+    exact: int = 0
+    near: int = 0
+    # Размер каждого кластера: {cluster_id: количество текстов}
+    sizes: Counter = field(default_factory=Counter)
+
+    @property
+    def clusters(self) -> int:
+        return len(self.sizes)
+
+    @property
+    def duplicate_rate(self) -> float:
+        return (self.exact + self.near) / self.rows if self.rows else 0.0
+
+
+class Deduplicator:
+    """Назначает текстам потока номера кластеров и хранит метки классифицированных кластеров.
+
+    По умолчанию схлопываются только точные повторы; near_duplicates=True добавляет близкие
+    дубликаты. Кандидаты в них ищутся по словарям полос сигнатуры MinHash (LSH),
+    а не перебором, и подтверждаются оценкой сходства по всей сигнатуре.
+    """
+
+    def __init__(self, near_duplicates: bool = False, threshold: float = NEAR_DUPLICATE_THRESHOLD,
+                 min_length: int = NEAR_DUPLICATE_MIN_LENGTH,
+                 max_indexed: int = MAX_INDEXED_CLUSTERS):
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self.min_length = min_length
+        self.max_indexed = max_indexed
+        self.stats = DedupStats()
+        # Метки классифицированных представителей: {cluster_id: (tone, hate)}
+        self.labels: Dict[int, Tuple[int, int]] = {}
+        # Хэш текста представителя: {cluster_id: text_hash}
+        self.keys: Dict[int, str] = {}
+
+        self._exact: Dict[str, int] = {}
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._band_width = MINHASH_PERMUTATIONS // MINHASH_BANDS
+        self._bands: List[Dict[bytes, List[int]]] = [{} for _ in range(MINHASH_BANDS)]
+        self._next_cluster = 0
+
+    def _band_keys(self, signature: np.ndarray):
+        return [signature[band * self._band_width:(band + 1) * self._band_width].tobytes()
+                for band in range(MINHASH_BANDS)]
+
+    def _find_near(self, signature: np.ndarray) -> Optional[int]:
+        checked = set()
+        for band, key in zip(self._bands, self._band_keys(signature)):
+            for cluster in band.get(key, ()):
+                if cluster in checked:
+                    continue
+                checked.add(cluster)
+                if np.mean(self._signatures[cluster] == signature) >= self.threshold:
+                    return cluster
+        return None
+
+    def _new_cluster(self, text_hash: str, signature: Optional[np.ndarray]) -> int:
+        cluster = self._next_cluster
+        self._next_cluster += 1
+        if len(self.keys) >= self.max_indexed:
+            # Кластер не запоминается: следующие повторы образуют новый кластер
+            return cluster
+
+        self.keys[cluster] = text_hash
+        self._exact[text_hash] = cluster
+        if signature is not None:
+            self._signatures[cluster] = signature
+            for band, key in zip(self._bands, self._band_keys(signature)):
+                band.setdefault(key, []).append(cluster)
+        return cluster
+
+    def assign(self, texts: List[str], text_hashes: List[str]) -> np.ndarray:
+        """Возвращает номер кластера для каждого текста (новые кластеры получают новые номера).
+
+        text_hashes - хэши нормализованных текстов (cache.text_hashes), по ним ищутся точные повторы.
+        """
+        clusters = np.empty(len(texts), dtype=np.int64)
+        normalized = normalize_texts(texts)
+
+        for position, (text, text_hash) in enumerate(zip(normalized, text_hashes)):
+            cluster = self._exact.get(text_hash)
+            if cluster is not None:
+                self.stats.exact += 1
+            else:
+                signature = minhash(text) if self.near_duplicates and len(text) >= self.min_length else None
+                if signature is not None:
+                    cluster = self._find_near(signature)
+                if cluster is not None:
+                    self.stats.near += 1
+                    if len(self._exact) < self.max_indexed * 4:
+                        # Точный повтор этого варианта найдется без сравнения сигнатур
+                        self._exact[text_hash] = cluster
+                else:
+                    cluster = self._new_cluster(text_hash, signature)
+
+            clusters[position] = cluster
+            self.stats.sizes[cluster] += 1
+
+        self.stats.rows += len(texts)
+        return clusters
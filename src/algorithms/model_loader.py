@@ -0,0 +1,165 @@
+import json
+import logging
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, Optional
+
+# Фоновая загрузка моделей при запуске приложения. Модуль не импортирует torch/transformers
+# на верхнем уровне, поэтому main.py запускает загрузку без задержки первой отрисовки,
+# а страницы опрашивают готовность через status().
+
+logger = logging.getLogger(__name__)
+
+# Журнал времени запуска (по строке JSON на каждую загрузку) для отслеживания регрессий
+STARTUP_LOG_PATH = "model_startup.jsonl"
+
+
+@dataclass
+class LoaderStatus:
+    """Состояние загрузки моделей: idle -> loading -> ready | error"""
+    state: str = "idle"
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    seconds: Optional[float] = None
+    # Длительность этапов загрузки в секундах: import, tokenizer, models
+    stages: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def elapsed(self) -> float:
+        """Сколько секунд идет (или шла) загрузка"""
+        if self.seconds is not None:
+            return self.seconds
+        return time.monotonic() - self.started_at if self.started_at is not None else 0.0
+
+
+class ModelLoader:
+    """Загружает модели в фоновом потоке (один раз на процесс).
+
+    backend и workers - как в classifier.load_models/pool.create_inference
+    (None - значения по умолчанию из переменных окружения).
+    """
+
+    def __init__(self, backend=None, workers=None):
+        self.backend = backend
+        self.workers = workers
+        self._status = LoaderStatus()
+        self._models = None
+        self._exception = None
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def start(self) -> "ModelLoader":
+        """Запускает загрузку, если она еще не идет; после ошибки - повторяет попытку"""
+        with self._lock:
+            if self._status.state in ("loading", "ready"):
+                return self
+            self._status = LoaderStatus(state="loading", started_at=time.monotonic())
+            self._exception = None
+            self._done.clear()
+
+        threading.Thread(target=self._run, name="model-loader", daemon=True).start()
+        return self
+
+    def _stage(self, name, started):
+        with self._lock:
+            self._status.stages[name] = round(time.monotonic() - started, 3)
+        return time.monotonic()
+
+    def _run(self):
+        started = time.monotonic()
+        try:
+            stage_started = started
+            from algorithms import classifier
+            from algorithms.pool import InferencePool, create_inference
+            stage_started = self._stage("import", stage_started)
+
+            classifier.load_tokenization_stage()
+            stage_started = self._stage("tokenizer", stage_started)
+
+            models = create_inference(self.backend, self.workers)
+            if isinstance(models, InferencePool):
+                models.warm_up()
+            self._stage("models", stage_started)
+
+            self._models = models
+            with self._lock:
+                self._status.seconds = round(time.monotonic() - started, 3)
+                self._status.state = "ready"
+            logger.info(f"Модели загружены за {self._status.seconds:.1f} с ({self._status.stages})")
+            self._record(classifier, models)
+        except Exception as e:
+            logger.exception(f"Ошибка загрузки моделей: {e}")
+            self._exception = e
+            with self._lock:
+                self._status.seconds = round(time.monotonic() - started, 3)
+                self._status.error = str(e)
+                self._status.state = "error"
+        finally:
+            self._done.set()
+
+    def _record(self, classifier, models):
+        """Дописывает время запуска в STARTUP_LOG_PATH"""
+        record = {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "backend": models.backend,
+            "workers": getattr(models, "num_workers", 1),
+            "device": str(models.device),
+            "gpu": classifier.GPU_NAME,
+            "seconds": self._status.seconds,
+            "stages": self._status.stages,
+        }
+        try:
+            with open(STARTUP_LOG_PATH, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"Не удалось записать время запуска в {STARTUP_LOG_PATH}: {e}")
+
+    @property
+    def ready(self) -> bool:
+        return self._status.state == "ready"
+
+    def status(self) -> LoaderStatus:
+        """Копия текущего состояния (безопасно читать из другого потока)"""
+        with self._lock:
+            return LoaderStatus(**asdict(self._status))
+
+    def wait(self, timeout=None):
+        """Дожидается окончания загрузки и возвращает модели (ModelBundle или InferencePool).
+
+        Если загрузка завершилась ошибкой, пробрасывает ее исключение.
+        """
+        if self._status.state == "idle":
+            self.start()
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"Модели не загрузились за {timeout} с")
+        if self._exception is not None:
+            raise self._exception
+        return self._models
+
+
+_loader: Optional[ModelLoader] = None
+_loader_lock = threading.Lock()
+
+
+def start_model_loading(backend=None, workers=None) -> ModelLoader:
+    """Возвращает загрузчик процесса, запуская загрузку при первом вызове.
+
+    Повторные вызовы (в т.ч. при каждом перезапуске скрипта Streamlit) возвращают тот же загрузчик.
+    """
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = ModelLoader(backend, workers)
+        return _loader.start()
+
+
+def read_startup_history(limit=20):
+    """Последние записи журнала времени запуска (новые в конце)"""
+    try:
+        with open(STARTUP_LOG_PATH, encoding="utf-8") as f:
+            lines = f.readlines()[-limit:]
+    except FileNotFoundError:
+        return []
+    return [json.loads(line) for line in lines if line.strip()]
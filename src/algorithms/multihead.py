@@ -0,0 +1,162 @@
+from typing import Dict, List, Tuple
+
+import torch
+from torch import nn
+from transformers import AutoModel, PretrainedConfig
+
+TONE_NUM_LABELS = 3
+CLASS_NUM_LABELS = 6
+
+
+class MultiHeadClassifier(nn.Module):
+    """Модель с общим энкодером RuBERT и двумя классификационными головами.
+
+    Энкодер выполняется один раз на батч, а pooled-выход подается
+    одновременно в голову тональности (3 класса) и голову категорий ненависти (6 классов).
+    """
+
+    def __init__(self, config: PretrainedConfig):
+        super().__init__()
+        self.config = config
+        self.bert = AutoModel.from_config(config)
+        self.dropout = nn.Dropout(config.hidden_dropout_prob)
+        self.tone_classifier = nn.Linear(config.hidden_size, TONE_NUM_LABELS)
+        self.class_classifier = nn.Linear(config.hidden_size, CLASS_NUM_LABELS)
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> Tuple[torch.Tensor, torch.Tensor]:
+        pooled_output = self.pooled_output(input_ids, attention_mask)
+        return self.tone_classifier(pooled_output), self.class_classifier(pooled_output)
+
+    def pooled_output(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        """Pooled-представление текста из общего энкодера"""
+        outputs = self.bert(input_ids=input_ids, attention_mask=attention_mask)
+        return self.dropout(outputs.pooler_output)
+
+
+def merge_state_dicts(tone_state: Dict[str, torch.Tensor], class_state: Dict[str, torch.Tensor]) -> Dict[str, torch.Tensor]:
+    """Собирает state dict многоголовой модели из двух state dict AutoModelForSequenceClassification.
+
+    Энкодер берется из модели тональности. Голова категорий ненависти копируется
+    из модели классификации, но обучалась она на другом энкодере, поэтому
+    перед использованием ее нужно дообучить через distill_class_head.
+    """
+    merged = {}
+    for key, value in tone_state.items():
+        if key.startswith("bert."):
+            merged[key] = value
+        elif key.startswith("classifier."):
+            merged["tone_" + key] = value
+
+    for key, value in class_state.items():
+        if key.startswith("classifier."):
+            merged["class_" + key] = value
+
+    return merged
+
+
+def distill_class_head(model: MultiHeadClassifier, teacher: nn.Module, batches: List[Dict[str, torch.Tensor]],
+                       epochs: int = 20, lr: float = 1e-3, temperature: float = 2.0, batch_size: int = 256) -> float:
+    """Дообучает голову категорий ненависти на замороженном общем энкодере.
+
+    Учителем выступает исходная модель классификации: голова учится повторять
+    ее распределение по классам (KL-дивергенция со сглаживанием temperature).
+    Возвращает долю совпадения меток с учителем после обучения.
+    """
+    model.eval()
+    teacher.eval()
+
+    # Признаки энкодера и ответы учителя не меняются между эпохами, считаем их один раз
+    features = []
+    teacher_logits = []
+    with torch.no_grad():
+        for batch in batches:
+            features.append(model.pooled_output(batch['input_ids'], batch['attention_mask']).float())
+            teacher_logits.append(teacher(**batch).logits.float())
+
+    features = torch.cat(features)
+    teacher_logits = torch.cat(teacher_logits)
+    teacher_probs = torch.softmax(teacher_logits / temperature, dim=-1)
+
+    head = model.class_classifier
+    head.float()
+    head.train()
+    optimizer = torch.optim.Adam(head.parameters(), lr=lr)
+    loss_fn = nn.KLDivLoss(reduction="batchmean")
+
+    for _ in range(epochs):
+        permutation = torch.randperm(len(features))
+        for start in range(0, len(features), batch_size):
+            indices = permutation[start:start + batch_size]
+            optimizer.zero_grad()
+            student_logits = head(features[indices])
+            loss = loss_fn(torch.log_softmax(student_logits / temperature, dim=-1), teacher_probs[indices])
+            loss.backward()
+            optimizer.step()
+
+    head.eval()
+    with torch.no_grad():
+        agreement = (head(features).argmax(-1) == teacher_logits.argmax(-1)).float().mean().item()
+    return agreement
+
+
+def load_multihead_model(path: str, config: PretrainedConfig, device: torch.device) -> MultiHeadClassifier:
+    """Загружает многоголовую модель из объединенного чекпоинта"""
+    model = MultiHeadClassifier(config)
+    # mmap: веса не копируются в память процесса, а читаются из файла по мере обращения
+    model.load_state_dict(torch.load(path, map_location="cpu", mmap=True), assign=True)
+    model.to(device)
+    model.eval()
+    return model
+
+
+def build_multihead_checkpoint(checkpoint: str, tone_path: str, class_path: str, texts: List[str],
+                               output_path: str, max_length: int = 512, batch_size: int = 16) -> float:
+    """Строит объединенный чекпоинт из двух fine-tuned моделей и сохраняет его в output_path.
+
+    texts - выборка комментариев для дистилляции головы категорий ненависти.
+    Возвращает долю совпадения меток новой головы с исходной моделью классификации.
+    """
+    from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(checkpoint)
+    config = AutoConfig.from_pretrained(checkpoint)
+
+    tone_state = torch.load(tone_path, map_location="cpu")
+    class_state = torch.load(class_path, map_location="cpu")
+
+    model = MultiHeadClassifier(config)
+    model.load_state_dict(merge_state_dicts(tone_state, class_state))
+
+    teacher = AutoModelForSequenceClassification.from_pretrained(checkpoint, num_labels=CLASS_NUM_LABELS)
+    teacher.load_state_dict(class_state)
+
+    batches = []
+    for start in range(0, len(texts), batch_size):
+        encoded = tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                            max_length=max_length, return_tensors="pt")
+        batches.append({'input_ids': encoded['input_ids'], 'attention_mask': encoded['attention_mask']})
+
+    agreement = distill_class_head(model, teacher, batches)
+    torch.save(model.state_dict(), output_path)
+    return agreement
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    import pandas as pd
+
+    models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models")
+
+    parser = argparse.ArgumentParser(description="Сборка многоголовой модели из model_tone.pth и model_class.pth")
+    parser.add_argument("texts", help="CSV с колонкой sentence для дистилляции головы категорий ненависти")
+    parser.add_argument("--checkpoint", default="DeepPavlov/rubert-base-cased")
+    parser.add_argument("--tone", default=os.path.join(models_dir, "model_tone.pth"))
+    parser.add_argument("--classifier", default=os.path.join(models_dir, "model_class.pth"))
+    parser.add_argument("--output", default=os.path.join(models_dir, "model_multihead.pth"))
+    args = parser.parse_args()
+
+    sentences = pd.read_csv(args.texts)["sentence"].dropna().astype(str).tolist()
+    agreement = build_multihead_checkpoint(args.checkpoint, args.tone, args.classifier, sentences, args.output)
+    print(f"Чекпоинт сохранен в {args.output}. Совпадение с моделью классификации: {agreement:.3f}")
@@ -0,0 +1,90 @@
+import os
+from typing import List
+
+import numpy as np
+import torch
+from torch import nn
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+# Экспорт моделей в ONNX и инференс через ONNX Runtime (CPUExecutionProvider).
+# onnxruntime и onnx - необязательные зависимости, нужны только для бэкенда onnx.
+
+ONNX_OPSET = 18
+INPUT_NAMES = ["input_ids", "attention_mask"]
+
+
+class _LogitsOnly(nn.Module):
+    """Обертка AutoModelForSequenceClassification: позиционные входы, на выходе только логиты"""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+def onnx_path(path: str) -> str:
+    """Путь к ONNX-модели рядом с чекпоинтом: models/model_tone.pth -> models/model_tone.onnx"""
+    return f"{os.path.splitext(path)[0]}.onnx"
+
+
+def export_onnx(model: nn.Module, path: str, output_names: List[str], opset: int = ONNX_OPSET) -> str:
+    """Экспортирует модель в ONNX с динамическими осями батча и длины последовательности.
+
+    Для AutoModelForSequenceClassification output_names = ["logits"],
+    для MultiHeadClassifier - ["tone_logits", "class_logits"].
+    """
+    model = model.float().to("cpu").eval()
+    if len(output_names) == 1:
+        model = _LogitsOnly(model)
+
+    # Пример входа с батчем и длиной больше 1, чтобы экспортер не зафиксировал эти оси
+    input_ids = torch.full((2, 8), 100, dtype=torch.long)
+    attention_mask = torch.ones_like(input_ids)
+
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in INPUT_NAMES}
+    dynamic_axes.update({name: {0: "batch"} for name in output_names})
+
+    output_path = onnx_path(path)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (input_ids, attention_mask),
+            output_path,
+            input_names=INPUT_NAMES,
+            output_names=output_names,
+            dynamic_axes=dynamic_axes,
+            opset_version=opset
+        )
+    return output_path
+
+
+class OnnxModel:
+    """Модель ONNX Runtime с тем же интерфейсом вызова, что и PyTorch-модель.
+
+    Модель с одним выходом возвращает SequenceClassifierOutput (как AutoModelForSequenceClassification),
+    с несколькими - кортеж логитов (как MultiHeadClassifier).
+    """
+
+    def __init__(self, path: str, num_threads: int = 0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        # 0 - ONNX Runtime сам выбирает число потоков по количеству ядер
+        options.intra_op_num_threads = num_threads
+
+        self.path = path
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.output_names = [output.name for output in self.session.get_outputs()]
+
+    def __call__(self, input_ids: torch.Tensor, attention_mask: torch.Tensor):
+        outputs = self.session.run(None, {
+            "input_ids": input_ids.cpu().numpy().astype(np.int64),
+            "attention_mask": attention_mask.cpu().numpy().astype(np.int64)
+        })
+        logits = tuple(torch.from_numpy(output) for output in outputs)
+        if len(logits) == 1:
+            return SequenceClassifierOutput(logits=logits[0])
+        return logits
@@ -0,0 +1,153 @@
+import queue
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional
+
+import pandas as pd
+
+# Конвейер «парсер -> классификатор»: парсер работает в фоновом потоке и передает комментарии
+# через ограниченную очередь, а вызывающий поток собирает из них микробатчи для predict_stream.
+# Пока модели обрабатывают один микробатч, парсер загружает следующие комментарии, так что время
+# сети и время инференса перекрываются. Если инференс отстает и очередь заполнена, парсер ждет
+# (обратное давление), и в памяти не накапливается весь результат парсинга.
+
+# Сколько комментариев может ждать классификации; при заполнении очереди парсер приостанавливается
+PIPELINE_QUEUE_SIZE = 4096
+# Размер микробатча: столько комментариев передается в predict_stream за раз
+MICRO_BATCH_SIZE = 256
+# Сколько секунд микробатч ждет заполнения, прежде чем уйти на классификацию неполным
+MICRO_BATCH_WAIT = 1.0
+
+_DONE = object()
+
+
+class PipelineClosed(BaseException):
+    """Потребитель конвейера остановился, дальнейшие комментарии не нужны.
+
+    Наследуется от BaseException, как GeneratorExit: обработчики `except Exception` в парсерах
+    не должны принимать остановку за ошибку отдельного видео или поста и продолжать загрузку.
+    """
+
+
+def comment_row(comment) -> dict:
+    """Строка DataFrame для анализа из comment_parsers.Comment (текст - в колонке sentence)"""
+    metadata = comment.metadata or {}
+    row = {
+        'sentence': comment.text,
+        'author': comment.author,
+        'timestamp': comment.timestamp,
+        'source': comment.source,
+    }
+    if comment.source == 'telegram':
+        row.update({
+            'external_id': f"{metadata.get('channel', '')}/{metadata.get('comment_id')}",
+            'channel': metadata.get('channel', ''),
+            'post_id': metadata.get('post_id', ''),
+            'views': metadata.get('views', 0),
+        })
+    else:
+        row.update({
+            'external_id': metadata.get('comment_id'),
+            'video_id': metadata.get('video_id', ''),
+            'like_count': metadata.get('like_count', 0),
+        })
+    return row
+
+
+class ScrapePipeline:
+    """Итератор микробатчей (DataFrame) комментариев, которые парсер загружает в фоновом потоке.
+
+    fetch - функция fetch(on_comments), например parser.fetch_comments: она должна вызывать
+    on_comments(список Comment) по мере загрузки. Вызов on_comments блокируется, пока в очереди
+    нет места. Ошибка парсера пробрасывается из итерации после обработки уже полученных комментариев.
+    """
+
+    def __init__(self, fetch: Callable[[Callable[[List[Any]], None]], Any],
+                 batch_size: int = MICRO_BATCH_SIZE, max_pending: int = PIPELINE_QUEUE_SIZE,
+                 max_wait: float = MICRO_BATCH_WAIT):
+        self.fetch = fetch
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.received = 0
+        self.batches = 0
+        # Сколько секунд потоки парсера суммарно ждали места в очереди (инференс был узким местом)
+        self.producer_wait = 0.0
+        self.error: Optional[BaseException] = None
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        # Парсер YouTube вызывает on_comments из нескольких потоков загрузки
+        self._stats_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _put(self, item):
+        started = None
+        while True:
+            if self._stop.is_set():
+                raise PipelineClosed()
+            try:
+                self._queue.put(item, timeout=0.1)
+                break
+            except queue.Full:
+                started = started or time.monotonic()
+        if started is not None:
+            with self._stats_lock:
+                self.producer_wait += time.monotonic() - started
+
+    def _on_comments(self, comments):
+        for comment in comments:
+            self._put(comment_row(comment))
+            with self._stats_lock:
+                self.received += 1
+
+    def _produce(self):
+        try:
+            self.fetch(self._on_comments)
+        except PipelineClosed:
+            pass
+        except BaseException as e:
+            self.error = e
+        finally:
+            try:
+                self._put(_DONE)
+            except PipelineClosed:
+                pass
+
+    def _batch(self, rows) -> pd.DataFrame:
+        self.batches += 1
+        return pd.DataFrame(rows)
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        self._thread = threading.Thread(target=self._produce, name="scrape-pipeline", daemon=True)
+        self._thread.start()
+
+        rows = []
+        deadline = None
+        try:
+            while True:
+                timeout = None if not rows else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    # Комментарии поступают медленно - неполный микробатч уходит на классификацию
+                    yield self._batch(rows)
+                    rows = []
+                    continue
+
+                if item is _DONE:
+                    break
+                rows.append(item)
+                if len(rows) == 1:
+                    deadline = time.monotonic() + self.max_wait
+                if len(rows) >= self.batch_size:
+                    yield self._batch(rows)
+                    rows = []
+
+            if rows:
+                yield self._batch(rows)
+            self._thread.join()
+            if self.error is not None:
+                raise self.error
+        finally:
+            # Потребитель мог остановиться раньше (ошибка инференса): парсер прекращает загрузку
+            self._stop.set()
@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+# Пул процессов для инференса на CPU: входные тексты делятся на шарды, каждый шард
+# классифицируется в одном из воркеров. Модели загружаются в воркере один раз
+# (веса через mmap, поэтому страницы файла общие для всех процессов), число потоков
+# torch в каждом воркере - cpu_count // num_workers, чтобы процессы не конкурировали за ядра.
+
+# Размер шарда (текстов): достаточно крупный, чтобы накладные расходы на передачу
+# между процессами были малы, и достаточно мелкий для равномерной загрузки воркеров
+SHARD_SIZE = 256
+
+# Модели воркера (заполняется в _init_worker)
+_worker_models = None
+
+
+def _init_worker(backend, num_threads):
+    global _worker_models
+
+    # Токенизатор не должен запускать собственные потоки поверх потоков torch
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+
+    import torch
+    from algorithms import classifier
+
+    torch.set_num_threads(num_threads)
+    # Пул - режим CPU: воркеры не занимают GPU, даже если он есть
+    classifier.DEVICE = torch.device("cpu")
+    classifier.USE_AMP = False
+    _worker_models = classifier.load_models(backend)
+
+
+def _infer_shard(texts):
+    return _worker_models.infer_texts(texts)
+
+
+def _worker_pid(_):
+    return os.getpid()
+
+
+class InferencePool:
+    """Пул процессов инференса с тем же интерфейсом, что и ModelBundle в predict_stream/predict_chunk.
+
+    Результаты возвращаются в порядке входных текстов. Закрывается через close()
+    или при выходе из блока with.
+    """
+
+    def __init__(self, num_workers, backend=None, threads_per_worker=None, shard_size=SHARD_SIZE):
+        import torch
+        from algorithms import classifier
+
+        self.num_workers = num_workers
+        self.backend = backend or classifier.INFERENCE_BACKEND
+        self.version = classifier.models_version(self.backend)
+        self.device = torch.device("cpu")
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // num_workers)
+        self.shard_size = shard_size
+
+        # spawn: fork процесса с уже инициализированными torch/CUDA небезопасен
+        self._executor = ProcessPoolExecutor(
+            max_workers=num_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.backend, self.threads_per_worker)
+        )
+
+    def warm_up(self):
+        """Запускает воркеры и дожидается загрузки в них моделей"""
+        list(self._executor.map(_worker_pid, range(self.num_workers)))
+
+    def infer_texts(self, texts, on_batch=None):
+        """Возвращает массивы предсказаний тональности и категорий ненависти (см. classifier.infer_texts).
+
+        on_batch вызывается после каждого обработанного шарда с количеством текстов в нем.
+        """
+        predictions_tone = np.zeros(len(texts), dtype=np.int64)
+        predictions_class = np.zeros(len(texts), dtype=np.int64)
+
+        futures = {
+            self._executor.submit(_infer_shard, texts[start:start + self.shard_size]): start
+            for start in range(0, len(texts), self.shard_size)
+        }
+        for future in as_completed(futures):
+            start = futures[future]
+            shard_tone, shard_class = future.result()
+            # Шард записывается по своим исходным позициям, поэтому порядок сохраняется
+            predictions_tone[start:start + len(shard_tone)] = shard_tone
+            predictions_class[start:start + len(shard_class)] = shard_class
+
+            if on_batch is not None:
+                on_batch(len(shard_tone))
+
+        return predictions_tone, predictions_class
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def create_inference(backend=None, workers=None):
+    """Возвращает InferencePool при workers > 1, иначе модели в текущем процессе (ModelBundle)"""
+    from algorithms import classifier
+
+    workers = workers or classifier.INFERENCE_WORKERS
+    if workers > 1:
+        return InferencePool(workers, backend)
+    return classifier.load_models(backend)
@@ -0,0 +1,58 @@
+import html
+from typing import List
+
+import pandas as pd
+
+# Очистка текстов перед токенизацией: комментарии YouTube приходят в HTML (textDisplay:
+# <br>, &quot;, ссылки-таймкоды <a href=...>), в текстах Telegram много ссылок, упоминаний
+# и цепочек эмодзи. Все это съедает окно в MAX_LENGTH токенов и не влияет на тональность.
+# Каждый шаг - строковый метод pandas над всем окном сразу. Исходный текст не меняется:
+# очищенная версия используется только как вход моделей.
+
+# Версия правил очистки: входит в ключ кэша предсказаний, при изменении правил
+# предсказания, посчитанные на старой очистке, перестают использоваться
+PREPROCESSING_VERSION = "2"
+
+# Заглушки вместо ссылок и упоминаний: тональность от конкретного адреса не зависит
+URL_TOKEN = "ссылка"
+MENTION_TOKEN = "@user"
+# Сколько одинаковых символов подряд остается ("ооооочень" -> "ооочень", "!!!!!" -> "!!!")
+REPEAT_LIMIT = 3
+# Сколько эмодзи подряд остается в цепочке
+EMOJI_LIMIT = 3
+
+_EMOJI = "[\U0001F000-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF]"
+
+# (шаблон, замена) в порядке применения
+_RULES = [
+    # Разметка: переносы строк - пробелом, остальные теги удаляются с сохранением текста внутри.
+    # Тег начинается с буквы сразу после "<", поэтому сравнения вроде "1 < 2 и 3 > 2" не трогаются
+    (r"(?i)<br\s*/?>", " "),
+    (r"</?[a-zA-Z][\w-]*(?:\s[^<>]*)?/?>", ""),
+    # HTML-сущности (&quot; &#39; &amp;) - после тегов, чтобы &lt;b&gt; остался текстом
+    (r"&(?:#\d+|#x[0-9a-fA-F]+|[a-zA-Z]+);", lambda match: html.unescape(match.group(0))),
+    # Адреса почты, ссылки (в том числе без протокола) и упоминания
+    (r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+", f" {URL_TOKEN} "),
+    (r"(?i)(?:https?://|www\.)\S+", f" {URL_TOKEN} "),
+    # Домен без протокола: зона в нижнем регистре и отдельным словом, иначе предложения,
+    # написанные без пробела после точки ("Все ок.Command", "Hello.Me too"), принимаются за адреса
+    (r"\b(?:[\w-]+\.)+(?:ru|com|net|org|me|io|be|ly|su|рф)\b(?:/\S*)?", f" {URL_TOKEN} "),
+    (r"(?<![\w@])@\w+", MENTION_TOKEN),
+    # Модификаторы эмодзи (вариант отображения, цвет кожи, соединитель) не несут смысла
+    ("[\uFE0E\uFE0F\u200D\U0001F3FB-\U0001F3FF]", ""),
+    # Повторы одного символа, кроме цифр (числа не искажаются)
+    (r"([^\d\s])\1{%d,}" % REPEAT_LIMIT, r"\1" * REPEAT_LIMIT),
+    # Одинаковые эмодзи подряд - один, длинная цепочка разных - первые EMOJI_LIMIT
+    (rf"({_EMOJI})(?:\s*\1)+", r"\1"),
+    (rf"((?:{_EMOJI}\s*){{{EMOJI_LIMIT}}})(?:{_EMOJI}\s*)+", r"\1"),
+    (r"\s+", " "),
+]
+
+
+def clean_texts(texts) -> List[str]:
+    """Очищенные тексты для моделей: без разметки, со схлопнутыми повторами и заглушками ссылок"""
+    # object, а не строковый тип pyarrow: правилам повторов нужны обратные ссылки, которых нет в RE2
+    cleaned = pd.Series(texts, dtype=object).astype(str).astype(object)
+    for pattern, replacement in _RULES:
+        cleaned = cleaned.str.replace(pattern, replacement, regex=True)
+    return cleaned.str.strip().tolist()
@@ -0,0 +1,39 @@
+import os
+
+import torch
+from torch import nn
+
+# Динамическая INT8-квантизация для инференса на CPU: веса Linear-слоев хранятся в int8,
+# активации квантуются на лету. Эмбеддинги и LayerNorm остаются в fp32.
+
+QUANTIZED_SUFFIX = "_int8"
+
+
+def quantize_model(model: nn.Module) -> nn.Module:
+    """Возвращает модель с INT8-весами Linear-слоев (исходная модель переносится на CPU в fp32)"""
+    model = model.float().to("cpu").eval()
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+def quantized_path(path: str) -> str:
+    """Путь к заранее квантизованному артефакту: models/model_tone.pth -> models/model_tone_int8.pth"""
+    root, extension = os.path.splitext(path)
+    return f"{root}{QUANTIZED_SUFFIX}{extension}"
+
+
+def save_quantized_model(model: nn.Module, path: str) -> str:
+    """Квантизует fp32-модель и сохраняет ее веса рядом с исходным чекпоинтом"""
+    output_path = quantized_path(path)
+    torch.save(quantize_model(model).state_dict(), output_path)
+    return output_path
+
+
+def load_quantized_model(skeleton: nn.Module, path: str) -> nn.Module:
+    """Загружает заранее квантизованные веса.
+
+    skeleton - модель нужной архитектуры без обученных весов (например, from_config):
+    она квантизуется той же функцией, после чего структура совпадает с сохраненным state_dict.
+    """
+    model = quantize_model(skeleton)
+    model.load_state_dict(torch.load(path, map_location="cpu"))
+    return model
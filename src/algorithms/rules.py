@@ -0,0 +1,39 @@
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+# Правило получает массивы предсказаний тональности и категорий ненависти
+# и возвращает новый массив категорий ненависти
+Rule = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+RULES: List[Rule] = []
+
+
+def register_rule(rule: Rule) -> Rule:
+    """Регистрирует правило согласования предсказаний (можно использовать как декоратор).
+
+    Правила применяются в порядке регистрации.
+    """
+    RULES.append(rule)
+    return rule
+
+
+@register_rule
+def no_hate_without_insult(tone: np.ndarray, hate: np.ndarray) -> np.ndarray:
+    """Нейтральные и позитивные тексты не относятся ни к одной категории ненависти"""
+    return np.where(np.isin(tone, (1, 2)), 0, hate)
+
+
+@register_rule
+def insult_without_category_is_other(tone: np.ndarray, hate: np.ndarray) -> np.ndarray:
+    """Оскорбление без определенной категории относится к категории «Другое»"""
+    return np.where((tone == 0) & (hate == 0), 5, hate)
+
+
+def apply_rules(tone: np.ndarray, hate: np.ndarray, rules: Optional[List[Rule]] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Применяет правила согласования к массивам предсказаний"""
+    tone = np.asarray(tone)
+    hate = np.asarray(hate)
+    for rule in (RULES if rules is None else rules):
+        hate = rule(tone, hate)
+    return tone, hate
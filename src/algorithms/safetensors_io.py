@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import torch
+from safetensors import safe_open
+from safetensors.torch import load_file, save_file
+from torch import nn
+from torch.nn.modules.module import register_module_parameter_registration_hook
+from transformers import AutoConfig, AutoModelForSequenceClassification
+
+from algorithms.multihead import MultiHeadClassifier
+
+# Самодостаточный формат моделей: веса в safetensors, конфиг архитектуры - в метаданных файла.
+# При загрузке модель создается без памяти под параметры (meta-устройство), а тензоры
+# отображаются из файла через mmap и подставляются как есть (load_state_dict(assign=True)):
+# копии весов не создаются, а процессы на одном сервере делят страницы файла в кэше ОС.
+
+MODEL_KIND_SEQUENCE_CLASSIFICATION = "sequence_classification"
+MODEL_KIND_MULTIHEAD = "multihead"
+
+
+def safetensors_path(path: str) -> str:
+    """Путь к safetensors-артефакту рядом с чекпоинтом: models/model_tone.pth -> models/model_tone.safetensors"""
+    return f"{os.path.splitext(path)[0]}.safetensors"
+
+
+# Глубина вложенных empty_parameters в текущем потоке
+_empty_parameters = threading.local()
+
+
+def _meta_parameter_hook(module, name, param):
+    if getattr(_empty_parameters, "depth", 0) and param is not None:
+        return nn.Parameter(param.to("meta"), requires_grad=param.requires_grad)
+    return None
+
+
+@contextmanager
+def empty_parameters():
+    """Параметры модулей, создаваемых в текущем потоке, размещаются на meta-устройстве (без памяти).
+
+    Буферы (например, position_ids) остаются обычными тензорами: их нет в чекпоинте. Поэтому
+    не подходит torch.device("meta"), который переносит на meta и буферы. Класс nn.Module не
+    подменяется, а флаг хука потоковый: модули, которые в это же время создаются в других
+    потоках (ModelLoader загружает модели в фоне), получают обычные параметры.
+    """
+    handle = register_module_parameter_registration_hook(_meta_parameter_hook)
+    _empty_parameters.depth = getattr(_empty_parameters, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _empty_parameters.depth -= 1
+        handle.remove()
+
+
+def _build_model(kind: str, config) -> nn.Module:
+    if kind == MODEL_KIND_MULTIHEAD:
+        return MultiHeadClassifier(config)
+    return AutoModelForSequenceClassification.from_config(config)
+
+
+def convert_to_safetensors(path: str, checkpoint: str, kind: str = MODEL_KIND_SEQUENCE_CLASSIFICATION,
+                           num_labels: int = None) -> str:
+    """Конвертирует .pth-чекпоинт в safetensors с конфигом в метаданных.
+
+    checkpoint - базовая модель HF, из которой берется конфиг (нужна только при конвертации).
+    """
+    if kind == MODEL_KIND_MULTIHEAD:
+        config = AutoConfig.from_pretrained(checkpoint)
+    else:
+        config = AutoConfig.from_pretrained(checkpoint, num_labels=num_labels)
+
+    # Загрузка в модель проверяет совместимость чекпоинта и приводит имена ключей к текущей версии transformers
+    with empty_parameters():
+        model = _build_model(kind, config)
+    model.load_state_dict(torch.load(path, map_location="cpu", mmap=True), assign=True)
+
+    output_path = safetensors_path(path)
+    state_dict = {name: tensor.contiguous() for name, tensor in model.state_dict().items()}
+    save_file(state_dict, output_path, metadata={
+        "kind": kind,
+        "config": config.to_json_string(),
+        "source": os.path.basename(path),
+    })
+    return output_path
+
+
+def load_safetensors_model(path: str) -> nn.Module:
+    """Загружает модель из safetensors-артефакта без базового чекпоинта HF и без копирования весов (на CPU)"""
+    with safe_open(path, framework="pt") as f:
+        metadata = f.metadata()
+
+    config = AutoConfig.for_model(**json.loads(metadata["config"]))
+    with empty_parameters():
+        model = _build_model(metadata.get("kind", MODEL_KIND_SEQUENCE_CLASSIFICATION), config)
+
+    # load_file отображает файл в память: тензоры ссылаются на страницы файла
+    model.load_state_dict(load_file(path, device="cpu"), assign=True)
+    model.eval()
+    return model
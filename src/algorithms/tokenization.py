@@ -0,0 +1,105 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import numpy as np
+from tokenizers import Tokenizer
+
+# Этап токенизации: быстрый (Rust) токенизатор, батчи в параллельных потоках, без паддинга
+# (батчи дополняются позже, в collate_batch) и LRU-кэш id токенов по хэшу текста.
+# id токенов хранятся массивами np.int32 (4 байта на токен вместо ~36 у списка int),
+# кэш есть в каждом процессе инференса, поэтому он ограничен и по числу текстов, и по числу токенов.
+
+# Текстов в одном вызове encode_batch
+TOKENIZE_BATCH_SIZE = 1024
+# Потоков токенизации (encode_batch отпускает GIL)
+TOKENIZE_THREADS = min(4, os.cpu_count() or 1)
+# Размер LRU-кэша id токенов (текстов)
+TOKEN_CACHE_SIZE = 100_000
+# Сколько токенов всего хранит кэш (10 млн токенов int32 - около 40 МБ)
+TOKEN_CACHE_MAX_TOKENS = 10_000_000
+
+
+class TokenizationStage:
+    """Токенизирует тексты в массивы id токенов (np.int32) с обрезкой до max_length.
+
+    Значения совпадают с tokenizer(texts, padding=False, truncation=True, max_length=max_length)["input_ids"].
+    Ключ кэша - хэш исходного текста (без нормализации: модель чувствительна к регистру).
+    """
+
+    def __init__(self, tokenizer, max_length: int, batch_size: int = TOKENIZE_BATCH_SIZE,
+                 num_threads: int = TOKENIZE_THREADS, cache_size: int = TOKEN_CACHE_SIZE,
+                 cache_max_tokens: int = TOKEN_CACHE_MAX_TOKENS):
+        if not getattr(tokenizer, "is_fast", False):
+            raise RuntimeError(f"Нужен быстрый токенизатор (пакет tokenizers), получен {type(tokenizer).__name__}")
+
+        # Отдельная копия Rust-токенизатора с фиксированными настройками: вызовы HF-обертки
+        # перенастраивают обрезку при каждом вызове, поэтому их нельзя выполнять из нескольких потоков
+        self._tokenizer = Tokenizer.from_str(tokenizer.backend_tokenizer.to_str())
+        self._tokenizer.enable_truncation(max_length)
+        self._tokenizer.no_padding()
+
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.cache_size = cache_size
+        self.cache_max_tokens = cache_max_tokens
+        self._cache = OrderedDict()
+        self._cached_tokens = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _encode_batch(self, texts: List[str]) -> List[np.ndarray]:
+        return [np.array(encoding.ids, dtype=np.int32) for encoding in self._tokenizer.encode_batch(texts)]
+
+    def encode(self, texts: List[str]) -> List[np.ndarray]:
+        """Токенизация без кэша: батчи по batch_size параллельно в num_threads потоках"""
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1 or self.num_threads <= 1:
+            return [ids for batch in batches for ids in self._encode_batch(batch)]
+
+        with ThreadPoolExecutor(max_workers=self.num_threads) as executor:
+            return [ids for batch_ids in executor.map(self._encode_batch, batches) for ids in batch_ids]
+
+    def __call__(self, texts: List[str]) -> List[np.ndarray]:
+        """Возвращает id токенов для каждого текста (в исходном порядке), используя кэш"""
+        keys = [hashlib.sha1(text.encode("utf-8")).digest() for text in texts]
+        input_ids = [None] * len(texts)
+
+        with self._lock:
+            for position, key in enumerate(keys):
+                ids = self._cache.get(key)
+                if ids is not None:
+                    self._cache.move_to_end(key)
+                    input_ids[position] = ids
+
+            missing = [position for position, ids in enumerate(input_ids) if ids is None]
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            # Повторы внутри одного вызова токенизируются один раз
+            unique = {}
+            for position in missing:
+                unique.setdefault(keys[position], texts[position])
+            encoded = dict(zip(unique, self.encode(list(unique.values()))))
+
+            with self._lock:
+                for key, ids in encoded.items():
+                    previous = self._cache.pop(key, None)
+                    if previous is not None:
+                        self._cached_tokens -= len(previous)
+                    self._cache[key] = ids
+                    self._cached_tokens += len(ids)
+                while self._cache and (len(self._cache) > self.cache_size
+                                       or self._cached_tokens > self.cache_max_tokens):
+                    _, evicted = self._cache.popitem(last=False)
+                    self._cached_tokens -= len(evicted)
+
+            for position in missing:
+                input_ids[position] = encoded[keys[position]]
+
+        return input_ids
@@ -0,0 +1,298 @@
+"""Консольный запуск классификации без Streamlit.
+
+Пример (из корня проекта, чтобы использовалась та же база tone_analysis.db):
+    python src/cli.py classify comments.csv --output results.csv
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+import pandas as pd
+
+from algorithms import classifier
+from algorithms.cache import CacheStats
+from algorithms.dedup import Deduplicator
+from algorithms.onnx_backend import ONNX_OPSET
+from algorithms.pool import InferencePool, create_inference
+from ingestion import INPUT_FORMATS, format_from_extension, read_chunks, sniff
+
+logger = logging.getLogger("safe-web-space")
+
+def detect_format(path: str) -> str:
+    """Определяет формат выходного файла по расширению"""
+    output_format = format_from_extension(path)
+    if output_format is None:
+        raise ValueError(f"Неизвестный формат файла: {path}. Поддерживаются: {', '.join(INPUT_FORMATS)}")
+    return output_format
+
+
+# Колонки, которые predict_stream добавляет к входным, и их типы в parquet.
+# cluster_id есть только с дедупликацией, comment_id - только при записи в базу
+# (и может отсутствовать в окне, если сохранить его не удалось)
+RESULT_COLUMNS = {
+    "cluster_id": "int64",
+    "tone_prediction": "int64",
+    "class_prediction": "int64",
+    "tone_name": "string",
+    "hate_name": "string",
+    "comment_id": "int64",
+}
+
+
+class ResultWriter:
+    """Пишет результаты в файл по мере поступления окон (формат по расширению).
+
+    Состав колонок фиксируется по первому окну: входные колонки и result_columns (RESULT_COLUMNS).
+    Каждое следующее окно приводится к нему, поэтому окна без comment_id или с пустыми колонками
+    не ломают заголовок CSV и схему parquet.
+    """
+
+    def __init__(self, path: str, result_columns=tuple(RESULT_COLUMNS)):
+        self.path = path
+        self.format = detect_format(path)
+        self.result_columns = list(result_columns)
+        self.columns = None
+        self._written = False
+        self._parquet_writer = None
+        self._parquet_schema = None
+        self._xlsx_frames = []
+
+    def _parquet_schema_for(self, df: pd.DataFrame):
+        import pyarrow as pa
+
+        fields = []
+        for column in self.columns:
+            if column in RESULT_COLUMNS:
+                arrow_type = pa.type_for_alias(RESULT_COLUMNS[column])
+            else:
+                arrow_type = pa.Schema.from_pandas(df[[column]], preserve_index=False).field(column).type
+                # Колонка без значений в первом окне: в следующих окнах в ней могут быть строки
+                if pa.types.is_null(arrow_type):
+                    arrow_type = pa.string()
+            fields.append(pa.field(column, arrow_type))
+        return pa.schema(fields)
+
+    def write(self, df: pd.DataFrame):
+        if self.columns is None:
+            self.columns = [column for column in df.columns if column not in RESULT_COLUMNS] + self.result_columns
+        df = df.reindex(columns=self.columns)
+
+        if self.format == "csv":
+            df.to_csv(self.path, mode="a" if self._written else "w", header=not self._written, index=False)
+        elif self.format == "jsonl":
+            with open(self.path, "a" if self._written else "w", encoding="utf-8") as f:
+                df.to_json(f, orient="records", lines=True, force_ascii=False, date_format="iso")
+        elif self.format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._parquet_writer is None:
+                self._parquet_schema = self._parquet_schema_for(df)
+                self._parquet_writer = pq.ParquetWriter(self.path, self._parquet_schema)
+            self._parquet_writer.write_table(
+                pa.Table.from_pandas(df, schema=self._parquet_schema, preserve_index=False))
+        else:
+            # openpyxl не умеет дописывать в файл, поэтому xlsx пишется целиком при закрытии
+            self._xlsx_frames.append(df)
+        self._written = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._xlsx_frames:
+            pd.concat(self._xlsx_frames, ignore_index=True).to_excel(self.path, index=False)
+
+
+def classify(args) -> int:
+    # Формат, кодировка и разделитель CSV определяются по содержимому; явные флаги имеют приоритет
+    source_info = sniff(args.input)
+    if args.format != "auto":
+        source_info.format = args.format
+    if args.encoding:
+        source_info.encoding = args.encoding
+    logger.info(f"Входной файл: {source_info.format}"
+                + (f", кодировка {source_info.encoding}" if source_info.encoding else ""))
+    classifier.USE_PREDICTION_CACHE = not args.no_cache
+    classifier.USE_DEDUP = not args.no_dedup
+    classifier.USE_NEAR_DEDUP = args.near_dedup
+    classifier.USE_TEXT_CLEANING = not args.no_clean
+
+    if args.no_db and not args.output:
+        logger.error("Укажите --output: при --no-db результаты некуда сохранить")
+        return 2
+
+    started = time.monotonic()
+    if args.workers > 1:
+        logger.info(f"Запуск {args.workers} процессов инференса (бэкенд {args.backend}, CPU)...")
+    else:
+        logger.info(f"Загрузка моделей (бэкенд {args.backend}) на {classifier.backend_device(args.backend)}...")
+    models = create_inference(args.backend, args.workers)
+    if isinstance(models, InferencePool):
+        models.warm_up()
+    logger.info(f"Модели загружены за {time.monotonic() - started:.1f} с")
+
+    cache_stats = CacheStats()
+    dedup = Deduplicator(near_duplicates=classifier.USE_NEAR_DEDUP) if classifier.USE_DEDUP else None
+    result_columns = [column for column in RESULT_COLUMNS
+                      if (column != "cluster_id" or dedup is not None)
+                      and (column != "comment_id" or not args.no_db)]
+    writer = ResultWriter(args.output, result_columns) if args.output else None
+    total = 0
+    started = time.monotonic()
+
+    try:
+        chunks = read_chunks(args.input, args.chunk_size, source_info, column=args.column)
+        for df_tone in classifier.predict_stream(chunks, models, cache_stats=cache_stats,
+                                                  persist=not args.no_db, dedup=dedup):
+            total += len(df_tone)
+            if writer is not None:
+                writer.write(df_tone)
+
+            elapsed = time.monotonic() - started
+            logger.info(f"Обработано записей: {total} ({total / elapsed:.1f} записей/с)")
+    finally:
+        if writer is not None:
+            writer.close()
+        if isinstance(models, InferencePool):
+            models.close()
+
+    elapsed = time.monotonic() - started
+    logger.info(f"Готово: {total} записей за {elapsed:.1f} с. "
+                f"Кэш предсказаний: {cache_stats.hits} попаданий, {cache_stats.misses} промахов")
+    if dedup is not None:
+        logger.info(f"Повторы: {dedup.stats.clusters} кластеров, {dedup.stats.exact} точных и "
+                    f"{dedup.stats.near} близких дубликатов ({dedup.stats.duplicate_rate:.0%} записей)")
+    return 0
+
+
+def quantize(args) -> int:
+    """Сохраняет заранее квантизованные INT8-артефакты рядом с fp32-чекпоинтами"""
+    from algorithms.quantization import save_quantized_model
+
+    started = time.monotonic()
+    if classifier.has_checkpoint(classifier.MODEL_MULTIHEAD_PATH):
+        models = [(classifier.load_model_multihead(), classifier.MODEL_MULTIHEAD_PATH)]
+    else:
+        models = [(classifier.load_model_tone(), classifier.MODEL_TONE_PATH),
+                  (classifier.load_model_class(), classifier.MODEL_CLASS_PATH)]
+
+    for model, path in models:
+        output_path = save_quantized_model(model, path)
+        logger.info(f"Сохранено: {output_path} ({os.path.getsize(output_path) / 1024**2:.1f} MB, "
+                    f"исходный чекпоинт {os.path.getsize(path) / 1024**2:.1f} MB)")
+
+    logger.info(f"Квантизация завершена за {time.monotonic() - started:.1f} с")
+    return 0
+
+
+def export_onnx(args) -> int:
+    """Экспортирует модели в ONNX (models/*.onnx) для бэкенда onnx"""
+    from algorithms.onnx_backend import export_onnx as export_model
+
+    # Оптимизатор экспортера подробно пишет каждый проход в INFO
+    for name in ("onnxscript", "onnx_ir"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+
+    started = time.monotonic()
+    if classifier.has_checkpoint(classifier.MODEL_MULTIHEAD_PATH):
+        models = [(classifier.load_model_multihead(), classifier.MODEL_MULTIHEAD_PATH, ["tone_logits", "class_logits"])]
+    else:
+        models = [(classifier.load_model_tone(), classifier.MODEL_TONE_PATH, ["logits"]),
+                  (classifier.load_model_class(), classifier.MODEL_CLASS_PATH, ["logits"])]
+
+    for model, path, output_names in models:
+        output_path = export_model(model, path, output_names, opset=args.opset)
+        logger.info(f"Сохранено: {output_path} ({os.path.getsize(output_path) / 1024**2:.1f} MB)")
+
+    logger.info(f"Экспорт завершен за {time.monotonic() - started:.1f} с")
+    return 0
+
+
+def convert_safetensors(args) -> int:
+    """Конвертирует .pth-чекпоинты в самодостаточные safetensors-артефакты (models/*.safetensors)"""
+    from algorithms.safetensors_io import MODEL_KIND_MULTIHEAD, convert_to_safetensors
+
+    checkpoints = [
+        (classifier.MODEL_TONE_PATH, {"num_labels": len(classifier.TONE_MAPPING)}),
+        (classifier.MODEL_CLASS_PATH, {"num_labels": len(classifier.HATE_MAPPING)}),
+        (classifier.MODEL_MULTIHEAD_PATH, {"kind": MODEL_KIND_MULTIHEAD}),
+    ]
+    converted = 0
+    for path, options in checkpoints:
+        if not os.path.exists(path):
+            continue
+        started = time.monotonic()
+        output_path = convert_to_safetensors(path, classifier.MODEL_CHECKPOINT, **options)
+        converted += 1
+        logger.info(f"Сохранено: {output_path} ({os.path.getsize(output_path) / 1024**2:.1f} MB) "
+                    f"за {time.monotonic() - started:.1f} с")
+
+    if not converted:
+        logger.error("В папке models/ нет чекпоинтов .pth для конвертации")
+        return 2
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="safe-web-space",
+        description="Анализ тональности и классификация ненависти без веб-интерфейса"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    classify_parser = subparsers.add_parser("classify", help="Классифицировать комментарии из файла")
+    classify_parser.add_argument("input", help="Входной файл CSV/XLSX/JSONL/Parquet")
+    classify_parser.add_argument("--format", choices=("auto",) + INPUT_FORMATS, default="auto",
+                                 help="Формат входного файла (по умолчанию - по содержимому)")
+    classify_parser.add_argument("--column", default="sentence", help="Колонка с текстом комментария")
+    classify_parser.add_argument("--encoding", help="Кодировка CSV/JSONL (по умолчанию - определяется автоматически)")
+    classify_parser.add_argument("--output", help="Файл для результатов (CSV/XLSX/JSONL/Parquet)")
+    classify_parser.add_argument("--no-db", action="store_true", help="Не сохранять результаты в базу данных")
+    classify_parser.add_argument("--no-cache", action="store_true", help="Не использовать кэш предсказаний")
+    classify_parser.add_argument("--no-dedup", action="store_true",
+                                 help="Классифицировать каждую запись, не схлопывая повторы")
+    classify_parser.add_argument("--near-dedup", action="store_true",
+                                 help="Схлопывать и близкие дубликаты (MinHash): похожие тексты получат одну метку")
+    classify_parser.add_argument("--no-clean", action="store_true",
+                                 help="Передавать моделям тексты без очистки от разметки, ссылок и повторов")
+    classify_parser.add_argument("--chunk-size", type=int, default=classifier.CHUNK_SIZE,
+                                 help="Размер окна потоковой обработки (строк)")
+    classify_parser.add_argument("--backend", choices=classifier.INFERENCE_BACKENDS,
+                                 default=classifier.INFERENCE_BACKEND,
+                                 help="Бэкенд инференса (по умолчанию - SAFE_WEB_SPACE_BACKEND или torch)")
+    classify_parser.add_argument("--workers", type=int, default=classifier.INFERENCE_WORKERS,
+                                 help="Количество процессов инференса на CPU (по умолчанию - SAFE_WEB_SPACE_WORKERS или 1)")
+    classify_parser.set_defaults(handler=classify)
+
+    quantize_parser = subparsers.add_parser(
+        "quantize", help="Сохранить INT8-квантизованные модели (models/*_int8.pth) для бэкенда int8"
+    )
+    quantize_parser.set_defaults(handler=quantize)
+
+    export_parser = subparsers.add_parser(
+        "export-onnx", help="Экспортировать модели в ONNX (models/*.onnx) для бэкенда onnx"
+    )
+    export_parser.add_argument("--opset", type=int, default=ONNX_OPSET, help="Версия opset ONNX")
+    export_parser.set_defaults(handler=export_onnx)
+
+    convert_parser = subparsers.add_parser(
+        "convert-safetensors", help="Сохранить модели в safetensors с конфигом (models/*.safetensors)"
+    )
+    convert_parser.set_defaults(handler=convert_safetensors)
+
+    return parser
+
+
+def main(argv=None) -> int:
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except Exception as e:
+        logger.exception(f"Ошибка: {e}")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
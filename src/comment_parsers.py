@@ -1,14 +1,20 @@
-from typing import Protocol, List, Dict, Any
+from typing import Protocol, List, Dict, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 import asyncio
 import logging
+import threading
+import time
 from googleapiclient.discovery import build
 from telethon import TelegramClient, events
+from telethon.errors import FloodWaitError
 from telethon.tl.functions.messages import GetHistoryRequest
 from telethon.tl.types import InputPeerChannel
 import re
 
+from db.models import get_checkpoints, save_checkpoints
+
 # Настройка логирования
 logging.basicConfig(
     level=logging.INFO,
@@ -31,29 +37,147 @@ class Comment:
     metadata: Dict[str, Any] = None
 
 
+def to_utc_naive(timestamp: Optional[datetime]) -> Optional[datetime]:
+    """Привести время к UTC без часового пояса (в таком виде оно хранится в базе данных)"""
+    if timestamp is None or timestamp.tzinfo is None:
+        return timestamp
+    return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+
 class CommentParser(Protocol):
     """Протокол для парсеров комментариев"""
     
-    def fetch_comments(self) -> List[Comment]:
-        """Получить комментарии из источника"""
+    def fetch_comments(self, on_comments: Optional[Callable[[List[Comment]], None]] = None) -> List[Comment]:
+        """Получить комментарии из источника.
+
+        on_comments вызывается с каждой загруженной порцией комментариев, не дожидаясь конца
+        парсинга (algorithms/pipeline.py). Вызов может блокироваться, приостанавливая парсер.
+        """
         ...
 
+    def commit_checkpoints(self) -> None:
+        """Сохранить отметки инкрементального парсинга, собранные последним fetch_comments.
+
+        Вызывается после того, как полученные комментарии классифицированы и сохранены в базу:
+        иначе при сбое анализа они были бы пропущены следующим инкрементальным запуском.
+        """
+        ...
+
+
+class RateLimiter:
+    """Ограничитель частоты запросов с учетом квоты API (token bucket).
+
+    rate - сколько единиц квоты можно тратить в секунду,
+    quota - общий бюджет единиц квоты на один запуск парсера (None - без ограничения).
+    Емкость корзины - rate единиц, но не меньше стоимости запроса: иначе при rate < 1
+    (или cost > rate) токенов никогда не хватило бы и acquire ждал бы вечно.
+    """
+
+    def __init__(self, rate: float, quota: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError(f"Частота запросов должна быть положительной: {rate}")
+        self.rate = rate
+        self.quota = quota
+        self.spent = 0
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: int = 1) -> bool:
+        """Дождаться возможности потратить cost единиц. Возвращает False, если квота исчерпана"""
+        while True:
+            with self._lock:
+                if self.quota is not None and self.spent + cost > self.quota:
+                    return False
+
+                now = time.monotonic()
+                capacity = max(self.rate, cost)
+                self._tokens = min(capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                if self._tokens >= cost:
+                    self._tokens -= cost
+                    self.spent += cost
+                    return True
+
+                wait = (cost - self._tokens) / self.rate
+            time.sleep(wait)
+
 
 class YouTubeCommentParser:
-    """Парсер комментариев из YouTube трендов"""
-    
-    def __init__(self, api_key: str):
+    """Парсер комментариев из YouTube трендов.
+
+    Комментарии к видео загружаются параллельно в пуле потоков с постраничным
+    обходом commentThreads (nextPageToken). Количество комментариев ограничено
+    на одно видео и на весь запуск, а запросы проходят через RateLimiter.
+
+    client_factory - функция без аргументов, возвращающая клиент YouTube Data API
+    (по умолчанию googleapiclient.discovery.build). Через нее можно подставить
+    локальную заглушку API с методами videos().list() и commentThreads().list().
+
+    В инкрементальном режиме (incremental=True) комментарии запрашиваются в порядке
+    времени и загружаются только до последнего комментария, сохраненного в прошлый
+    запуск (отметки хранятся в таблице ScrapeCheckpoint, записываются commit_checkpoints).
+    """
+
+    # Стоимость запросов videos.list и commentThreads.list в единицах квоты YouTube Data API
+    REQUEST_QUOTA_COST = 1
+    # Максимальный размер страницы commentThreads.list
+    PAGE_SIZE = 100
+
+    def __init__(self, api_key: str, max_workers: int = 8, max_comments_per_video: int = 500,
+                 max_total_comments: int = 10000, requests_per_second: float = 10.0,
+                 quota: Optional[int] = 10000, client_factory: Optional[Callable[[], Any]] = None,
+                 incremental: bool = False):
         self.api_key = api_key
+        self.incremental = incremental
+        self.max_workers = max_workers
+        self.max_comments_per_video = max_comments_per_video
+        self.max_total_comments = max_total_comments
+        self.rate_limiter = RateLimiter(requests_per_second, quota)
+        self.client_factory = client_factory or (lambda: build('youtube', 'v3', developerKey=api_key))
+        self._thread_local = threading.local()
+        self._total_lock = threading.Lock()
+        self._total_comments = 0
+        self._checkpoints = {}
+        self._new_checkpoints = {}
         try:
-            self.youtube = build('youtube', 'v3', developerKey=api_key)
+            self.youtube = self.client_factory()
             logger.info("YouTube API клиент успешно инициализирован")
         except Exception as e:
             logger.error(f"Ошибка инициализации YouTube API: {e}")
             raise
-    
-    def fetch_comments(self) -> List[Comment]:
-        """Получить комментарии из трендовых видео YouTube"""
+
+    def _client(self):
+        """Клиент API для текущего потока (httplib2 не потокобезопасен)"""
+        if threading.current_thread() is threading.main_thread():
+            return self.youtube
+        if not hasattr(self._thread_local, 'youtube'):
+            self._thread_local.youtube = self.client_factory()
+        return self._thread_local.youtube
+
+    def _reserve_comments(self, count: int) -> int:
+        """Зарезервировать место под комментарии в общем лимите. Возвращает доступное количество"""
+        with self._total_lock:
+            available = max(0, min(count, self.max_total_comments - self._total_comments))
+            self._total_comments += available
+            return available
+
+    def _release_comments(self, count: int):
+        """Вернуть в общий лимит неиспользованный резерв"""
+        if count > 0:
+            with self._total_lock:
+                self._total_comments -= count
+
+    def fetch_comments(self, on_comments: Optional[Callable[[List[Comment]], None]] = None) -> List[Comment]:
+        """Получить комментарии из трендовых видео YouTube.
+
+        on_comments вызывается в потоке загрузки с комментариями каждого видео.
+        """
         comments = []
+        self._total_comments = 0
+        self._checkpoints = get_checkpoints('youtube') if self.incremental else {}
+        self._new_checkpoints = {}
         
         try:
             logger.info("Начинаем парсинг комментариев из YouTube трендов")
@@ -67,26 +191,47 @@ class YouTubeCommentParser:
                 return comments
                 
             logger.info(f"Найдено {len(trending_videos)} трендовых видео")
-            
-            for i, video in enumerate(trending_videos, 1):
-                video_title = video.get('snippet', {}).get('title', 'Unknown')
-                logger.info(f"Обрабатываем видео {i}/{len(trending_videos)}: {video_title[:50]}...")
-                
-                video_comments = self._get_video_comments(video['id'])
-                comments.extend(video_comments)
-                logger.info(f"Получено {len(video_comments)} комментариев к видео {video_title[:30]}")
-                
-            logger.info(f"Парсинг YouTube завершен. Всего получено {len(comments)} комментариев")
+
+            started = time.monotonic()
+            video_comments = {}
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                futures = {
+                    executor.submit(self._get_video_comments, video['id'], on_comments): video
+                    for video in trending_videos
+                }
+                for i, future in enumerate(as_completed(futures), 1):
+                    video = futures[future]
+                    video_title = video.get('snippet', {}).get('title', 'Unknown')
+                    video_comments[video['id']] = future.result()
+                    logger.info(f"Видео {i}/{len(trending_videos)}: получено {len(video_comments[video['id']])} "
+                                f"комментариев к видео {video_title[:30]}")
+
+            # Сохраняем порядок трендов независимо от порядка завершения потоков
+            for video in trending_videos:
+                comments.extend(video_comments.get(video['id'], []))
+
+            elapsed = time.monotonic() - started
+            logger.info(f"Парсинг YouTube завершен. Всего получено {len(comments)} комментариев "
+                        f"за {elapsed:.1f} с, потрачено единиц квоты: {self.rate_limiter.spent}")
                 
         except Exception as e:
             logger.error(f"Ошибка при парсинге YouTube: {e}")
             raise
             
         return comments
+
+    def commit_checkpoints(self):
+        """Сохранить отметки видео, собранные последним fetch_comments (см. CommentParser)"""
+        if self.incremental and self._new_checkpoints:
+            save_checkpoints('youtube', self._new_checkpoints)
+        self._new_checkpoints = {}
     
     def _get_trending_videos(self) -> List[Dict[str, Any]]:
         """Получить список трендовых видео"""
         try:
+            if not self.rate_limiter.acquire(self.REQUEST_QUOTA_COST):
+                logger.warning("Квота YouTube API исчерпана")
+                return []
             request = self.youtube.videos().list(
                 part='id,snippet',
                 chart='mostPopular',
@@ -99,52 +244,120 @@ class YouTubeCommentParser:
             logger.error(f"Ошибка при получении трендовых видео: {e}")
             return []
     
-    def _get_video_comments(self, video_id: str) -> List[Comment]:
-        """Получить комментарии к видео"""
+    def _get_video_comments(self, video_id: str,
+                            on_comments: Optional[Callable[[List[Comment]], None]] = None) -> List[Comment]:
+        """Получить комментарии к видео, обходя страницы commentThreads"""
         comments = []
+        page_token = None
+        # Время последнего комментария, загруженного в прошлый запуск (UTC)
+        since = self._checkpoints.get(video_id, (None, None))[1]
+        newest = None
+        reached_checkpoint = False
+        # Загружены все комментарии новее прошлой отметки: страницы закончились или отметка достигнута
+        complete = False
         
         try:
-            logger.debug(f"Запрашиваем комментарии к видео {video_id}")
-            request = self.youtube.commentThreads().list(
-                part='snippet',
-                videoId=video_id,
-                maxResults=100,
-                order='relevance'
-            )
-            response = request.execute()
-            
-            items = response.get('items', [])
-            logger.debug(f"Получено {len(items)} комментариев к видео {video_id}")
-            
-            for item in items:
-                try:
-                    snippet = item['snippet']['topLevelComment']['snippet']
-                    comment = Comment(
-                        text=snippet['textDisplay'],
-                        author=snippet['authorDisplayName'],
-                        timestamp=datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00')),
-                        source='youtube',
-                        metadata={
-                            'video_id': video_id,
-                            'like_count': snippet.get('likeCount', 0),
-                            'comment_id': item['id']
-                        }
-                    )
-                    comments.append(comment)
-                except Exception as e:
-                    logger.warning(f"Ошибка при обработке комментария: {e}")
-                    continue
+            youtube = self._client()
+            while len(comments) < self.max_comments_per_video and not reached_checkpoint:
+                page_size = self._reserve_comments(min(self.PAGE_SIZE, self.max_comments_per_video - len(comments)))
+                if page_size == 0:
+                    logger.debug(f"Достигнут общий лимит комментариев, видео {video_id} пропущено")
+                    break
+
+                if not self.rate_limiter.acquire(self.REQUEST_QUOTA_COST):
+                    logger.warning(f"Квота YouTube API исчерпана на видео {video_id}")
+                    self._release_comments(page_size)
+                    break
+
+                logger.debug(f"Запрашиваем комментарии к видео {video_id}")
+                request = youtube.commentThreads().list(
+                    part='snippet',
+                    videoId=video_id,
+                    maxResults=page_size,
+                    order='time' if self.incremental else 'relevance',
+                    pageToken=page_token
+                )
+                response = request.execute()
+                
+                items = response.get('items', [])
+                logger.debug(f"Получено {len(items)} комментариев к видео {video_id}")
+
+                page_start = len(comments)
+                for item in items:
+                    try:
+                        snippet = item['snippet']['topLevelComment']['snippet']
+                        timestamp = datetime.fromisoformat(snippet['publishedAt'].replace('Z', '+00:00'))
+                        published = to_utc_naive(timestamp)
+
+                        if since is not None and published <= since:
+                            # Дальше идут комментарии, загруженные в прошлые запуски
+                            reached_checkpoint = True
+                            break
+                        if newest is None or published > newest[1]:
+                            newest = (item['id'], published)
+
+                        comment = Comment(
+                            text=snippet['textDisplay'],
+                            author=snippet['authorDisplayName'],
+                            timestamp=timestamp,
+                            source='youtube',
+                            metadata={
+                                'video_id': video_id,
+                                'like_count': snippet.get('likeCount', 0),
+                                'comment_id': item['id']
+                            }
+                        )
+                        comments.append(comment)
+                    except Exception as e:
+                        logger.warning(f"Ошибка при обработке комментария: {e}")
+                        continue
+
+                # Возвращаем в общий лимит неиспользованный резерв
+                self._release_comments(page_size - (len(comments) - page_start))
+                if on_comments is not None and len(comments) > page_start:
+                    on_comments(comments[page_start:])
+
+                page_token = response.get('nextPageToken')
+                if not page_token or reached_checkpoint:
+                    complete = True
+                    break
                     
         except Exception as e:
             logger.error(f"Ошибка при получении комментариев к видео {video_id}: {e}")
+
+        # Если загрузка остановилась раньше (лимит, квота, ошибка), отметка не сдвигается:
+        # иначе комментарии между старой отметкой и достигнутым местом были бы пропущены навсегда.
+        # В первый запуск старой отметки нет и разрыва не остается - отметка ставится всегда,
+        # иначе видео с комментариями сверх лимита загружалось бы целиком каждый запуск
+        if (complete or since is None) and newest is not None:
+            with self._total_lock:
+                self._new_checkpoints[video_id] = newest
             
         return comments
 
 
 class TelegramCommentParser:
-    """Парсер комментариев из Telegram каналов"""
+    """Парсер комментариев из Telegram каналов.
+
+    Каналы и посты обрабатываются конкурентно: общее число одновременных запросов
+    ограничено max_concurrency, а число запросов к одному каналу - per_channel_concurrency.
+    При FloodWaitError запрос повторяется после указанной Telegram паузы.
+
+    client - уже подключенный клиент (например, заглушка с методами get_entity,
+    get_messages и вызовом GetHistoryRequest); если не передан, создается TelegramClient.
+
+    В инкрементальном режиме (incremental=True) для каждого поста запрашиваются только
+    комментарии новее сохраненной в прошлый запуск отметки (min_id), а посты без новых
+    комментариев (replies.max_id не больше отметки) пропускаются без запроса.
+    Отметки записываются commit_checkpoints.
+    """
+
+    # Сколько комментариев к посту запрашивается за один запуск
+    COMMENTS_PER_POST = 20
     
-    def __init__(self, api_id: str, api_hash: str, channels: List[str], posts_limit: int = 50, phone: str = None, bot_token: str = None, verification_code: str = None):
+    def __init__(self, api_id: str, api_hash: str, channels: List[str], posts_limit: int = 50, phone: str = None, bot_token: str = None, verification_code: str = None,
+                 max_concurrency: int = 10, per_channel_concurrency: int = 3, max_flood_wait: int = 300, client=None,
+                 incremental: bool = False):
         self.api_id = api_id
         self.api_hash = api_hash
         self.channels = channels
@@ -152,7 +365,16 @@ class TelegramCommentParser:
         self.phone = phone  # Номер телефона (если используется)
         self.bot_token = bot_token  # Bot token (если используется)
         self.verification_code = verification_code  # Код подтверждения
-        self.client = None
+        self.max_concurrency = max_concurrency  # Общий лимит одновременных запросов
+        self.per_channel_concurrency = per_channel_concurrency  # Лимит одновременных запросов к каналу
+        self.max_flood_wait = max_flood_wait  # Максимальная пауза FloodWait, которую имеет смысл ждать (с)
+        self.client = client
+        self.incremental = incremental  # Загружать только новые комментарии
+        self.stats = {'requests': 0, 'flood_waits': 0, 'comments': 0, 'elapsed': 0.0}
+        self._semaphore = None
+        self._checkpoints = {}
+        self._new_checkpoints = {}
+        self._on_comments = None
     
     def set_verification_code(self, code: str):
         """Установить код подтверждения"""
@@ -249,48 +471,101 @@ class TelegramCommentParser:
             logger.error(f"Ошибка при проверке необходимости кода: {e}")
             return False
     
-    def fetch_comments(self) -> List[Comment]:
-        """Получить комментарии из Telegram каналов"""
+    def fetch_comments(self, on_comments: Optional[Callable[[List[Comment]], None]] = None) -> List[Comment]:
+        """Получить комментарии из Telegram каналов.
+
+        on_comments вызывается с комментариями каждого поста в пуле потоков asyncio,
+        поэтому его блокировка не останавливает цикл событий.
+        """
+        self._on_comments = on_comments
         try:
             return asyncio.run(self._fetch_comments_async())
         except Exception as e:
             logger.error(f"Ошибка при получении комментариев из Telegram: {e}")
             raise
+
+    def commit_checkpoints(self):
+        """Сохранить отметки постов, собранные последним fetch_comments (см. CommentParser)"""
+        if self.incremental and self._new_checkpoints:
+            save_checkpoints('telegram', self._new_checkpoints)
+        self._new_checkpoints = {}
     
     async def _fetch_comments_async(self) -> List[Comment]:
         """Асинхронное получение комментариев"""
         await self._init_client()
         comments = []
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.stats = {'requests': 0, 'flood_waits': 0, 'comments': 0, 'elapsed': 0.0}
+        self._checkpoints = get_checkpoints('telegram') if self.incremental else {}
+        self._new_checkpoints = {}
+        started = time.monotonic()
         
         logger.info(f"Начинаем парсинг комментариев из {len(self.channels)} Telegram каналов")
         logger.info(f"Лимит постов на канал: {self.posts_limit}")
         
-        for i, channel in enumerate(self.channels, 1):
-            try:
-                logger.info(f"Обрабатываем канал {i}/{len(self.channels)}: {channel}")
-                channel_comments = await self._get_channel_comments(channel)
-                comments.extend(channel_comments)
-                logger.info(f"Получено {len(channel_comments)} комментариев из канала {channel}")
-            except Exception as e:
-                logger.error(f"Ошибка при парсинге канала {channel}: {e}")
+        results = await asyncio.gather(
+            *(self._get_channel_comments(channel) for channel in self.channels),
+            return_exceptions=True
+        )
+
+        for channel, channel_comments in zip(self.channels, results):
+            if isinstance(channel_comments, BaseException) and not isinstance(channel_comments, Exception):
+                # Остановка конвейера (PipelineClosed) или отмена - не ошибка отдельного канала
+                raise channel_comments
+            if isinstance(channel_comments, BaseException):
+                logger.error(f"Ошибка при парсинге канала {channel}: {channel_comments}")
                 continue
-        
+            comments.extend(channel_comments)
+            logger.info(f"Получено {len(channel_comments)} комментариев из канала {channel}")
+
+        elapsed = time.monotonic() - started
+        self.stats['comments'] = len(comments)
+        self.stats['elapsed'] = elapsed
         logger.info(f"Парсинг Telegram завершен. Всего получено {len(comments)} комментариев")
+        if elapsed > 0:
+            logger.info(f"Пропускная способность: {self.stats['requests'] / elapsed:.1f} запросов/с, "
+                        f"{len(comments) / elapsed:.1f} комментариев/с, "
+                        f"FloodWait: {self.stats['flood_waits']}")
         return comments
+
+    async def _request(self, channel_semaphore: asyncio.Semaphore, make_request: Callable[[], Any]):
+        """Выполнить запрос к Telegram с учетом лимитов конкурентности и FloodWait"""
+        while True:
+            try:
+                async with channel_semaphore, self._semaphore:
+                    self.stats['requests'] += 1
+                    return await make_request()
+            except FloodWaitError as e:
+                self.stats['flood_waits'] += 1
+                if e.seconds > self.max_flood_wait:
+                    logger.error(f"FloodWait {e.seconds} с превышает допустимые {self.max_flood_wait} с")
+                    raise
+                logger.warning(f"FloodWait: повтор запроса через {e.seconds} с")
+                # Ждем вне семафоров, чтобы не блокировать другие каналы
+                await asyncio.sleep(e.seconds)
     
+    @staticmethod
+    def _replies_max_id(message) -> Optional[int]:
+        """id последнего комментария к посту по данным самого поста (0 - комментариев нет)"""
+        replies = getattr(message, 'replies', None)
+        if replies is None:
+            return None
+        return getattr(replies, 'max_id', None) or 0
+
     async def _get_channel_comments(self, channel_username: str) -> List[Comment]:
         """Получить комментарии из канала"""
         comments = []
+        channel_semaphore = asyncio.Semaphore(self.per_channel_concurrency)
         
         try:
             logger.info(f"Получаем информацию о канале {channel_username}")
             # Получаем информацию о канале
-            entity = await self.client.get_entity(channel_username)
+            entity = await self._request(channel_semaphore, lambda: self.client.get_entity(channel_username))
             logger.info(f"Канал найден: {entity.title if hasattr(entity, 'title') else channel_username}")
             
             logger.info(f"Запрашиваем сообщения из канала {channel_username}")
             # Получаем сообщения из канала
-            messages = await self.client(GetHistoryRequest(
+            messages = await self._request(channel_semaphore, lambda: self.client(GetHistoryRequest(
                 peer=entity,
                 limit=self.posts_limit,  # Используем настраиваемый лимит
                 offset_date=None,
@@ -299,19 +574,23 @@ class TelegramCommentParser:
                 min_id=0,
                 add_offset=0,
                 hash=0
-            ))
+            )))
             
             logger.info(f"Получено {len(messages.messages)} сообщений из канала {channel_username}")
+
+            # Последние posts_limit постов запрашиваются всегда: к старым постам тоже приходят
+            # новые комментарии, а посты без них отсекает отметка поста (replies.max_id)
             
-            # Обрабатываем каждое сообщение и получаем комментарии к нему
-            for i, message in enumerate(messages.messages, 1):
-                logger.info(f"Обрабатываем сообщение {i}/{len(messages.messages)} (ID: {message.id})")
-                
-                # Получаем комментарии к посту
-                post_comments = await self._get_post_comments(entity, message.id, channel_username)
-                
+            # Получаем комментарии ко всем постам конкурентно
+            results = await asyncio.gather(*(
+                self._get_post_comments(entity, message.id, channel_username, channel_semaphore,
+                                        replies_max_id=self._replies_max_id(message))
+                for message in messages.messages
+            ))
+
+            for message, post_comments in zip(messages.messages, results):
                 if post_comments:
-                    logger.info(f"Найдено {len(post_comments)} комментариев к посту {message.id}")
+                    logger.debug(f"Найдено {len(post_comments)} комментариев к посту {message.id}")
                     comments.extend(post_comments)
                 else:
                     logger.debug(f"К посту {message.id} комментариев не найдено")
@@ -323,17 +602,35 @@ class TelegramCommentParser:
             
         return comments
     
-    async def _get_post_comments(self, entity, post_id: int, channel_username: str) -> List[Comment]:
+    async def _get_post_comments(self, entity, post_id: int, channel_username: str,
+                                 channel_semaphore: asyncio.Semaphore,
+                                 replies_max_id: Optional[int] = None) -> List[Comment]:
         """Получить комментарии к конкретному посту"""
         comments = []
+        checkpoint_key = f"{channel_username}/{post_id}"
+        last_id = self._checkpoints.get(checkpoint_key, (None, None))[0]
+        min_id = int(last_id) if last_id else 0
         
         try:
-            # Получаем комментарии к посту
-            comment_messages = await self.client.get_messages(
+            if self.incremental and replies_max_id is not None and replies_max_id <= min_id:
+                # Новых комментариев с прошлого запуска нет
+                return comments
+
+            # Получаем комментарии к посту. В инкрементальном режиме - от старых к новым начиная
+            # с отметки: если новых комментариев больше COMMENTS_PER_POST, следующий запуск
+            # продолжит с последнего полученного, и ни один комментарий не пропадет
+            comment_messages = await self._request(channel_semaphore, lambda: self.client.get_messages(
                 entity,
                 reply_to=post_id,
-                limit=20
-            )
+                limit=self.COMMENTS_PER_POST,
+                min_id=min_id,
+                reverse=self.incremental
+            ))
+
+            if comment_messages:
+                last_comment = max(comment_messages, key=lambda message: message.id)
+                if last_comment.id > min_id:
+                    self._new_checkpoints[checkpoint_key] = (last_comment.id, to_utc_naive(last_comment.date))
             
             for comment_msg in comment_messages:
                 if comment_msg.text:
@@ -357,6 +654,9 @@ class TelegramCommentParser:
                     
         except Exception as e:
             logger.error(f"Ошибка при получении комментариев к посту {post_id}: {e}")
+
+        if comments and self._on_comments is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self._on_comments, comments)
             
         return comments
 
@@ -1,7 +1,7 @@
 import streamlit as st
 import toml
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
 
 # Определение ключей настроек в Streamlit Secrets
 SETTINGS_KEYS = {
@@ -109,6 +109,12 @@ def get_setting(key: str, default: str = "") -> str:
     value = st.secrets.get(secret_key, default)
     return str(value) if value else default
 
+def get_inference_settings() -> Tuple[Optional[str], Optional[int]]:
+    """Бэкенд и количество процессов инференса из secrets (None - значение из переменных окружения)"""
+    backend = get_setting("inference_backend") or None
+    workers = get_setting("inference_workers")
+    return backend, int(workers) if workers else None
+
 def get_all_settings() -> Dict[str, str]:
     """Получает все настройки из secrets"""
     # Убеждаемся, что файл secrets существует
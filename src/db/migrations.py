@@ -0,0 +1,80 @@
+import logging
+
+from peewee import *
+from playhouse.migrate import SqliteMigrator, migrate
+
+# Миграции схемы существующих баз. Номер примененной версии хранится в PRAGMA user_version.
+# Новая база создается сразу в актуальной схеме (db.create_tables) и помечается последней версией,
+# поэтому миграции выполняются только для баз, созданных предыдущими версиями приложения.
+# Каждая миграция - функция (db, migrator); новые добавляются в конец MIGRATIONS.
+
+logger = logging.getLogger(__name__)
+
+
+def _add_missing_columns(db, migrator, table, columns):
+    existing = {column.name for column in db.get_columns(table)}
+    operations = [migrator.add_column(table, name, field)
+                  for name, field in columns if name not in existing]
+    if operations:
+        migrate(*operations)
+
+
+def _add_missing_index(db, migrator, table, columns, unique=False):
+    name = f"{table}_{'_'.join(columns)}"
+    if name not in {index.name for index in db.get_indexes(table)}:
+        migrate(migrator.add_index(table, columns, unique, name=name))
+
+
+def comment_metadata(db, migrator):
+    """Источник, внешний id, время сохранения, версия моделей и хэш текста у комментариев"""
+    _add_missing_columns(db, migrator, "comment", [
+        ("source", CharField(null=True)),
+        ("external_id", CharField(null=True)),
+        ("created_at", DateTimeField(null=True)),
+        ("model_version", CharField(null=True)),
+        ("text_hash", CharField(null=True)),
+    ])
+    _add_missing_index(db, migrator, "comment", ("tone_id", "hate_id"))
+    _add_missing_index(db, migrator, "comment", ("source", "created_at"))
+    _add_missing_index(db, migrator, "comment", ("source", "external_id"), unique=True)
+    _add_missing_index(db, migrator, "comment", ("text_hash",))
+
+
+def comment_cluster(db, migrator):
+    """Хэш представителя кластера повторов у комментариев (algorithms/dedup.py)"""
+    _add_missing_columns(db, migrator, "comment", [
+        ("cluster_hash", CharField(null=True)),
+    ])
+    _add_missing_index(db, migrator, "comment", ("cluster_hash",))
+
+
+MIGRATIONS = [
+    comment_metadata,
+    comment_cluster,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(db):
+    return db.pragma("user_version")
+
+
+def apply_migrations(db):
+    """Приводит схему базы к SCHEMA_VERSION. Возвращает число примененных миграций.
+
+    Вызывается до db.create_tables: индексы моделей ссылаются на колонки, которых в старой схеме нет.
+    """
+    if "comment" not in db.get_tables():
+        # Новая база: таблицы будут созданы в актуальной схеме
+        db.pragma("user_version", SCHEMA_VERSION)
+        return 0
+
+    version = get_schema_version(db)
+    migrator = SqliteMigrator(db)
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        logger.info(f"Миграция схемы {number}: {migration.__name__}")
+        with db.atomic():
+            migration(db, migrator)
+            db.pragma("user_version", number)
+    return max(0, SCHEMA_VERSION - version)
@@ -1,4 +1,10 @@
+import re
+from datetime import datetime
+
 from peewee import *
+from playhouse.sqlite_ext import FTS5Model, SearchField
+
+from db.migrations import apply_migrations
 
 db = SqliteDatabase(
     "tone_analysis.db",
@@ -29,11 +35,462 @@ class Comment(BaseModel):
     text = CharField()
     tone_id = ForeignKeyField(Tone, backref="comments")
     hate_id = ForeignKeyField(Hate, backref="comments")
+    # Откуда получен комментарий (youtube, telegram) и его id в источнике
+    source = CharField(null=True)
+    external_id = CharField(null=True)
+    created_at = DateTimeField(null=True, default=datetime.now)
+    # Версия моделей, выставивших метки, и хэш нормализованного текста (algorithms/cache.py)
+    model_version = CharField(null=True)
+    text_hash = CharField(null=True, index=True)
+    # Хэш текста представителя кластера повторов (algorithms/dedup.py): метки копируются с него,
+    # а GROUP BY cluster_hash показывает объемы повторяющихся комментариев
+    cluster_hash = CharField(null=True, index=True)
+
+    class Meta:
+        # Изменения схемы существующих баз - в db/migrations.py
+        indexes = (
+            # Фильтры страницы проанализированных данных и COUNT по ним без чтения таблицы
+            (("tone_id", "hate_id"), False),
+            (("source", "created_at"), False),
+            # Повторно загруженный комментарий источника не сохраняется второй раз
+            (("source", "external_id"), True),
+        )
+
+
+class CommentSearch(FTS5Model):
+    """Полнотекстовый индекс FTS5 по comment.text (внешнее содержимое: сам текст хранится только в comment).
+
+    Индекс синхронизируется триггерами SEARCH_TRIGGERS, rowid совпадает с comment.id.
+    """
+    text = SearchField()
+
+    class Meta:
+        database = db
+        table_name = "comment_fts"
+        options = {
+            "content": Comment,
+            "content_rowid": "id",
+            # remove_diacritics 0: иначе "й" индексируется как "и"
+            "tokenize": "unicode61 remove_diacritics 0",
+        }
+
+
+SEARCH_TRIGGERS = (
+    """CREATE TRIGGER IF NOT EXISTS comment_fts_ai AFTER INSERT ON comment BEGIN
+        INSERT INTO comment_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comment_fts_ad AFTER DELETE ON comment BEGIN
+        INSERT INTO comment_fts(comment_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS comment_fts_au AFTER UPDATE OF text ON comment BEGIN
+        INSERT INTO comment_fts(comment_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        INSERT INTO comment_fts(rowid, text) VALUES (new.id, new.text);
+    END""",
+)
+
+
+class PredictionCache(BaseModel):
+    """Кэш предсказаний по хэшу нормализованного текста и версии моделей"""
+    text_hash = CharField()
+    model_version = CharField()
+    tone_id = ForeignKeyField(Tone)
+    hate_id = ForeignKeyField(Hate)
+    hits = IntegerField(default=0)
+    last_used = DateTimeField(default=datetime.now, index=True)
+
+    class Meta:
+        indexes = (
+            (("text_hash", "model_version"), True),
+        )
+
+
+class ScrapeCheckpoint(BaseModel):
+    """Отметка последнего загруженного элемента источника для инкрементального парсинга.
+
+    key - идентификатор внутри источника: канал или канал/пост для Telegram, id видео для YouTube.
+    """
+    source = CharField()
+    key = CharField()
+    last_id = CharField(null=True)
+    last_timestamp = DateTimeField(null=True)
+    updated_at = DateTimeField(default=datetime.now)
+
+    class Meta:
+        indexes = (
+            (("source", "key"), True),
+        )
+
+
+class CommentStats(BaseModel):
+    """Число комментариев по дню сохранения, источнику, тональности и категории ненависти.
+
+    Поддерживается триггерами STATS_TRIGGERS при каждом изменении comment, поэтому метрики
+    и графики не пересчитываются по всей таблице комментариев.
+    day - дата created_at в формате ГГГГ-ММ-ДД ('' если неизвестна), source - '' если источник не указан.
+    """
+    day = CharField()
+    source = CharField()
+    tone_id = IntegerField()
+    hate_id = IntegerField()
+    count = IntegerField(default=0)
+
+    class Meta:
+        table_name = "comment_stats"
+        indexes = (
+            (("day", "source", "tone_id", "hate_id"), True),
+        )
+
+
+_STATS_ADD = """INSERT INTO comment_stats(day, source, tone_id, hate_id, count)
+        VALUES (coalesce(date(new.created_at), ''), coalesce(new.source, ''), new.tone_id, new.hate_id, 1)
+        ON CONFLICT(day, source, tone_id, hate_id) DO UPDATE SET count = count + 1;"""
+_STATS_REMOVE = """UPDATE comment_stats SET count = count - 1
+        WHERE day = coalesce(date(old.created_at), '') AND source = coalesce(old.source, '')
+          AND tone_id = old.tone_id AND hate_id = old.hate_id;"""
+
+STATS_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS comment_stats_ai AFTER INSERT ON comment BEGIN
+        {_STATS_ADD}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS comment_stats_ad AFTER DELETE ON comment BEGIN
+        {_STATS_REMOVE}
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS comment_stats_au
+        AFTER UPDATE OF tone_id, hate_id, source, created_at ON comment BEGIN
+        {_STATS_REMOVE}
+        {_STATS_ADD}
+    END""",
+)
+
+
+# Количество строк в одном INSERT: 100 строк * число полей укладывается
+# в лимит 999 параметров SQL-запроса старых версий SQLite
+BULK_INSERT_CHUNK_SIZE = 100
+
+
+def bulk_create_comments(rows, chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """Сохраняет комментарии пачками insert_many в одной транзакции.
+
+    rows - последовательность словарей с полями Comment (text, tone_id, hate_id и необязательные
+    source, external_id, model_version, text_hash, cluster_hash). Комментарии с уже сохраненной парой
+    (source, external_id) повторно не вставляются: для них возвращается id существующей записи.
+    Возвращает список id записей в порядке rows.
+    """
+    rows = list(rows)
+    ids = [None] * len(rows)
+    with db.atomic():
+        known = _find_external_ids({(row.get("source"), row.get("external_id")) for row in rows
+                                    if row.get("source") is not None and row.get("external_id") is not None})
+
+        new_positions = []
+        # Повтор внутри rows получает id первой вставки: {ключ: позиция первого вхождения}
+        first_positions = {}
+        repeated = []
+        for position, row in enumerate(rows):
+            key = (row.get("source"), row.get("external_id"))
+            if key in known:
+                ids[position] = known[key]
+            elif key in first_positions:
+                repeated.append((position, first_positions[key]))
+            else:
+                new_positions.append(position)
+                if None not in key:
+                    first_positions[key] = position
+
+        for batch in chunked(new_positions, chunk_size):
+            # SQLite выдает rowid подряд внутри одного INSERT, а execute()
+            # возвращает rowid последней вставленной строки
+            last_id = Comment.insert_many([rows[position] for position in batch]).execute()
+            for offset, position in enumerate(batch):
+                ids[position] = last_id - len(batch) + 1 + offset
+
+        for position, first_position in repeated:
+            ids[position] = ids[first_position]
+    return ids
+
+
+def _find_external_ids(keys):
+    """Возвращает словарь {(source, external_id): id} уже сохраненных комментариев"""
+    by_source = {}
+    for source, external_id in keys:
+        by_source.setdefault(source, []).append(external_id)
+
+    found = {}
+    for source, external_ids in by_source.items():
+        for batch in chunked(external_ids, CACHE_LOOKUP_CHUNK_SIZE):
+            query = (Comment
+                     .select(Comment.id, Comment.external_id)
+                     .where((Comment.source == source) & (Comment.external_id.in_(batch)))
+                     .tuples())
+            found.update({(source, external_id): comment_id for comment_id, external_id in query})
+    return found
+
+
+# Количество хэшей в одном запросе IN (...) к кэшу предсказаний
+CACHE_LOOKUP_CHUNK_SIZE = 500
+
+
+def get_cached_predictions(text_hashes, model_version):
+    """Возвращает словарь {text_hash: (tone_id, hate_id)} для найденных в кэше хэшей.
+
+    У найденных записей увеличивается счетчик попаданий и обновляется время использования.
+    """
+    cached = {}
+    with db.atomic():
+        for batch in chunked(list(set(text_hashes)), CACHE_LOOKUP_CHUNK_SIZE):
+            query = (PredictionCache
+                     .select(PredictionCache.id, PredictionCache.text_hash,
+                             PredictionCache.tone_id, PredictionCache.hate_id)
+                     .where((PredictionCache.model_version == model_version) &
+                            (PredictionCache.text_hash.in_(batch)))
+                     .tuples())
+            hit_ids = []
+            for entry_id, text_hash, tone_id, hate_id in query:
+                cached[text_hash] = (tone_id, hate_id)
+                hit_ids.append(entry_id)
+
+            if hit_ids:
+                (PredictionCache
+                 .update(hits=PredictionCache.hits + 1, last_used=datetime.now())
+                 .where(PredictionCache.id.in_(hit_ids))
+                 .execute())
+    return cached
+
+
+def cache_predictions(entries, model_version, chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """Сохраняет предсказания в кэш.
+
+    entries - последовательность кортежей (text_hash, tone_id, hate_id).
+    """
+    now = datetime.now()
+    rows = [
+        {"text_hash": text_hash, "model_version": model_version,
+         "tone_id": tone_id, "hate_id": hate_id, "last_used": now}
+        for text_hash, tone_id, hate_id in entries
+    ]
+    with db.atomic():
+        for batch in chunked(rows, chunk_size):
+            PredictionCache.insert_many(batch).on_conflict_replace().execute()
+
+
+def evict_prediction_cache(max_entries):
+    """Удаляет давно не использованные записи кэша сверх max_entries. Возвращает число удаленных записей"""
+    excess = PredictionCache.select().count() - max_entries
+    if excess <= 0:
+        return 0
+
+    oldest = (PredictionCache
+              .select(PredictionCache.id)
+              .order_by(PredictionCache.last_used)
+              .limit(excess))
+    return PredictionCache.delete().where(PredictionCache.id.in_(oldest)).execute()
+
+
+def get_checkpoints(source):
+    """Возвращает словарь {key: (last_id, last_timestamp)} отметок источника"""
+    query = (ScrapeCheckpoint
+             .select(ScrapeCheckpoint.key, ScrapeCheckpoint.last_id, ScrapeCheckpoint.last_timestamp)
+             .where(ScrapeCheckpoint.source == source)
+             .tuples())
+    return {key: (last_id, last_timestamp) for key, last_id, last_timestamp in query}
+
+
+def save_checkpoints(source, checkpoints, chunk_size=BULK_INSERT_CHUNK_SIZE):
+    """Сохраняет отметки источника. checkpoints - словарь {key: (last_id, last_timestamp)}"""
+    now = datetime.now()
+    rows = [
+        {"source": source, "key": key, "last_id": None if last_id is None else str(last_id),
+         "last_timestamp": last_timestamp, "updated_at": now}
+        for key, (last_id, last_timestamp) in checkpoints.items()
+    ]
+    with db.atomic():
+        for batch in chunked(rows, chunk_size):
+            ScrapeCheckpoint.insert_many(batch).on_conflict_replace().execute()
+
+
+def fts_query(search):
+    """Строка поиска -> запрос FTS5: все слова должны встречаться, каждое - как префикс.
+
+    Слова берутся в кавычки, поэтому операторы и спецсимволы FTS5 во вводе пользователя не интерпретируются.
+    """
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", search))
+
+
+def _filter_comments(query, tone_id=None, hate_id=None, search=""):
+    """Добавляет к запросу по Comment фильтры по тональности, категории и полнотекстовому поиску"""
+    if tone_id is not None:
+        query = query.where(Comment.tone_id == tone_id)
+    if hate_id is not None:
+        query = query.where(Comment.hate_id == hate_id)
+    match = fts_query(search)
+    if match:
+        # Запрос передается параметром MATCH
+        matched = CommentSearch.select(CommentSearch.rowid).where(CommentSearch.match(match))
+        query = query.where(Comment.id.in_(matched))
+    elif search.strip():
+        # В запросе нет ни одного слова (только знаки препинания) - под него ничего не подходит
+        query = query.where(Comment.id.in_([]))
+    return query
+
+
+def count_comments(tone_id=None, hate_id=None, search=""):
+    """Количество комментариев, подходящих под фильтры"""
+    match = fts_query(search)
+    if not match and search.strip():
+        # Запрос без слов: search_comments для него ничего не находит
+        return 0
+    if not match:
+        # Без поиска достаточно агрегатов
+        return sum(get_comment_distribution("total", tone_id=tone_id, hate_id=hate_id).values())
+    if match and tone_id is None and hate_id is None:
+        # Только поиск: считаем по полнотекстовому индексу, не обращаясь к comment
+        return CommentSearch.select().where(CommentSearch.match(match)).count()
+    query = _filter_comments(Comment.select(fn.COUNT(Comment.id)), tone_id, hate_id, search)
+    return query.scalar() or 0
+
+
+def search_comments(search, tone_id=None, hate_id=None, limit=50, offset=0, snippet_tokens=16,
+                    highlight=("**", "**")):
+    """Полнотекстовый поиск, упорядоченный по релевантности (bm25).
+
+    Возвращает список словарей с ключами id, text, snippet, tone_name, hate_name, rank;
+    в snippet найденные слова обрамлены строками highlight.
+    """
+    match = fts_query(search)
+    if not match:
+        return []
+
+    rank = CommentSearch.bm25()
+    query = (CommentSearch
+             .select(Comment.id, Comment.text,
+                     fn.snippet(CommentSearch._meta.entity, 0, *highlight, "…", snippet_tokens).alias("snippet"),
+                     Tone.name.alias("tone_name"), Hate.name.alias("hate_name"), rank.alias("rank"))
+             .join(Comment, on=(CommentSearch.rowid == Comment.id))
+             .join(Tone, JOIN.LEFT_OUTER, on=(Comment.tone_id == Tone.id))
+             .switch(Comment)
+             .join(Hate, JOIN.LEFT_OUTER, on=(Comment.hate_id == Hate.id))
+             .where(CommentSearch.match(match)))
+    if tone_id is not None:
+        query = query.where(Comment.tone_id == tone_id)
+    if hate_id is not None:
+        query = query.where(Comment.hate_id == hate_id)
+    return list(query.order_by(rank, Comment.id).limit(limit).offset(offset).dicts())
+
+
+def get_comments_page(tone_id=None, hate_id=None, search="", limit=50, offset=0, after_id=None):
+    """Страница комментариев с названиями тональности и категории, упорядоченная по id.
+
+    after_id - id последней записи предыдущей страницы: если известен, страница выбирается
+    по ключу (id > after_id) без пропуска offset строк.
+    Возвращает список словарей с ключами id, text, tone_name, hate_name.
+    """
+    query = (Comment
+             .select(Comment.id, Comment.text,
+                     Tone.name.alias("tone_name"), Hate.name.alias("hate_name"))
+             .join(Tone, JOIN.LEFT_OUTER, on=(Comment.tone_id == Tone.id))
+             .switch(Comment)
+             .join(Hate, JOIN.LEFT_OUTER, on=(Comment.hate_id == Hate.id)))
+    query = _filter_comments(query, tone_id, hate_id, search).order_by(Comment.id)
+
+    if after_id is not None:
+        query = query.where(Comment.id > after_id).limit(limit)
+    else:
+        query = query.limit(limit).offset(offset)
+    return list(query.dicts())
+
+
+def iter_comments(tone_id=None, hate_id=None, search="", chunk_size=5000):
+    """Перебирает все подходящие под фильтры комментарии страницами по chunk_size (для экспорта)"""
+    after_id = None
+    while True:
+        rows = get_comments_page(tone_id, hate_id, search, limit=chunk_size, after_id=after_id)
+        if not rows:
+            return
+        yield from rows
+        after_id = rows[-1]["id"]
+
+
+# Группировки get_comment_distribution: колонка comment_stats и справочник названий
+_STATS_GROUPS = {
+    "tone": (CommentStats.tone_id, Tone),
+    "hate": (CommentStats.hate_id, Hate),
+    "source": (CommentStats.source, None),
+    "day": (CommentStats.day, None),
+    "total": (None, None),
+}
+
+
+def get_comment_distribution(by="tone", source=None, tone_id=None, hate_id=None, day_from=None, day_to=None):
+    """Число комментариев по группам из агрегатов comment_stats (без обращения к comment).
+
+    by - "tone" или "hate" (ключи - названия), "source", "day" (ГГГГ-ММ-ДД) или "total" (ключ "total").
+    day_from/day_to - границы включительно, строки ГГГГ-ММ-ДД или date.
+    Возвращает словарь {группа: количество}, упорядоченный по группе.
+    """
+    column, names = _STATS_GROUPS[by]
+    total = fn.SUM(CommentStats.count)
+    if column is None:
+        query = CommentStats.select(SQL("'total'"), total)
+    elif names is not None:
+        query = (CommentStats
+                 .select(names.name, total)
+                 .join(names, on=(column == names.id))
+                 .group_by(names.id)
+                 .order_by(names.id))
+    else:
+        query = CommentStats.select(column, total).group_by(column).order_by(column)
+
+    if source is not None:
+        query = query.where(CommentStats.source == source)
+    if tone_id is not None:
+        query = query.where(CommentStats.tone_id == tone_id)
+    if hate_id is not None:
+        query = query.where(CommentStats.hate_id == hate_id)
+    if day_from is not None:
+        query = query.where(CommentStats.day >= str(day_from))
+    if day_to is not None:
+        query = query.where(CommentStats.day <= str(day_to))
+
+    return {group: count for group, count in query.tuples() if count}
+
+
+def get_prediction_cache_size():
+    """Количество записей в кэше предсказаний"""
+    return PredictionCache.select().count()
+
+
+def create_search_index():
+    """Создает полнотекстовый индекс и триггеры синхронизации; при первом создании индексирует уже сохраненные комментарии"""
+    created = not CommentSearch.table_exists()
+    with db.atomic():
+        CommentSearch.create_table()
+        for trigger in SEARCH_TRIGGERS:
+            db.execute_sql(trigger)
+        if created:
+            CommentSearch.rebuild()
+
+
+def create_comment_stats():
+    """Создает таблицу агрегатов и триггеры; при первом создании заполняет ее по уже сохраненным комментариям"""
+    created = not CommentStats.table_exists()
+    with db.atomic():
+        CommentStats.create_table()
+        for trigger in STATS_TRIGGERS:
+            db.execute_sql(trigger)
+        if created:
+            db.execute_sql(
+                """INSERT INTO comment_stats(day, source, tone_id, hate_id, count)
+                SELECT coalesce(date(created_at), ''), coalesce(source, ''), tone_id, hate_id, COUNT(*)
+                FROM comment GROUP BY 1, 2, 3, 4"""
+            )
 
 
 def populate_db():
     """Заполняет базу данных начальными данными, если они отсутствуют"""
-    db.create_tables([Tone, Hate, Comment])
+    apply_migrations(db)
+    db.create_tables([Tone, Hate, Comment, PredictionCache, ScrapeCheckpoint])
+    create_search_index()
+    create_comment_stats()
 
     tones = ["Оскорбление", "Нейтральное", "Позитивное"]
     hates = ["Отсутствие оскарбления", "Ксенофобия", "Гомофобия", "Cексизм", "Лукизм", "Другое"]
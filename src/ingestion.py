@@ -0,0 +1,251 @@
+import codecs
+import csv
+import io
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+import pandas as pd
+
+# Потоковое чтение входных файлов (CSV, XLSX, JSONL, Parquet) окнами DataFrame.
+# Формат и кодировка определяются один раз по началу файла, после чего файл читается
+# за один проход, не загружаясь в память целиком. Источник - путь или двоичный
+# файловый объект с seek (например, загруженный в Streamlit файл).
+
+INPUT_FORMATS = ("csv", "xlsx", "jsonl", "parquet")
+
+# Сколько байт начала файла используется для определения формата, кодировки и разделителя
+SNIFF_BYTES = 64 * 1024
+
+# Кодировки-кандидаты для файлов без BOM, которые не декодируются как UTF-8
+FALLBACK_ENCODINGS = ("cp1251", "koi8-r")
+# Самые частые строчные буквы русского текста: по их доле выбирается однобайтовая кодировка
+_FREQUENT_CYRILLIC = set("оеаинтсрвлкмдпу")
+
+# Разделитель для CSV из одной колонки: с запятой тексты вида «Привет, мир» разбивались бы на поля
+SINGLE_COLUMN_DELIMITER = "\x00"
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+@dataclass
+class SourceInfo:
+    """Результат определения формата входного файла"""
+    format: str
+    encoding: Optional[str] = None
+    # Разделитель колонок CSV
+    delimiter: str = ","
+
+
+def format_from_extension(path: str) -> Optional[str]:
+    """Формат по расширению файла (None, если расширение неизвестно)"""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("json", "ndjson"):
+        return "jsonl"
+    return extension if extension in INPUT_FORMATS else None
+
+
+def _read_head(source, size=SNIFF_BYTES) -> bytes:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read(size)
+    position = source.tell()
+    try:
+        return source.read(size)
+    finally:
+        source.seek(position)
+
+
+def detect_encoding(head: bytes) -> str:
+    """Кодировка текста по его началу: BOM, затем UTF-8, затем однобайтовые кириллические кодировки"""
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+
+    try:
+        head.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError as e:
+        # Ошибка только в последних байтах - обрезанный на границе выборки многобайтовый символ
+        if e.start >= len(head) - 3 and e.reason == "unexpected end of data":
+            return "utf-8"
+
+    def score(encoding):
+        text = head.decode(encoding, errors="replace")
+        return sum(char in _FREQUENT_CYRILLIC for char in text)
+
+    return max(FALLBACK_ENCODINGS, key=score)
+
+
+def _detect_delimiter(text: str) -> str:
+    lines = text.splitlines()
+    # Кандидаты - только символы из строки заголовка: в файле из одной колонки
+    # запятые и точки с запятой внутри текстов не должны приниматься за разделитель
+    candidates = "".join(char for char in ",;\t|" if lines and char in lines[0])
+    if not candidates:
+        # Одна колонка: файл читается с разделителем, которого нет в текстах
+        return SINGLE_COLUMN_DELIMITER
+    if len(candidates) == 1:
+        return candidates
+    # Последняя строка выборки может быть обрезана
+    try:
+        return csv.Sniffer().sniff("\n".join(lines[:50]), delimiters=candidates).delimiter
+    except csv.Error:
+        return candidates[0]
+
+
+def sniff(source, name: Optional[str] = None) -> SourceInfo:
+    """Определяет формат, кодировку и разделитель CSV по началу файла.
+
+    name - имя файла (для файловых объектов): расширение используется, если содержимое
+    не позволяет однозначно определить формат.
+    """
+    head = _read_head(source)
+    if head.startswith(b"PK\x03\x04"):
+        return SourceInfo("xlsx")
+    if head.startswith(b"PAR1"):
+        return SourceInfo("parquet")
+
+    encoding = detect_encoding(head)
+    text = head.decode(encoding, errors="replace").lstrip("\ufeff")
+    if text.lstrip().startswith("{") or format_from_extension(name or str(source)) == "jsonl":
+        return SourceInfo("jsonl", encoding)
+    return SourceInfo("csv", encoding, _detect_delimiter(text))
+
+
+def count_rows(source, info: SourceInfo) -> Optional[int]:
+    """Количество записей без чтения данных в память (для прогресс-бара). None, если неизвестно.
+
+    Для CSV и JSONL считаются переводы строк, поэтому значения с переносами внутри кавычек
+    немного завышают результат.
+    """
+    if info.format == "parquet":
+        import pyarrow.parquet as pq
+        with _open_binary(source) as f:
+            return pq.ParquetFile(f).metadata.num_rows
+    if info.format == "xlsx":
+        from openpyxl import load_workbook
+
+        # openpyxl проверяет расширение пути, поэтому передается открытый файл
+        with _open_binary(source) as f:
+            workbook = load_workbook(f, read_only=True)
+            try:
+                rows = workbook.active.max_row
+            finally:
+                workbook.close()
+        # Первая строка - заголовок
+        return None if rows is None else max(rows - 1, 0)
+
+    rows = 0
+    with _open_binary(source) as f:
+        if info.encoding == "utf-16":
+            text = io.TextIOWrapper(f, encoding=info.encoding, errors="replace", newline="")
+            try:
+                rows = sum(1 for _ in text)
+            finally:
+                text.detach()
+        else:
+            # Во всех остальных поддерживаемых кодировках перевод строки - один байт \n
+            while block := f.read(1024 * 1024):
+                rows += block.count(b"\n")
+    # У CSV первая строка - заголовок
+    return max(rows - 1, 0) if info.format == "csv" else rows
+
+
+@contextmanager
+def _open_binary(source):
+    """Двоичный файл источника с начала; файловый объект не закрывается, а перематывается"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield f
+        return
+
+    source.seek(0)
+    try:
+        yield source
+    finally:
+        source.seek(0)
+
+
+def _read_xlsx(source, chunk_size) -> Iterator[pd.DataFrame]:
+    from openpyxl import load_workbook
+
+    with _open_binary(source) as f:
+        # read_only: строки листа читаются из XML потоком, а не загружаются целиком
+        workbook = load_workbook(f, read_only=True, data_only=True)
+        try:
+            yield from _iter_sheet_chunks(workbook.active, chunk_size)
+        finally:
+            workbook.close()
+
+
+def _iter_sheet_chunks(sheet, chunk_size) -> Iterator[pd.DataFrame]:
+    rows = sheet.iter_rows(values_only=True)
+    header = next(rows, None)
+    if header is None:
+        return
+    columns = [str(value) if value is not None else f"column_{i}" for i, value in enumerate(header)]
+
+    batch = []
+    for row in rows:
+        if all(value is None for value in row):
+            continue
+        # Строки листа могут быть короче или длиннее заголовка
+        batch.append((tuple(row) + (None,) * len(columns))[:len(columns)])
+        if len(batch) >= chunk_size:
+            yield pd.DataFrame(batch, columns=columns)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch, columns=columns)
+
+
+def _read_parquet(source, chunk_size) -> Iterator[pd.DataFrame]:
+    import pyarrow.parquet as pq
+
+    with _open_binary(source) as f:
+        for batch in pq.ParquetFile(f).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+
+
+def _read_text(source, info: SourceInfo, chunk_size) -> Iterator[pd.DataFrame]:
+    with _open_binary(source) as f:
+        # Некорректные байты заменяются, а не прерывают чтение на середине файла
+        text = io.TextIOWrapper(f, encoding=info.encoding or "utf-8", errors="replace", newline="")
+        try:
+            if info.format == "jsonl":
+                yield from pd.read_json(text, lines=True, chunksize=chunk_size)
+            else:
+                yield from pd.read_csv(text, sep=info.delimiter, chunksize=chunk_size,
+                                       skip_blank_lines=True, skipinitialspace=True)
+        finally:
+            # Закрытие обертки закрыло бы и исходный файл
+            text.detach()
+
+
+def read_chunks(source, chunk_size: int, info: Optional[SourceInfo] = None,
+                column: str = "sentence") -> Iterator[pd.DataFrame]:
+    """Читает файл окнами по chunk_size строк.
+
+    info - результат sniff (если не передан, определяется здесь); column - колонка с текстом,
+    в окнах она переименовывается в sentence.
+    """
+    info = info or sniff(source)
+    if info.format not in INPUT_FORMATS:
+        raise ValueError(f"Неизвестный формат файла: {info.format}. Поддерживаются: {', '.join(INPUT_FORMATS)}")
+
+    if info.format == "xlsx":
+        chunks = _read_xlsx(source, chunk_size)
+    elif info.format == "parquet":
+        chunks = _read_parquet(source, chunk_size)
+    else:
+        chunks = _read_text(source, info, chunk_size)
+
+    for chunk in chunks:
+        if column != "sentence":
+            chunk = chunk.rename(columns={column: "sentence"})
+        yield chunk
@@ -1,9 +1,14 @@
 import streamlit as st
-from config import load_settings, ensure_secrets_file_exists
+from config import load_settings, ensure_secrets_file_exists, get_inference_settings
+from algorithms.model_loader import start_model_loading
 
 # Создаем файл secrets.toml если он не существует (автоматически при первом запуске)
 ensure_secrets_file_exists()
 
+# Модели загружаются в фоновом потоке с первого запуска приложения,
+# пока пользователь выбирает источник данных (повторные вызовы ничего не делают)
+model_loader = start_model_loading(*get_inference_settings())
+
 # Инициализация session_state
 if "file" not in st.session_state:
     st.session_state.file = None
@@ -14,6 +19,15 @@ if "is_need_to_process_data" not in st.session_state:
 
 st.logo("static/logo.jpg", size="large")
 
+# Готовность моделей
+loader_status = model_loader.status()
+if loader_status.state == "ready":
+    st.sidebar.caption(f"✅ Модели готовы (загрузка {loader_status.seconds:.1f} с)")
+elif loader_status.state == "error":
+    st.sidebar.caption(f"❌ Ошибка загрузки моделей: {loader_status.error}")
+else:
+    st.sidebar.caption(f"⏳ Модели загружаются... ({loader_status.elapsed:.0f} с)")
+
 tone_page = st.Page("pages/tone_page.py", title="Анализ тональности")
 data_source_page = st.Page("pages/data_source_page.py", title="Источник данных")
 settings_page = st.Page("pages/settings_page.py", title="⚙️ Настройки")
@@ -1,61 +1,46 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-from db.models import db, Tone, Hate, Comment, BaseModel
-from peewee import *
+from db.models import Tone, Hate, count_comments, get_comments_page, iter_comments, search_comments
 
-def get_analyzed_data_with_filter(page=1, page_size=50, search_term="", filter_column=""):
-    """Получает проанализированные данные с пагинацией и фильтрацией"""
+# Фильтры, поиск и пагинация выполняются в SQL: в память загружается только текущая страница
+
+
+def get_filter_options(model):
+    """Словарь {название: id} тональностей или категорий ненависти"""
+    return {row.name: row.id for row in model.select().order_by(model.id)}
+
+
+def get_analyzed_data_with_filter(page=1, page_size=50, tone_id=None, hate_id=None, search_term="",
+                                  after_id=None):
+    """Получает страницу проанализированных данных и общее число записей под фильтрами.
+
+    С поиском по тексту записи упорядочены по релевантности (полнотекстовый индекс), а в колонке
+    text - фрагмент с найденными словами. Без поиска - по id; after_id - id последней записи
+    предыдущей страницы (пагинация по ключу вместо OFFSET).
+    """
     try:
-        conn = sqlite3.connect("tone_analysis.db")
-        
-        # Базовый запрос для подсчета
-        count_query = """
-        SELECT COUNT(*) as count 
-        FROM comment c
-        LEFT JOIN tone t ON c.tone_id = t.id
-        LEFT JOIN hate h ON c.hate_id = h.id
-        """
-        
-        # Базовый запрос для данных
-        base_query = """
-        SELECT c.id, c.text, t.name as tone_name, h.name as hate_name
-        FROM comment c
-        LEFT JOIN tone t ON c.tone_id = t.id
-        LEFT JOIN hate h ON c.hate_id = h.id
-        """
-        
-        # Добавляем фильтрацию
-        if search_term and filter_column:
-            if filter_column == "text":
-                where_clause = f"WHERE c.text LIKE '%{search_term}%'"
-            elif filter_column == "tone_name":
-                where_clause = f"WHERE t.name LIKE '%{search_term}%'"
-            elif filter_column == "hate_name":
-                where_clause = f"WHERE h.name LIKE '%{search_term}%'"
-            else:
-                where_clause = ""
+        total_count = count_comments(tone_id, hate_id, search_term)
+        if search_term:
+            rows = [dict(row, text=row["snippet"]) for row in search_comments(
+                search_term, tone_id, hate_id, limit=page_size, offset=(page - 1) * page_size,
+                highlight=("[", "]"))]
         else:
-            where_clause = ""
-        
-        # Получаем общее количество записей с фильтром
-        if where_clause:
-            count_query = f"{count_query} {where_clause}"
-        
-        count_result = pd.read_sql_query(count_query, conn)
-        total_count = int(count_result.iloc[0]['count'])
-        
-        # Получаем данные с пагинацией и фильтром
-        query = f"{base_query} {where_clause} LIMIT {page_size} OFFSET {(page - 1) * page_size}"
-        df = pd.read_sql_query(query, conn)
-        
-        conn.close()
-        
+            rows = get_comments_page(tone_id, hate_id, limit=page_size,
+                                     offset=(page - 1) * page_size, after_id=after_id)
+        df = pd.DataFrame(rows, columns=["id", "text", "tone_name", "hate_name"])
         return df, total_count
     except Exception as e:
         st.error(f"Ошибка при получении проанализированных данных: {e}")
         return None, 0
 
+
+def export_filtered_csv(tone_id=None, hate_id=None, search_term=""):
+    """CSV со всеми записями под фильтрами (читается из базы частями)"""
+    df = pd.DataFrame(iter_comments(tone_id, hate_id, search_term),
+                      columns=["id", "text", "tone_name", "hate_name"])
+    return df.to_csv(index=False)
+
+
 def main():
     st.title("📊 Проанализированные данные")
     
@@ -79,74 +64,93 @@ def main():
     # Фильтры для данных
     st.markdown("#### 🔍 Фильтры:")
     
+    try:
+        tone_options = get_filter_options(Tone)
+        hate_options = get_filter_options(Hate)
+    except Exception as e:
+        st.error(f"Ошибка при получении справочников: {e}")
+        return
+    
     col1, col2 = st.columns(2)
     
     with col1:
         tone_filter = st.selectbox(
             "Фильтр по тональности:",
-            ["Все"] + ["Оскорбление", "Нейтральное", "Позитивное"],
+            ["Все"] + list(tone_options),
             key="tone_filter_analyzed"
         )
     
     with col2:
         hate_filter = st.selectbox(
             "Фильтр по категории ненависти:",
-            ["Все"] + ["Отсутствие оскарбления", "Ксенофобия", "Гомофобия", "Cексизм", "Лукизм", "Другое"],
+            ["Все"] + list(hate_options),
             key="hate_filter_analyzed"
         )
     
+    search_term = st.text_input(
+        "Поиск по тексту:",
+        key="search_analyzed",
+        help="Ищутся комментарии, содержащие все слова запроса (слова могут быть началом более длинных слов)"
+    ).strip()
+    
+    tone_id = tone_options.get(tone_filter)
+    hate_id = hate_options.get(hate_filter)
+    
+    # При смене фильтров возвращаемся на первую страницу и сбрасываем ключи страниц
+    filter_signature = (tone_id, hate_id, search_term, page_size)
+    if st.session_state.get("filters_analyzed") != filter_signature:
+        st.session_state["filters_analyzed"] = filter_signature
+        st.session_state["page_analyzed"] = 1
+        st.session_state["page_cursors_analyzed"] = {}
+    
     # Получаем данные
     current_page = st.session_state["page_analyzed"]
+    # {номер страницы: id последней записи}: соседние страницы выбираются по ключу, остальные - через OFFSET
+    page_cursors = st.session_state["page_cursors_analyzed"]
     
     try:
         df, total_count = get_analyzed_data_with_filter(
-            page=1,  # Всегда получаем все данные
-            page_size=999999,  # Большое число чтобы получить все данные
-            search_term="",
-            filter_column=""
+            page=current_page,
+            page_size=page_size,
+            tone_id=tone_id,
+            hate_id=hate_id,
+            search_term=search_term,
+            after_id=page_cursors.get(current_page - 1)
         )
         
         if df is not None and not df.empty:
-            # Применяем фильтры ко всем данным
-            filtered_df = df.copy()
-            
-            if tone_filter != "Все":
-                filtered_df = filtered_df[filtered_df['tone_name'] == tone_filter]
-            
-            if hate_filter != "Все":
-                filtered_df = filtered_df[filtered_df['hate_name'] == hate_filter]
-            
-            # Применяем пагинацию к отфильтрованным данным
-            start_idx = (current_page - 1) * page_size
-            end_idx = start_idx + page_size
-            paginated_df = filtered_df.iloc[start_idx:end_idx]
+            if not search_term:
+                page_cursors[current_page] = int(df["id"].iloc[-1])
             
             # Показываем информацию о пагинации
-            total_pages = max(1, (len(filtered_df) + page_size - 1) // page_size)
+            total_pages = max(1, (total_count + page_size - 1) // page_size)
             
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("Всего записей", len(filtered_df))
+                st.metric("Всего записей", total_count)
             with col2:
-                st.metric("Записей на странице", len(paginated_df))
+                st.metric("Записей на странице", len(df))
             with col3:
                 st.metric("Всего страниц", total_pages)
             
             # Показываем информацию о фильтрах
-            if tone_filter != "Все" or hate_filter != "Все":
+            if tone_filter != "Все" or hate_filter != "Все" or search_term:
                 filter_info = []
                 if tone_filter != "Все":
                     filter_info.append(f"Тональность: {tone_filter}")
                 if hate_filter != "Все":
                     filter_info.append(f"Категория: {hate_filter}")
+                if search_term:
+                    filter_info.append(f"Текст: «{search_term}»")
                 st.info(f"🔍 Применены фильтры: {', '.join(filter_info)}")
             
             # Показываем данные
             st.markdown("#### 📋 Проанализированные комментарии:")
             
             # Ограничиваем отображение текста для больших полей
-            df_display = paginated_df.copy()
-            df_display['text'] = df_display['text'].apply(lambda x: x[:100] + "..." if len(str(x)) > 100 else x)
+            df_display = df.copy()
+            if not search_term:
+                df_display['text'] = df_display['text'].apply(lambda x: x[:100] + "..." if len(str(x)) > 100 else x)
             
             # Переименовываем колонки для лучшего отображения
             df_display = df_display.rename(columns={
@@ -191,17 +195,28 @@ def main():
                 # Показываем текущую страницу
                 st.info(f"Страница {current_page} из {total_pages}")
             
-            # Кнопка для экспорта данных (экспортируем все отфильтрованные данные)
-            csv = filtered_df.to_csv(index=False)
-            st.download_button(
-                label="📥 Скачать данные (CSV)",
-                data=csv,
-                file_name="analyzed_data.csv",
-                mime="text/csv",
-                key="download_analyzed"
-            )
+            # Экспорт всех отфильтрованных данных: CSV собирается только по запросу
+            if st.button("📄 Подготовить CSV", key="prepare_csv_analyzed"):
+                st.session_state["csv_analyzed"] = (filter_signature, export_filtered_csv(tone_id, hate_id, search_term))
+            
+            prepared = st.session_state.get("csv_analyzed")
+            if prepared and prepared[0] == filter_signature:
+                st.download_button(
+                    label="📥 Скачать данные (CSV)",
+                    data=prepared[1],
+                    file_name="analyzed_data.csv",
+                    mime="text/csv",
+                    key="download_analyzed"
+                )
         
-        elif df is not None and df.empty:
+        elif df is not None and total_count > 0 and current_page > 1:
+            # Страница за пределами выборки (например, после удаления данных)
+            st.session_state["page_analyzed"] = 1
+            st.session_state["page_cursors_analyzed"] = {}
+            st.rerun()
+        elif df is not None and (tone_id is not None or hate_id is not None or search_term):
+            st.info("Нет записей, подходящих под фильтры.")
+        elif df is not None:
             st.info("Проанализированных данных пока нет.")
         else:
             st.error("Не удалось загрузить проанализированные данные.")
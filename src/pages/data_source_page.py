@@ -1,9 +1,34 @@
 import streamlit as st
 import pandas as pd
 import asyncio
+from algorithms.pipeline import ScrapePipeline
 from comment_parsers import YouTubeCommentParser, TelegramCommentParser, Comment
 from config import get_setting
 
+
+def analyze_pipeline(pipeline, parser):
+    """Классифицирует комментарии из конвейера парсера по мере поступления.
+
+    Возвращает DataFrame с результатами или None, если парсер не получил комментариев.
+    Отметки инкрементального парсинга сохраняются, только когда все комментарии записаны в базу.
+    """
+    # Импорт дожидается загрузки моделей (algorithms/tone.py)
+    from algorithms.tone import predict_chunks
+
+    df = predict_chunks(pipeline, allow_empty=True)
+    if df is None or ("comment_id" in df.columns and df["comment_id"].notna().all()):
+        parser.commit_checkpoints()
+    else:
+        st.warning("Не все комментарии сохранены в базу: следующий запуск загрузит их снова")
+    if df is not None:
+        df.attrs["pipeline_stats"] = {
+            "received": pipeline.received,
+            "batches": pipeline.batches,
+            "producer_wait": pipeline.producer_wait,
+        }
+    return df
+
+
 placeholder_container = st.empty()
 
 # Глобальные переменные для кода подтверждения
@@ -31,9 +56,9 @@ with placeholder_container.container():
     tab1, tab2, tab3 = st.tabs(["Загрузка файла", "YouTube парсинг", "Telegram парсинг"])
 
     with tab1:
-        st.subheader("Загрузить CSV или XLSX файл")
+        st.subheader("Загрузить файл CSV, XLSX, JSONL или Parquet")
         uploaded_file = st.file_uploader(
-                "Выберите файл", accept_multiple_files=False, type={"csv", "xlsx"}
+                "Выберите файл", accept_multiple_files=False, type={"csv", "xlsx", "jsonl", "json", "parquet"}
         )
         file = uploaded_file if uploaded_file is not None else st.session_state.file
         
@@ -53,6 +78,12 @@ with placeholder_container.container():
             st.warning("⚠️ YouTube API ключ не настроен!")
             st.info("Перейдите на страницу '⚙️ Настройки' для настройки YouTube API ключа.")
         else:
+            youtube_incremental = st.checkbox(
+                "Загружать только новые комментарии",
+                value=True,
+                key="youtube_incremental",
+                help="Пропускать комментарии, загруженные в прошлые запуски"
+            )
             
             if st.button("Парсить комментарии из YouTube трендов"):
                 try:
@@ -66,39 +97,19 @@ with placeholder_container.container():
                         
                         st.info(f"API ключ валиден: {youtube_api_key[:10]}...")
                         
-                        parser = YouTubeCommentParser(youtube_api_key)
-                        comments = parser.fetch_comments()
+                        parser = YouTubeCommentParser(youtube_api_key, incremental=youtube_incremental)
+                        # Комментарии классифицируются и сохраняются по мере загрузки
+                        pipeline = ScrapePipeline(parser.fetch_comments)
+                        df = analyze_pipeline(pipeline, parser)
                         
-                        if comments:
-                            # Конвертируем в DataFrame
-                            data = []
-                            for comment in comments:
-                                data.append({
-                                    'text': comment.text,
-                                    'author': comment.author,
-                                    'timestamp': comment.timestamp,
-                                    'source': comment.source,
-                                    'video_id': comment.metadata.get('video_id', ''),
-                                    'like_count': comment.metadata.get('like_count', 0)
-                                })
-                            
-                            df = pd.DataFrame(data)
-                            # Переименовываем колонку text в sentence для совместимости с алгоритмом
-                            df = df.rename(columns={'text': 'sentence'})
+                        if df is not None:
+                            st.success(f"✅ Получено и проанализировано {pipeline.received} комментариев из YouTube")
                             
-                            # Отладочная информация
-                            st.success(f"✅ Получено {len(comments)} комментариев из YouTube")
-                            st.info(f"DataFrame создан: {df.shape}")
-                            st.info(f"Колонки: {list(df.columns)}")
-                            
-                            # Сохраняем в session_state
+                            # Сохраняем результаты анализа в session_state
                             st.session_state.data_for_tone = df
-                            st.session_state.is_need_to_process_data = True
+                            st.session_state.is_need_to_process_data = False
                             
-                            st.toast(f"Данные сохранены в session_state (размер: {len(df)} записей)")
-
-                            # Переходим к обработке данных
-                            st.info("Переходим к анализу тональности...")
+                            # Переходим к результатам анализа
                             st.rerun()
                             
                         else:
@@ -173,6 +184,13 @@ with placeholder_container.container():
                 st.error("Введите корректное число")
                 st.stop()
             
+            telegram_incremental = st.checkbox(
+                "Загружать только новые комментарии",
+                value=True,
+                key="telegram_incremental_input",
+                help="Запрашивать только комментарии, появившиеся после прошлого запуска"
+            )
+            
             # Проверяем обязательные поля в зависимости от типа подключения
             required_fields_valid = (
                 channels and
@@ -192,6 +210,7 @@ with placeholder_container.container():
                     st.session_state.telegram_api_hash = telegram_api_hash
                     st.session_state.telegram_phone = phone
                     st.session_state.telegram_bot_token = bot_token
+                    st.session_state.telegram_incremental = telegram_incremental
                     
                     # Устанавливаем флаг для скрытия полей ввода
                     st.session_state.show_parsing = True
@@ -273,47 +292,29 @@ with placeholder_container.container():
                     posts_limit=parser_posts_limit,
                     phone=parser_phone,
                     bot_token=parser_bot_token,
-                    verification_code=verification_code
+                    verification_code=verification_code,
+                    incremental=st.session_state.get('telegram_incremental', False)
                 )
                 
-                status_text.text("Получение комментариев...")
+                status_text.text("Получение и анализ комментариев...")
                 progress_bar.progress(50)
                 
                 try:
-                    comments = parser.fetch_comments()
+                    # Комментарии классифицируются и сохраняются по мере загрузки
+                    pipeline = ScrapePipeline(parser.fetch_comments)
+                    df = analyze_pipeline(pipeline, parser)
                     
-                    if comments:
-                        status_text.text("Обработка результатов...")
-                        progress_bar.progress(80)
-                        
-                        # Конвертируем в DataFrame
-                        data = []
-                        for comment in comments:
-                            data.append({
-                                'text': comment.text,
-                                'author': comment.author,
-                                'timestamp': comment.timestamp,
-                                'source': comment.source,
-                                'channel': comment.metadata.get('channel', ''),
-                                'post_id': comment.metadata.get('post_id', ''),
-                                'views': comment.metadata.get('views', 0)
-                            })
-                        
-                        df = pd.DataFrame(data)
-                        # Переименовываем колонку text в sentence для совместимости с алгоритмом
-                        df = df.rename(columns={'text': 'sentence'})
-                        
+                    if df is not None:
                         status_text.text("Завершение...")
                         progress_bar.progress(100)
                         
-                        st.success(f"✅ Получено {len(comments)} комментариев из Telegram")
+                        st.success(f"✅ Получено и проанализировано {pipeline.received} комментариев из Telegram")
                         
-                        # Сохраняем в session_state
+                        # Сохраняем результаты анализа в session_state
                         st.session_state.data_for_tone = df
-                        st.session_state.is_need_to_process_data = True
+                        st.session_state.is_need_to_process_data = False
                         
-                        # Переходим к обработке данных
-                        st.info("Переходим к анализу тональности...")
+                        # Переходим к результатам анализа
                         st.session_state.show_parsing = False
                         st.rerun()
                         
@@ -1,9 +1,14 @@
 import streamlit as st
 import sqlite3
 import pandas as pd
-from db.models import db, Tone, Hate, Comment, BaseModel
+from db.models import db, Tone, Hate, Comment, BaseModel, count_comments
 from peewee import *
 
+# Таблицы, число строк которых берется из агрегатов, а не через COUNT(*)
+AGGREGATED_ROW_COUNTS = {
+    "comment": count_comments,
+}
+
 def get_database_info():
     """Получает информацию о структуре базы данных"""
     try:
@@ -12,8 +17,13 @@ def get_database_info():
         cursor = conn.cursor()
         
         # Получаем список таблиц
-        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-        tables = cursor.fetchall()
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type='table';")
+        rows = cursor.fetchall()
+        
+        # Полнотекстовый индекс и его служебные таблицы не показываем
+        virtual_tables = [name for name, sql in rows if sql and sql.startswith("CREATE VIRTUAL TABLE")]
+        tables = [(name,) for name, sql in rows
+                  if not any(name == vt or name.startswith(f"{vt}_") for vt in virtual_tables)]
         
         database_info = {}
         
@@ -25,8 +35,11 @@ def get_database_info():
             columns = cursor.fetchall()
             
             # Получаем количество записей в таблице
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
-            row_count = cursor.fetchone()[0]
+            if table_name in AGGREGATED_ROW_COUNTS:
+                row_count = AGGREGATED_ROW_COUNTS[table_name]()
+            else:
+                cursor.execute(f"SELECT COUNT(*) FROM {table_name};")
+                row_count = cursor.fetchone()[0]
             
             # Получаем информацию о внешних ключах
             cursor.execute(f"PRAGMA foreign_key_list({table_name});")
@@ -157,7 +170,14 @@ if database_info:
     ├── id (Primary Key)
     ├── text (Текст комментария)
     ├── tone_id (Foreign Key → Tone.id)
-    └── hate_id (Foreign Key → Hate.id)
+    ├── hate_id (Foreign Key → Hate.id)
+    ├── source, external_id (Источник и id комментария в нем)
+    ├── created_at (Время сохранения)
+    ├── model_version, text_hash (Версия моделей и хэш текста)
+    └── cluster_hash (Хэш представителя кластера повторов)
+    
+    CommentStats (Агрегаты, обновляются триггерами)
+    └── day, source, tone_id, hate_id → count
     ```
     """)
     
@@ -167,6 +187,7 @@ if database_info:
     - Каждый комментарий связан с одной категорией ненависти (hate_id)
     - Одна тональность может иметь множество комментариев
     - Одна категория ненависти может иметь множество комментариев
+    - Таблица comment_stats хранит число комментариев по дням, источникам, тональностям и категориям
     """)
     
 else:
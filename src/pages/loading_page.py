@@ -1,6 +1,12 @@
-import pandas as pd
+import time
+
 import streamlit as st
 
+from algorithms.model_loader import start_model_loading
+from config import get_inference_settings
+from ingestion import count_rows, read_chunks, sniff
+
+
 placeholder = st.empty()
 
 st.image("static/loading.gif")
@@ -18,7 +24,18 @@ with placeholder.container(border=True) as container:
     text_container = st.empty()
     text_container.write("Подготовка моделей...")
 
-    from algorithms.tone import predict
+    # Модели загружаются в фоне с запуска приложения - дожидаемся готовности
+    model_loader = start_model_loading(*get_inference_settings())
+    while (loader_status := model_loader.status()).state == "loading":
+        text_container.write(f"Подготовка моделей... ({loader_status.elapsed:.0f} с)")
+        time.sleep(0.5)
+
+    if loader_status.state == "error":
+        st.error(f"Критическая ошибка при загрузке моделей: {loader_status.error}")
+        st.error("Проверьте наличие файлов моделей в папке models/")
+        st.stop()
+
+    from algorithms.tone import predict, predict_chunks, CHUNK_SIZE
 
     st.toast("Подготовка моделей завершена!")
 
@@ -34,15 +51,20 @@ with placeholder.container(border=True) as container:
             st.error("Данные не найдены. Пожалуйста, загрузите файл или используйте парсинг на странице 'Источник данных'.")
             st.stop()
             
-        try:
-            df = pd.read_csv(st.session_state.file, header=0, skip_blank_lines=True,
-                             skipinitialspace=True, encoding='latin-1')
-        except:
-            df = pd.read_excel(st.session_state.file, header=0)
-
         text_container.empty()
         text_container.write("Обработка данных для анализа тональности...")
-        st.session_state.data_for_tone = predict(df)
+
+        # Формат и кодировка определяются по содержимому, файл читается и классифицируется
+        # окнами, без загрузки всего файла в память
+        file = st.session_state.file
+        try:
+            source_info = sniff(file, name=file.name)
+            total_rows = count_rows(file, source_info)
+        except Exception as e:
+            st.error(f"Не удалось прочитать файл {file.name}: {e}")
+            st.stop()
+        chunks = read_chunks(file, CHUNK_SIZE, source_info)
+        st.session_state.data_for_tone = predict_chunks(chunks, total_rows=total_rows)
 
 st.session_state.is_need_to_process_data = False
 st.rerun()
@@ -1,5 +1,7 @@
+import pandas as pd
 import streamlit as st
 from config import save_settings, get_environment_info, get_setting
+from algorithms.model_loader import read_startup_history
 
 def clean_input(text):
     """Удаляет все пробелы из введенного текста"""
@@ -139,4 +141,22 @@ with col2:
     if phone:
         st.write("✅ Номер телефона установлен")
     else:
-        st.write("❌ Номер телефона не установлен") 
\ No newline at end of file
+        st.write("❌ Номер телефона не установлен") 
+
+# Время загрузки моделей при последних запусках (для отслеживания регрессий)
+st.markdown("### Запуск моделей")
+startup_history = read_startup_history()
+if startup_history:
+    history_df = pd.DataFrame(startup_history)
+    history_df["stages"] = history_df["stages"].map(
+        lambda stages: ", ".join(f"{name}: {seconds:.1f} с" for name, seconds in stages.items())
+    )
+    st.dataframe(
+        history_df.iloc[::-1].rename(columns={
+            "timestamp": "Время", "backend": "Бэкенд", "workers": "Процессов",
+            "device": "Устройство", "gpu": "GPU", "seconds": "Загрузка, с", "stages": "Этапы"
+        }),
+        hide_index=True
+    )
+else:
+    st.write("Модели еще не загружались")
@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+from db.models import count_comments, get_comment_distribution, get_prediction_cache_size
 
 st.header("Анализ тональности")
 
@@ -65,6 +66,50 @@ with col3:
     else:
         st.metric("Классификация", "Не обработано")
 
+# Показываем статистику кэша предсказаний
+cache_stats = data.attrs.get("cache_stats")
+if cache_stats:
+    st.subheader("Кэш предсказаний")
+    col1, col2, col3, col4 = st.columns(4)
+
+    with col1:
+        st.metric("Попаданий", cache_stats["hits"])
+
+    with col2:
+        st.metric("Промахов", cache_stats["misses"])
+
+    with col3:
+        total = cache_stats["hits"] + cache_stats["misses"]
+        st.metric("Доля попаданий", f"{cache_stats['hits'] / total:.0%}" if total else "—")
+
+    with col4:
+        st.metric("Записей в кэше", get_prediction_cache_size())
+
+# Показываем статистику конвейера «парсинг -> анализ»
+pipeline_stats = data.attrs.get("pipeline_stats")
+if pipeline_stats:
+    st.caption(f"Комментарии классифицировались по мере загрузки: {pipeline_stats['received']} комментариев "
+               f"в {pipeline_stats['batches']} микробатчах, парсер ожидал анализа "
+               f"{pipeline_stats['producer_wait']:.1f} с")
+
+# Показываем статистику схлопывания повторов
+dedup_stats = data.attrs.get("dedup_stats")
+if dedup_stats:
+    st.subheader("Повторы и близкие дубликаты")
+    col1, col2, col3 = st.columns(3)
+
+    with col1:
+        st.metric("Уникальных текстов (кластеров)", dedup_stats["clusters"])
+
+    with col2:
+        st.metric("Дубликатов", dedup_stats["exact"] + dedup_stats["near"],
+                  help=f"Точных: {dedup_stats['exact']}, близких: {dedup_stats['near']}")
+
+    with col3:
+        rows = dedup_stats["rows"]
+        duplicates = dedup_stats["exact"] + dedup_stats["near"]
+        st.metric("Доля дубликатов", f"{duplicates / rows:.0%}" if rows else "—")
+
 # Показываем данные
 st.subheader("Результаты анализа")
 
@@ -221,6 +266,29 @@ if 'tone_name' in display_data.columns or 'hate_name' in display_data.columns:
             hate_counts = display_data['hate_name'].value_counts()
             st.bar_chart(hate_counts)
 
+# Распределения по всем сохраненным комментариям - из агрегатов comment_stats
+st.subheader("Все сохраненные комментарии")
+try:
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Комментариев в базе", count_comments())
+    with col2:
+        # Ключ '' - комментарии без источника (загруженные файлом или сохраненные до миграции)
+        st.metric("Источников", sum(1 for source in get_comment_distribution("source") if source))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("### Тональность")
+        st.bar_chart(pd.Series(get_comment_distribution("tone"), dtype="int64"))
+    with col2:
+        st.write("### Категории ненависти")
+        st.bar_chart(pd.Series(get_comment_distribution("hate"), dtype="int64"))
+
+    st.write("### Комментарии по дням")
+    st.bar_chart(pd.Series(get_comment_distribution("day"), dtype="int64").rename(index={"": "Без даты"}))
+except Exception as e:
+    st.error(f"Ошибка при получении статистики базы данных: {e}")
+
 # Кнопка для экспорта результатов
 # Создаем экспортируемые данные с наименованиями
 export_data = filtered_data.copy()  # Экспортируем все отфильтрованные данные
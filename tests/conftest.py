@@ -0,0 +1,23 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Модули приложения импортируются относительно src, как в main.py и cli.py
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# База tone_analysis.db и parsers.log создаются в текущем каталоге - тесты не должны трогать рабочие файлы
+os.chdir(tempfile.mkdtemp(prefix="safe-web-space-tests-"))
+
+
+@pytest.fixture
+def test_db(tmp_path):
+    """Отдельная база для теста со схемой и справочниками (db.models.populate_db)"""
+    from db.models import db, populate_db
+
+    db.close()
+    db.init(str(tmp_path / "tone_analysis.db"), pragmas=db._pragmas)
+    populate_db()
+    yield db
+    db.close()
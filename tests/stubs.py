@@ -0,0 +1,177 @@
+import asyncio
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers
+from torch import nn
+from transformers import PreTrainedTokenizerFast
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+# Локальные заглушки API источников для тестов парсеров (comment_parsers.py)
+# и моделей для тестов инференса (algorithms/classifier.py)
+
+BASE_TIME = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class _Request:
+    def __init__(self, handler):
+        self._handler = handler
+
+    def execute(self):
+        return self._handler()
+
+
+class StubYouTube:
+    """Заглушка клиента YouTube Data API: videos().list() и commentThreads().list().
+
+    comments - {video_id: количество комментариев}; комментарий j к видео опубликован
+    позже комментария j + 1 (порядок order='time'). errors - {video_id: (номер страницы, исключение)}.
+    """
+
+    def __init__(self, comments, errors=None, trending_error=None):
+        self.comments = comments
+        self.errors = errors or {}
+        self.trending_error = trending_error
+        self.requests = []
+        self._lock = threading.Lock()
+
+    def videos(self):
+        return SimpleNamespace(list=self._list_videos)
+
+    def commentThreads(self):
+        return SimpleNamespace(list=self._list_comments)
+
+    def _list_videos(self, **kwargs):
+        def handler():
+            if self.trending_error is not None:
+                raise self.trending_error
+            return {"items": [{"id": video_id, "snippet": {"title": f"Видео {video_id}"}}
+                              for video_id in self.comments]}
+        return _Request(handler)
+
+    @staticmethod
+    def published(video_id, number):
+        return BASE_TIME + timedelta(minutes=10_000 - number)
+
+    def _list_comments(self, videoId, maxResults, pageToken=None, **kwargs):
+        def handler():
+            start = int(pageToken or 0)
+            with self._lock:
+                self.requests.append((videoId, start, maxResults))
+                page = sum(1 for request in self.requests if request[0] == videoId)
+            error_page, error = self.errors.get(videoId, (None, None))
+            if error_page == page:
+                raise error
+
+            end = min(start + maxResults, self.comments[videoId])
+            items = [{
+                "id": f"{videoId}-{number}",
+                "snippet": {"topLevelComment": {"snippet": {
+                    "textDisplay": f"Комментарий {number} к {videoId}",
+                    "authorDisplayName": "Автор",
+                    "publishedAt": self.published(videoId, number).isoformat().replace("+00:00", "Z"),
+                    "likeCount": 0,
+                }}},
+            } for number in range(start, end)]
+            response = {"items": items}
+            if end < self.comments[videoId]:
+                response["nextPageToken"] = str(end)
+            return response
+        return _Request(handler)
+
+
+class StubTelegram:
+    """Заглушка TelegramClient: get_entity, GetHistoryRequest (вызов клиента) и get_messages.
+
+    posts - {channel: {post_id: количество комментариев}}; id комментариев поста начинаются с 1.
+    flood_waits - сколько первых запросов get_messages отвечают flood_error (FloodWaitError).
+    В max_in_flight запоминается наибольшее число одновременных запросов get_messages:
+    всего (ключ None) и к каждому каналу.
+    """
+
+    def __init__(self, posts, flood_waits=0, flood_error=None):
+        self.posts = posts
+        self.flood_waits = flood_waits
+        self.flood_error = flood_error
+        self.history_requests = []
+        self.comment_requests = []
+        self.in_flight = Counter()
+        self.max_in_flight = Counter()
+
+    async def get_entity(self, name):
+        await asyncio.sleep(0)
+        if name not in self.posts:
+            raise ValueError(f"Канал {name} не найден")
+        return SimpleNamespace(title=name, name=name)
+
+    async def __call__(self, request):
+        await asyncio.sleep(0)
+        channel = request.peer.name
+        self.history_requests.append((channel, request.limit, request.min_id))
+        post_ids = sorted((post_id for post_id in self.posts[channel] if post_id > request.min_id),
+                          reverse=True)[:request.limit]
+        return SimpleNamespace(messages=[
+            SimpleNamespace(id=post_id, date=BASE_TIME + timedelta(hours=post_id),
+                            replies=SimpleNamespace(max_id=self.posts[channel][post_id]))
+            for post_id in post_ids
+        ])
+
+    async def get_messages(self, entity, reply_to=None, limit=20, min_id=0, reverse=False):
+        self.comment_requests.append((entity.name, reply_to, min_id))
+        for key in (None, entity.name):
+            self.in_flight[key] += 1
+            self.max_in_flight[key] = max(self.max_in_flight[key], self.in_flight[key])
+        try:
+            await asyncio.sleep(0.001)
+        finally:
+            for key in (None, entity.name):
+                self.in_flight[key] -= 1
+
+        if self.flood_waits > 0:
+            self.flood_waits -= 1
+            raise self.flood_error
+        count = self.posts[entity.name][reply_to]
+        # Как в Telethon: по умолчанию от новых к старым, reverse=True - от старых к новым после min_id
+        numbers = range(min_id + 1, count + 1) if reverse else range(count, min_id, -1)
+        return [
+            SimpleNamespace(id=number, text=f"Комментарий {number} к {entity.name}/{reply_to}",
+                            sender=SimpleNamespace(username="user"),
+                            date=BASE_TIME + timedelta(minutes=number), views=0)
+            for number in numbers
+        ][:limit]
+
+
+# Словарь заглушки токенизатора: служебные токены и слова w0..w29 (id 2..31)
+STUB_VOCAB = {"[UNK]": 0, "[PAD]": 1, **{f"w{i}": i + 2 for i in range(30)}}
+
+
+def stub_tokenizer():
+    """Быстрый токенизатор по словам со словарем STUB_VOCAB"""
+    tokenizer = Tokenizer(models.WordLevel(STUB_VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]")
+
+
+class StubClassifier(nn.Module):
+    """Заглушка AutoModelForSequenceClassification: метка строки зависит только от ее токенов.
+
+    label(ids) - метка по списку id токенов без паддинга; логиты - one-hot этой метки, поэтому
+    результат не зависит от состава и паддинга батча. В seen запоминаются токены всех строк.
+    """
+
+    def __init__(self, num_labels, label):
+        super().__init__()
+        self.num_labels = num_labels
+        self.label = label
+        self.seen = []
+
+    def forward(self, input_ids, attention_mask):
+        logits = torch.zeros(len(input_ids), self.num_labels)
+        for row, (ids, mask) in enumerate(zip(input_ids.tolist(), attention_mask.tolist())):
+            tokens = tuple(token for token, keep in zip(ids, mask) if keep)
+            self.seen.append(tokens)
+            logits[row, self.label(tokens) % self.num_labels] = 1.0
+        return SequenceClassifierOutput(logits=logits)
@@ -0,0 +1,30 @@
+from db.models import Comment, bulk_create_comments
+
+
+def test_bulk_create_returns_ids_for_new_and_repeated_rows(test_db):
+    saved = bulk_create_comments([
+        {"text": f"сохранен {i}", "tone_id": 2, "hate_id": 1, "source": "youtube", "external_id": str(i)}
+        for i in range(5)
+    ])
+    # Пропуски в id после удаления не должны сбивать восстановление id вставленных строк
+    Comment.delete().where(Comment.id == saved[2]).execute()
+
+    rows = [
+        {"text": "новый a", "tone_id": 1, "hate_id": 1, "source": "youtube", "external_id": "a"},
+        {"text": "сохранен 1", "tone_id": 2, "hate_id": 1, "source": "youtube", "external_id": "1"},
+        {"text": "без источника", "tone_id": 3, "hate_id": 1},
+        {"text": "новый a", "tone_id": 1, "hate_id": 1, "source": "youtube", "external_id": "a"},
+        {"text": "новый b", "tone_id": 1, "hate_id": 1, "source": "telegram", "external_id": "1"},
+        {"text": "сохранен 4", "tone_id": 2, "hate_id": 1, "source": "youtube", "external_id": "4"},
+        {"text": "без источника", "tone_id": 3, "hate_id": 1},
+        {"text": "новый c", "tone_id": 1, "hate_id": 1, "source": "youtube", "external_id": "c"},
+    ]
+
+    ids = bulk_create_comments(rows, chunk_size=2)
+
+    assert ids[1] == saved[1] and ids[5] == saved[4]
+    assert ids[3] == ids[0]
+    # Строки без external_id не схлопываются
+    assert ids[2] != ids[6]
+    assert [Comment.get_by_id(comment_id).text for comment_id in ids] == [row["text"] for row in rows]
+    assert Comment.select().count() == 4 + 5
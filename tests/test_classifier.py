@@ -0,0 +1,82 @@
+import random
+
+import numpy as np
+import pytest
+import torch
+
+from algorithms import classifier
+from algorithms.batching import make_length_batches
+from algorithms.rules import apply_rules
+from algorithms.tokenization import TokenizationStage
+from stubs import StubClassifier, stub_tokenizer
+
+
+def make_texts(count, seed=0):
+    """Тексты из слов w0..w29 случайной длины (вперемешку короткие и длинные)"""
+    rng = random.Random(seed)
+    return [" ".join(f"w{rng.randrange(30)}" for _ in range(rng.randint(1, 40))) for _ in range(count)]
+
+
+@pytest.fixture
+def bundle(monkeypatch):
+    tokenizer = stub_tokenizer()
+    stage = TokenizationStage(tokenizer, max_length=64)
+    monkeypatch.setattr(classifier, "load_tokenization_stage", lambda: stage)
+    # Маленький бюджет: тексты разной длины попадают в разные батчи
+    monkeypatch.setattr(classifier, "TOKEN_BUDGET", 64)
+    monkeypatch.setattr(classifier, "MAX_BATCH_SIZE", 8)
+    return classifier.ModelBundle(
+        tokenizer=tokenizer,
+        model_tone=StubClassifier(3, lambda tokens: sum(tokens)),
+        model_class=StubClassifier(6, lambda tokens: len(tokens)),
+        device=torch.device("cpu"),
+    )
+
+
+def test_cascade_matches_full_inference(bundle, monkeypatch):
+    texts = make_texts(200)
+
+    monkeypatch.setattr(classifier, "CASCADE_HATE_MODEL", False)
+    assert not bundle.cascade
+    full_tone, full_class = classifier.infer_texts(texts, bundle)
+
+    bundle.model_class.seen.clear()
+    monkeypatch.setattr(classifier, "CASCADE_HATE_MODEL", True)
+    assert bundle.cascade
+    cascade_tone, cascade_class = classifier.infer_texts(texts, bundle)
+
+    insults = full_tone == classifier.INSULT_TONE
+    assert 0 < insults.sum() < len(texts)
+    np.testing.assert_array_equal(cascade_tone, full_tone)
+    # Категория на оскорблениях совпадает, у остальных строк - категория по умолчанию (0)
+    np.testing.assert_array_equal(cascade_class[insults], full_class[insults])
+    assert not cascade_class[~insults].any()
+    # Второй этап видел только оскорбления
+    assert len(bundle.model_class.seen) == insults.sum()
+
+    for left, right in zip(apply_rules(full_tone, full_class), apply_rules(cascade_tone, cascade_class)):
+        np.testing.assert_array_equal(left, right)
+
+
+def test_length_batches_cover_every_text_once_within_budget():
+    lengths = [5, 40, 1, 17, 40, 3, 0, 25, 8, 12]
+
+    batches = make_length_batches(lengths, token_budget=64, max_batch_size=4)
+
+    assert sorted(np.concatenate(batches).tolist()) == list(range(len(lengths)))
+    for batch in batches:
+        assert len(batch) <= 4
+        assert len(batch) == 1 or len(batch) * max(lengths[i] for i in batch) <= 64
+
+
+def test_predictions_keep_input_order(bundle, monkeypatch):
+    monkeypatch.setattr(classifier, "CASCADE_HATE_MODEL", False)
+    texts = make_texts(100, seed=1)
+    ids = [bundle.tokenizer(text)["input_ids"] for text in texts]
+    assert sorted(map(len, ids)) != list(map(len, ids))
+
+    tone, hate = classifier.infer_texts(texts, bundle)
+
+    # Батчи собираются по длине, но предсказание каждой строки стоит на ее исходной позиции
+    assert tone.tolist() == [sum(row) % 3 for row in ids]
+    assert hate.tolist() == [len(row) % 6 for row in ids]
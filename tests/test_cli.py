@@ -0,0 +1,43 @@
+import pandas as pd
+import pytest
+
+from cli import ResultWriter
+
+
+def result_chunk(sentences, comment_ids=None, author=None):
+    df = pd.DataFrame({
+        "sentence": sentences,
+        "author": author if author is not None else [None] * len(sentences),
+        "cluster_id": range(len(sentences)),
+        "tone_prediction": [0] * len(sentences),
+        "class_prediction": [0] * len(sentences),
+        "tone_name": ["нейтральный"] * len(sentences),
+        "hate_name": ["нет"] * len(sentences),
+    })
+    if comment_ids is not None:
+        df["comment_id"] = comment_ids
+    return df
+
+
+@pytest.mark.parametrize("extension", ["parquet", "csv", "jsonl"])
+def test_result_writer_keeps_columns_of_first_chunk(tmp_path, extension):
+    path = str(tmp_path / f"results.{extension}")
+    writer = ResultWriter(path)
+    # Во втором окне нет comment_id (база недоступна), в первом колонка author пустая
+    writer.write(result_chunk(["первый", "второй"], comment_ids=[1, 2]))
+    writer.write(result_chunk(["третий"], author=["Автор"]))
+    writer.close()
+
+    if extension == "parquet":
+        result = pd.read_parquet(path)
+    elif extension == "csv":
+        result = pd.read_csv(path)
+    else:
+        result = pd.read_json(path, lines=True)
+
+    assert list(result.columns) == ["sentence", "author", "cluster_id", "tone_prediction",
+                                    "class_prediction", "tone_name", "hate_name", "comment_id"]
+    assert result["sentence"].tolist() == ["первый", "второй", "третий"]
+    assert result["comment_id"].iloc[:2].tolist() == [1, 2]
+    assert pd.isna(result["comment_id"].iloc[2])
+    assert result["author"].iloc[2] == "Автор"
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from db.models import Comment, CommentStats, bulk_create_comments, get_comment_distribution
+
+
+def test_stats_follow_insert_update_and_delete(test_db):
+    ids = bulk_create_comments([
+        {"text": "первый", "tone_id": 1, "hate_id": 2, "source": "youtube", "external_id": "1"},
+        {"text": "второй", "tone_id": 2, "hate_id": 1, "source": "youtube", "external_id": "2"},
+        {"text": "третий", "tone_id": 2, "hate_id": 1},
+    ])
+    Comment.create(text="старый", tone_id=3, hate_id=1, created_at=datetime(2024, 5, 1, 12))
+
+    assert get_comment_distribution("total") == {"total": 4}
+    assert get_comment_distribution("source") == {"": 2, "youtube": 2}
+    assert get_comment_distribution("tone") == {"Оскорбление": 1, "Нейтральное": 2, "Позитивное": 1}
+    assert get_comment_distribution("day")["2024-05-01"] == 1
+
+    # Изменение меток и источника переносит запись между группами
+    Comment.update(tone_id=3, hate_id=1).where(Comment.id == ids[0]).execute()
+    Comment.update(source="telegram").where(Comment.id == ids[2]).execute()
+
+    assert get_comment_distribution("tone") == {"Нейтральное": 2, "Позитивное": 2}
+    assert get_comment_distribution("hate") == {"Отсутствие оскарбления": 4}
+    assert get_comment_distribution("source") == {"": 1, "telegram": 1, "youtube": 2}
+
+    Comment.delete().where(Comment.id.in_(ids[:2])).execute()
+
+    assert get_comment_distribution("total") == {"total": 2}
+    assert get_comment_distribution("source") == {"": 1, "telegram": 1}
+    assert get_comment_distribution("tone", source="telegram") == {"Нейтральное": 1}
+    # Агрегаты совпадают с пересчетом по таблице comment
+    assert sum(row.count for row in CommentStats.select()) == Comment.select().count()
@@ -0,0 +1,50 @@
+from algorithms.cache import text_hashes
+from algorithms.dedup import Deduplicator
+
+NEGATED = [
+    "Это видео ужасно, автор снова ничего не понял в теме ролика",
+    "Это видео не ужасно, автор снова ничего не понял в теме ролика",
+]
+
+
+def assign(dedup, texts):
+    return dedup.assign(texts, text_hashes(texts)).tolist()
+
+
+def test_exact_repeats_share_a_cluster():
+    dedup = Deduplicator()
+
+    clusters = assign(dedup, ["Спам  спам", "Спам спам ", "СПАМ СПАМ"])
+
+    # Пробелы нормализуются, регистр - нет: модель различает регистр
+    assert clusters[0] == clusters[1] != clusters[2]
+    assert dedup.stats.exact == 1
+    assert dedup.stats.clusters == 2
+
+
+def test_near_duplicates_are_not_merged_by_default():
+    dedup = Deduplicator()
+
+    clusters = assign(dedup, NEGATED)
+
+    assert clusters[0] != clusters[1]
+    assert dedup.stats.near == 0
+
+
+def test_near_duplicates_are_merged_when_enabled():
+    dedup = Deduplicator(near_duplicates=True)
+
+    clusters = assign(dedup, NEGATED)
+
+    assert clusters[0] == clusters[1]
+    assert dedup.stats.near == 1
+
+
+def test_repeats_from_later_chunks_join_earlier_clusters():
+    dedup = Deduplicator()
+
+    first = assign(dedup, ["Первый текст", "Второй текст"])
+    second = assign(dedup, ["Второй текст", "Третий текст"])
+
+    assert second[0] == first[1]
+    assert second[1] not in first
@@ -0,0 +1,24 @@
+import io
+
+import pandas as pd
+
+from ingestion import read_chunks, sniff
+
+
+def read_all(data: bytes, name="comments.csv") -> pd.DataFrame:
+    source = io.BytesIO(data)
+    info = sniff(source, name)
+    return pd.concat(read_chunks(source, 2, info), ignore_index=True)
+
+
+def test_single_column_csv_keeps_commas_in_text():
+    df = read_all("sentence\nПривет, мир\nБез запятых\nРаз; два, три\n".encode("utf-8"))
+
+    assert list(df.columns) == ["sentence"]
+    assert df["sentence"].tolist() == ["Привет, мир", "Без запятых", "Раз; два, три"]
+
+
+def test_delimiter_is_detected_from_header():
+    df = read_all("sentence;author\nПривет, мир;Автор\n".encode("cp1251"))
+
+    assert df.to_dict("records") == [{"sentence": "Привет, мир", "author": "Автор"}]
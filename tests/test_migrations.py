@@ -0,0 +1,44 @@
+import sqlite3
+
+from db.migrations import SCHEMA_VERSION, apply_migrations, get_schema_version
+from db.models import count_comments, db, get_comment_distribution, populate_db, search_comments
+
+# Схема первой версии приложения (до миграций): user_version = 0
+BASELINE_SCHEMA = """
+CREATE TABLE "tone" ("id" INTEGER NOT NULL PRIMARY KEY, "name" VARCHAR(255) NOT NULL);
+CREATE UNIQUE INDEX "tone_name" ON "tone" ("name");
+CREATE TABLE "hate" ("id" INTEGER NOT NULL PRIMARY KEY, "name" VARCHAR(255) NOT NULL);
+CREATE UNIQUE INDEX "hate_name" ON "hate" ("name");
+CREATE TABLE "comment" ("id" INTEGER NOT NULL PRIMARY KEY, "text" VARCHAR(255) NOT NULL,
+    "tone_id" INTEGER NOT NULL, "hate_id" INTEGER NOT NULL,
+    FOREIGN KEY ("tone_id") REFERENCES "tone" ("id"), FOREIGN KEY ("hate_id") REFERENCES "hate" ("id"));
+"""
+
+
+def test_baseline_database_is_upgraded(tmp_path):
+    path = tmp_path / "tone_analysis.db"
+    connection = sqlite3.connect(path)
+    connection.executescript(BASELINE_SCHEMA)
+    connection.executemany('INSERT INTO tone (name) VALUES (?)', [("Оскорбление",), ("Нейтральное",), ("Позитивное",)])
+    connection.executemany('INSERT INTO hate (name) VALUES (?)', [("Отсутствие оскарбления",), ("Ксенофобия",)])
+    connection.executemany('INSERT INTO comment (text, tone_id, hate_id) VALUES (?, ?, ?)',
+                           [("Старый комментарий про видео", 2, 1), ("Еще один старый", 1, 2)])
+    connection.commit()
+    connection.close()
+
+    db.close()
+    db.init(str(path), pragmas=db._pragmas)
+    try:
+        populate_db()
+
+        assert get_schema_version(db) == SCHEMA_VERSION
+        columns = {column.name for column in db.get_columns("comment")}
+        assert {"source", "external_id", "created_at", "model_version", "text_hash", "cluster_hash"} <= columns
+        # Полнотекстовый индекс и агрегаты заполнены по уже сохраненным комментариям
+        assert {row["text"] for row in search_comments("стар")} == {"Старый комментарий про видео", "Еще один старый"}
+        assert count_comments(search="видео") == 1
+        assert get_comment_distribution("source") == {"": 2}
+        # Повторный запуск ничего не мигрирует
+        assert apply_migrations(db) == 0
+    finally:
+        db.close()
@@ -0,0 +1,59 @@
+import pytest
+import torch
+from transformers import BertConfig, BertForSequenceClassification
+
+from algorithms.multihead import MultiHeadClassifier
+from algorithms.onnx_backend import OnnxModel, export_onnx
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+
+# Допустимое расхождение логитов ONNX Runtime и PyTorch (fp32, оптимизации графа ORT)
+ATOL = 1e-4
+
+
+def tiny_config(**kwargs):
+    torch.manual_seed(0)
+    return BertConfig(vocab_size=120, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                      intermediate_size=64, max_position_embeddings=64, **kwargs)
+
+
+def sample_inputs():
+    # Батч и длина отличаются от примера экспорта; во второй строке есть паддинг
+    generator = torch.Generator().manual_seed(1)
+    input_ids = torch.randint(1, 120, (3, 12), generator=generator)
+    attention_mask = torch.ones_like(input_ids)
+    attention_mask[1, 7:] = 0
+    input_ids[1, 7:] = 0
+    return input_ids, attention_mask
+
+
+def assert_parity(expected, actual):
+    assert torch.equal(expected.argmax(dim=-1), actual.argmax(dim=-1))
+    torch.testing.assert_close(actual, expected, atol=ATOL, rtol=1e-4)
+
+
+def test_sequence_classification_export_matches_torch(tmp_path):
+    model = BertForSequenceClassification(tiny_config(num_labels=3)).eval()
+    input_ids, attention_mask = sample_inputs()
+
+    path = export_onnx(model, str(tmp_path / "model_tone.pth"), ["logits"])
+    with torch.no_grad():
+        expected = model(input_ids=input_ids, attention_mask=attention_mask).logits
+    actual = OnnxModel(path)(input_ids, attention_mask).logits
+
+    assert_parity(expected, actual)
+
+
+def test_multihead_export_matches_torch(tmp_path):
+    model = MultiHeadClassifier(tiny_config()).eval()
+    input_ids, attention_mask = sample_inputs()
+
+    path = export_onnx(model, str(tmp_path / "model_multihead.pth"), ["tone_logits", "class_logits"])
+    with torch.no_grad():
+        expected = model(input_ids, attention_mask)
+    actual = OnnxModel(path)(input_ids, attention_mask)
+
+    assert len(actual) == 2
+    for expected_logits, actual_logits in zip(expected, actual):
+        assert_parity(expected_logits, actual_logits)
@@ -0,0 +1,58 @@
+import pytest
+
+from algorithms.pipeline import PipelineClosed, ScrapePipeline
+from comment_parsers import TelegramCommentParser, YouTubeCommentParser
+from db.models import get_checkpoints
+from stubs import StubTelegram, StubYouTube
+
+
+def telegram_parser(stub):
+    return TelegramCommentParser("12345", "0123456789abcdef", list(stub.posts), client=stub, incremental=True)
+
+
+def youtube_parser(stub):
+    return YouTubeCommentParser("test-key", client_factory=lambda: stub, max_workers=2, incremental=True)
+
+
+def test_pipeline_collects_all_comments(test_db):
+    stub = StubTelegram({"@a": {post_id: 3 for post_id in range(1, 6)}})
+    pipeline = ScrapePipeline(telegram_parser(stub).fetch_comments, batch_size=4, max_pending=2)
+
+    batches = list(pipeline)
+
+    assert sum(len(batch) for batch in batches) == pipeline.received == 15
+    assert set(batches[0].columns) >= {"sentence", "source", "external_id", "channel", "post_id"}
+
+
+def test_telegram_fetch_stops_on_pipeline_closed(test_db):
+    stub = StubTelegram({"@a": {1: 2, 2: 2}, "@b": {1: 2}})
+
+    def closed(comments):
+        raise PipelineClosed()
+
+    # Остановка конвейера не принимается за ошибку отдельного канала
+    with pytest.raises(PipelineClosed):
+        telegram_parser(stub).fetch_comments(closed)
+
+
+@pytest.mark.parametrize("source, make_parser, stub", [
+    ("telegram", telegram_parser, StubTelegram({"@a": {post_id: 5 for post_id in range(1, 11)}})),
+    ("youtube", youtube_parser, StubYouTube({f"v{i}": 25 for i in range(2)})),
+])
+def test_checkpoints_are_not_saved_when_inference_fails(test_db, source, make_parser, stub):
+    parser = make_parser(stub)
+    pipeline = ScrapePipeline(parser.fetch_comments, batch_size=5, max_pending=5)
+
+    with pytest.raises(RuntimeError):
+        for _ in pipeline:
+            raise RuntimeError("ошибка инференса")
+    pipeline._thread.join(timeout=5)
+
+    # Неклассифицированные комментарии должны загрузиться снова в следующий запуск
+    assert get_checkpoints(source) == {}
+
+    parser = make_parser(stub)
+    received = sum(len(batch) for batch in ScrapePipeline(parser.fetch_comments))
+    parser.commit_checkpoints()
+    assert received == 50
+    assert get_checkpoints(source)
@@ -0,0 +1,31 @@
+import pytest
+
+from algorithms.preprocessing import clean_texts
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Отлично<br>смешно <b>очень</b>", "Отлично смешно очень"),
+    ('<a href="https://www.youtube.com/watch?v=1&amp;t=60">1:00</a> лучший момент', "1:00 лучший момент"),
+    ("&quot;Шедевр&quot; &#39;да&#39;", "\"Шедевр\" 'да'"),
+    ("Смотри https://example.com/a?b=1 и www.test.org", "Смотри ссылка и ссылка"),
+    ("Подробнее на habr.com/ru/articles/1 и в госуслуги.рф", "Подробнее на ссылка и в ссылка"),
+    ("Пиши на user@mail.ru, @admin ответит", "Пиши на ссылка , @user ответит"),
+    ("Это оооооочень круто!!!!!!", "Это ооочень круто!!!"),
+    ("Цена 1000000 рублей", "Цена 1000000 рублей"),
+    ("😂😂😂😂😂 смешно 🔥👍😎🤩", "😂 смешно 🔥👍😎"),
+])
+def test_clean_texts(text, expected):
+    assert clean_texts([text]) == [expected]
+
+
+@pytest.mark.parametrize("text", [
+    # Предложения без пробела после точки - не адреса
+    "Все ок.Command выполнена",
+    "Hello.Me too",
+    # Знаки сравнения - не теги
+    "1 < 2 и 3 > 2",
+    "x<y, но a>b",
+    "Люблю тебя <3",
+])
+def test_clean_texts_keeps_plain_text(text):
+    assert clean_texts([text]) == [text]
@@ -0,0 +1,52 @@
+import threading
+
+import torch
+from torch import nn
+from transformers import BertConfig, BertForSequenceClassification
+
+from algorithms.safetensors_io import convert_to_safetensors, empty_parameters, load_safetensors_model
+
+
+def test_empty_parameters_keeps_buffers_and_other_threads():
+    built_elsewhere = {}
+    started = threading.Event()
+    release = threading.Event()
+
+    def build_in_other_thread():
+        started.set()
+        release.wait(timeout=5)
+        built_elsewhere["layer"] = nn.Linear(4, 4)
+
+    thread = threading.Thread(target=build_in_other_thread)
+    thread.start()
+    with empty_parameters():
+        started.wait(timeout=5)
+        layer = nn.Linear(4, 4)
+        embedding = nn.Embedding(3, 2)
+        embedding.register_buffer("ids", torch.arange(3), persistent=False)
+        # Модуль из другого потока создается, пока контекст открыт
+        release.set()
+        thread.join(timeout=5)
+
+    assert layer.weight.is_meta and embedding.weight.is_meta
+    assert torch.equal(embedding.ids, torch.arange(3))
+    assert not built_elsewhere["layer"].weight.is_meta
+    assert not nn.Linear(2, 2).weight.is_meta
+
+
+def test_safetensors_round_trip(tmp_path, monkeypatch):
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=50, hidden_size=16, num_hidden_layers=1, num_attention_heads=2,
+                        intermediate_size=32, max_position_embeddings=32, num_labels=3)
+    model = BertForSequenceClassification(config).eval()
+    path = tmp_path / "model_tone.pth"
+    torch.save(model.state_dict(), path)
+    monkeypatch.setattr("algorithms.safetensors_io.AutoConfig.from_pretrained",
+                        lambda checkpoint, **kwargs: config)
+
+    loaded = load_safetensors_model(convert_to_safetensors(str(path), "stub-checkpoint", num_labels=3))
+
+    input_ids = torch.tensor([[2, 5, 7, 1]])
+    with torch.no_grad():
+        torch.testing.assert_close(loaded(input_ids=input_ids).logits, model(input_ids=input_ids).logits)
+    assert not any(tensor.is_meta for tensor in loaded.state_dict().values())
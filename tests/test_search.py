@@ -0,0 +1,32 @@
+import pytest
+
+from db.models import bulk_create_comments, count_comments, get_comments_page, search_comments
+
+
+@pytest.fixture
+def comments(test_db):
+    return bulk_create_comments([
+        {"text": "Отличное видео, спасибо", "tone_id": 1, "hate_id": 1},
+        {"text": "Видео так себе", "tone_id": 2, "hate_id": 1},
+        {"text": "Ужасный звук", "tone_id": 3, "hate_id": 1},
+    ])
+
+
+def test_search_by_word_prefix(comments):
+    assert count_comments(search="виде") == 2
+    assert {row["id"] for row in search_comments("виде")} == set(comments[:2])
+    assert count_comments(tone_id=2, search="видео") == 1
+
+
+@pytest.mark.parametrize("search", ['"', "!!!", " ?! "])
+def test_search_without_words_finds_nothing(comments, search):
+    # Раньше count_comments возвращал общее число записей, а search_comments - пустой список
+    assert count_comments(search=search) == 0
+    assert count_comments(tone_id=1, search=search) == 0
+    assert search_comments(search) == []
+    assert get_comments_page(search=search) == []
+
+
+def test_empty_search_counts_everything(comments):
+    assert count_comments(search="") == 3
+    assert len(get_comments_page()) == 3
@@ -0,0 +1,109 @@
+from telethon.errors import FloodWaitError
+
+from comment_parsers import TelegramCommentParser
+from stubs import StubTelegram
+
+
+def make_parser(stub, channels, **kwargs):
+    return TelegramCommentParser("12345", "0123456789abcdef", channels, client=stub, **kwargs)
+
+
+def flood_wait(seconds):
+    return FloodWaitError(request=None, capture=seconds)
+
+
+def test_posts_limit_caps_posts_per_channel():
+    stub = StubTelegram({
+        "@a": {post_id: 2 for post_id in range(1, 31)},
+        "@b": {post_id: 1 for post_id in range(1, 6)},
+    })
+
+    comments = make_parser(stub, ["@a", "@b"], posts_limit=10).fetch_comments()
+
+    posts = {(c.metadata["channel"], c.metadata["post_id"]) for c in comments}
+    assert {post_id for channel, post_id in posts if channel == "@a"} == set(range(21, 31))
+    assert {post_id for channel, post_id in posts if channel == "@b"} == set(range(1, 6))
+    assert len(comments) == 10 * 2 + 5
+
+
+def test_comments_per_post_are_limited_to_one_request():
+    stub = StubTelegram({"@a": {1: 50}})
+
+    comments = make_parser(stub, ["@a"], posts_limit=10).fetch_comments()
+
+    assert len(comments) == 20
+    assert [c.metadata["comment_id"] for c in comments] == list(range(50, 30, -1))
+
+
+def test_concurrency_limits():
+    stub = StubTelegram({f"@c{i}": {post_id: 1 for post_id in range(1, 21)} for i in range(4)})
+
+    comments = make_parser(stub, list(stub.posts), posts_limit=20,
+                           max_concurrency=5, per_channel_concurrency=2).fetch_comments()
+
+    assert len(comments) == 80
+    assert stub.max_in_flight[None] <= 5
+    assert all(stub.max_in_flight[channel] <= 2 for channel in stub.posts)
+
+
+def test_flood_wait_is_retried():
+    stub = StubTelegram({"@a": {1: 3, 2: 3}}, flood_waits=2, flood_error=flood_wait(0))
+
+    parser = make_parser(stub, ["@a"])
+    comments = parser.fetch_comments()
+
+    assert len(comments) == 6
+    assert parser.stats["flood_waits"] == 2
+    assert len(stub.comment_requests) == 4
+
+
+def test_long_flood_wait_is_not_waited():
+    stub = StubTelegram({"@a": {1: 3, 2: 2}}, flood_waits=1, flood_error=flood_wait(3600))
+
+    parser = make_parser(stub, ["@a"], max_flood_wait=60)
+    comments = parser.fetch_comments()
+
+    # Первым запрашивается самый новый пост 2: FloodWait дольше max_flood_wait не ждется,
+    # пост пропускается, остальные загружаются
+    assert {c.metadata["post_id"] for c in comments} == {1}
+    assert parser.stats["flood_waits"] == 1
+    assert len(stub.comment_requests) == 2
+
+
+def test_unknown_channel_does_not_stop_other_channels():
+    stub = StubTelegram({"@a": {1: 2}})
+
+    comments = make_parser(stub, ["@missing", "@a"]).fetch_comments()
+
+    assert [c.metadata["channel"] for c in comments] == ["@a", "@a"]
+
+
+def test_incremental_requests_only_new_comments(test_db):
+    stub = StubTelegram({"@a": {1: 3, 2: 5}})
+    parser = make_parser(stub, ["@a"], incremental=True)
+    parser.fetch_comments()
+    parser.commit_checkpoints()
+
+    stub.posts["@a"][1] = 5
+    stub.comment_requests.clear()
+    comments = make_parser(stub, ["@a"], incremental=True).fetch_comments()
+
+    # Посты всегда запрашиваются без отметки канала; у поста 1 - только новые комментарии,
+    # пост 2 без новых комментариев (replies.max_id) не запрашивается
+    assert all(min_id == 0 for _, _, min_id in stub.history_requests)
+    assert stub.comment_requests == [("@a", 1, 3)]
+    assert [c.metadata["comment_id"] for c in comments] == [4, 5]
+
+
+def test_incremental_busy_post_is_fetched_over_several_runs(test_db):
+    stub = StubTelegram({"@a": {1: 45}})
+    fetched = []
+
+    for _ in range(4):
+        parser = make_parser(stub, ["@a"], incremental=True)
+        fetched += [c.metadata["comment_id"] for c in parser.fetch_comments()]
+        parser.commit_checkpoints()
+
+    # По COMMENTS_PER_POST комментариев за запуск от старых к новым: каждый получен ровно один раз
+    assert fetched == list(range(1, 46))
+    assert [min_id for _, _, min_id in stub.comment_requests] == [0, 20, 40]
@@ -0,0 +1,37 @@
+import numpy as np
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast
+
+from algorithms.tokenization import TokenizationStage
+
+VOCAB = {"[UNK]": 0, "[PAD]": 1, "очень": 2, "хорошее": 3, "плохое": 4, "видео": 5}
+
+
+def make_tokenizer():
+    tokenizer = Tokenizer(models.WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, unk_token="[UNK]", pad_token="[PAD]")
+
+
+def test_matches_tokenizer_and_stores_int32_arrays():
+    tokenizer = make_tokenizer()
+    stage = TokenizationStage(tokenizer, max_length=3, num_threads=2, batch_size=2)
+    texts = ["очень хорошее видео", "плохое видео", "очень очень очень плохое", "ВИДЕО"]
+
+    input_ids = stage(texts)
+
+    expected = tokenizer(texts, padding=False, truncation=True, max_length=3)["input_ids"]
+    assert [ids.tolist() for ids in input_ids] == expected
+    assert all(ids.dtype == np.int32 for ids in input_ids)
+
+
+def test_cache_counts_hits_and_is_limited_by_tokens():
+    stage = TokenizationStage(make_tokenizer(), max_length=8, cache_max_tokens=5)
+
+    stage(["очень хорошее видео", "плохое видео"])
+    stage(["плохое видео", "видео"])
+
+    assert (stage.hits, stage.misses) == (1, 3)
+    # 3 + 2 + 1 токен: самый старый текст вытеснен, чтобы в кэше было не больше 5 токенов
+    assert stage._cached_tokens <= 5
+    assert len(stage._cache) == 2
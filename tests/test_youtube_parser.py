@@ -0,0 +1,150 @@
+import time
+from datetime import timedelta
+
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from comment_parsers import RateLimiter, YouTubeCommentParser
+from db.models import get_checkpoints
+from stubs import BASE_TIME, StubYouTube
+
+
+def make_parser(stub, **kwargs):
+    kwargs.setdefault("max_workers", 2)
+    return YouTubeCommentParser("test-key", client_factory=lambda: stub, **kwargs)
+
+
+def http_error(status, reason):
+    return HttpError(httplib2.Response({"status": status, "reason": reason}), reason.encode("utf-8"))
+
+
+def test_pagination_collects_every_page_in_trending_order():
+    stub = StubYouTube({"v1": 250, "v2": 30})
+
+    comments = make_parser(stub).fetch_comments()
+
+    assert [c.metadata["comment_id"] for c in comments] == (
+        [f"v1-{i}" for i in range(250)] + [f"v2-{i}" for i in range(30)]
+    )
+    assert sorted(start for video, start, _ in stub.requests if video == "v1") == [0, 100, 200]
+    assert all(size <= YouTubeCommentParser.PAGE_SIZE for _, _, size in stub.requests)
+
+
+def test_per_video_cap_limits_pages_and_page_size():
+    stub = StubYouTube({"v1": 500, "v2": 40})
+
+    comments = make_parser(stub, max_comments_per_video=150).fetch_comments()
+
+    assert sum(c.metadata["video_id"] == "v1" for c in comments) == 150
+    assert sum(c.metadata["video_id"] == "v2" for c in comments) == 40
+    assert sorted((start, size) for video, start, size in stub.requests if video == "v1") == [(0, 100), (100, 50)]
+
+
+def test_total_cap_is_shared_between_videos():
+    stub = StubYouTube({"v1": 100, "v2": 100, "v3": 100})
+
+    comments = make_parser(stub, max_comments_per_video=100, max_total_comments=120).fetch_comments()
+
+    assert len(comments) == 120
+
+
+def test_quota_exhaustion_stops_requests_without_error():
+    stub = StubYouTube({"v1": 1000})
+
+    # 1 единица на список трендов и по одной на каждую страницу комментариев
+    parser = make_parser(stub, max_comments_per_video=1000, quota=3)
+    comments = parser.fetch_comments()
+
+    assert len(comments) == 200
+    assert len(stub.requests) == 2
+    assert parser.rate_limiter.spent == 3
+
+
+def test_http_error_on_one_video_keeps_other_videos():
+    stub = StubYouTube({"v1": 150, "v2": 20},
+                       errors={"v1": (2, http_error(403, "commentsDisabled"))})
+
+    comments = make_parser(stub).fetch_comments()
+
+    # Первая страница v1 получена до ошибки, v2 загружено полностью
+    assert sum(c.metadata["video_id"] == "v1" for c in comments) == 100
+    assert sum(c.metadata["video_id"] == "v2" for c in comments) == 20
+
+
+def test_http_error_on_trending_list_returns_no_comments():
+    stub = StubYouTube({"v1": 10}, trending_error=http_error(403, "quotaExceeded"))
+
+    assert make_parser(stub).fetch_comments() == []
+    assert stub.requests == []
+
+
+def test_incremental_first_run_saves_checkpoint_at_cap(test_db):
+    stub = StubYouTube({"v1": 150, "v2": 30})
+
+    parser = make_parser(stub, max_comments_per_video=100, incremental=True)
+    parser.fetch_comments()
+    parser.commit_checkpoints()
+
+    # Старой отметки нет: v1 получает отметку, хотя загрузка остановилась на лимите
+    assert {key: last_id for key, (last_id, _) in get_checkpoints("youtube").items()} == {
+        "v1": "v1-0", "v2": "v2-0"}
+
+
+def test_incremental_checkpoint_is_held_back_when_gap_remains(test_db):
+    stub = StubYouTube({"v1": 30, "v2": 30})
+    parser = make_parser(stub, incremental=True)
+    parser.fetch_comments()
+    parser.commit_checkpoints()
+    old = get_checkpoints("youtube")
+
+    # 150 новых комментариев к v1 (лимит 100) и 120 к v2 (ошибка на второй странице)
+    stub.published = lambda video_id, number: BASE_TIME + timedelta(minutes=20_000 - number)
+    stub.comments = {"v1": 150, "v2": 120}
+    stub.errors = {"v2": (2, http_error(500, "backendError"))}
+    stub.requests.clear()
+    parser = make_parser(stub, max_comments_per_video=100, incremental=True)
+    parser.fetch_comments()
+    parser.commit_checkpoints()
+
+    # Между старой отметкой и полученными комментариями остался разрыв - отметки не сдвигаются
+    assert get_checkpoints("youtube") == old
+
+
+def test_incremental_fetch_stops_at_checkpoint(test_db):
+    stub = StubYouTube({"v1": 30})
+    parser = make_parser(stub, incremental=True)
+    parser.fetch_comments()
+    parser.commit_checkpoints()
+    stub.requests.clear()
+
+    comments = make_parser(stub, incremental=True).fetch_comments()
+
+    assert comments == []
+    assert stub.requests == [("v1", 0, 100)]
+
+
+def test_rate_limiter_below_one_request_per_second_does_not_hang():
+    limiter = RateLimiter(rate=0.5)
+
+    started = time.monotonic()
+    assert limiter.acquire()
+    assert limiter.acquire(cost=1)
+    elapsed = time.monotonic() - started
+
+    # Емкость корзины - одна единица: первый запрос ждет ~1 с, второй - еще ~2 с
+    assert 2.5 < elapsed < 4.5
+    assert limiter.spent == 2
+
+
+def test_rate_limiter_cost_above_rate_does_not_hang():
+    limiter = RateLimiter(rate=50.0)
+
+    started = time.monotonic()
+    assert limiter.acquire(cost=100)
+    assert time.monotonic() - started < 2.5
+
+
+def test_rate_limiter_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)